@@ -3,71 +3,368 @@
 #                          By-Rubemxz | Enhanced                              #
 # --------------------------------------------------------------------------- #
 
-import tkinter as tk
-from tkinter import messagebox, scrolledtext
-from tkinter import ttk
-from ttkbootstrap import Style
-from ttkbootstrap.constants import DEFAULT
-import pyautogui
+import argparse
+import bisect
+import contextlib
+import csv
+import difflib
+import functools
+import getpass
+import glob
+import heapq
+import sys
 import time
 import json
+import logging
+import logging.handlers
+import math
+import multiprocessing
 import os
+import queue
 import threading
 import re
-from typing import Dict, List, Tuple, Optional
+import socket
+import socketserver
+import unicodedata
+from typing import Callable, Dict, List, Tuple, Optional, Set
 
 # --- ARQUIVOS DE CONFIGURAÇÃO ---
 ARQUIVO_ITENS = 'itens.txt'
+PASTA_CATALOGO = 'catalogo'
 ARQUIVO_COORDENADAS = 'coordenadas.json'
+ARQUIVO_DIARIO = 'diario_execucao.jsonl'
+ARQUIVO_FALHAS = 'falhas_execucao.json'
+ARQUIVO_HISTORICO = 'historico_execucao.db'
+ARQUIVO_ANCORA = 'ancora_raffinato.png'
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+def caminho_catalogo_padrao() -> str:
+    """A pasta 'catalogo' (um arquivo por categoria) quando existe; senão o itens.txt."""
+    pasta = os.path.join(SCRIPT_DIR, PASTA_CATALOGO)
+    return pasta if os.path.isdir(pasta) else os.path.join(SCRIPT_DIR, ARQUIVO_ITENS)
 
 # --- VALORES PADRÃO ---
 DEFAULTS = {
-    'pyautogui_pause': 0.3,
+    'pyautogui_pause': 0.0,
     'tempo_espera_pesquisa': 4.0,
-    'tempo_espera_confirmacao': 1.0
+    'tempo_espera_confirmacao': 1.0,
+    'modo_espera': 'fixo',
+    'intervalo_verificacao_tela': 0.05,
+    'tamanho_regiao_tela': 40,
+    'leituras_estaveis': 2,
+    'modo_digitacao': 'digitar',
+    'verificar_colagem': True,
+    'plano_item': None,
+    'registrar_rastro': True,
+    'pasta_rastros': 'rastros',
+    'rastros_mantidos': 30,
+    'consulta_curta': False,
+    'modo_busca_raffinato': 'contem',
+    'tamanho_minimo_consulta': 3,
+    'consultas_personalizadas': {},
+    'tentativas_item': 3,
+    'espera_entre_tentativas': 0.5,
+    'registrar_historico': True,
+    'medir_resposta_tela': False,
+    'espera_adaptativa': True,
+    'margem_espera_adaptativa': 0.25,
+    'amostras_minimas_espera': 20,
+    'verificar_itens': False,
+    'modo_verificacao': 'grade',
+    'tamanho_regiao_verificacao': [300, 40],
+    'atraso_verificacao': 0.3,
+    'tolerancia_verificacao': 0.02,
+    'tamanho_ancora': [80, 24],
+    'margem_busca_ancora': 150,
+    'tolerancia_ancora': 0.02,
+    'intervalo_conferencia_janela': 1,
+    'arquivo_log': 'logs/robo.log',
+    'tamanho_max_log_mb': 5,
+    'copias_log': 5,
+    'linhas_log_tela': 2000
 }
 
+# Passos de um item; 'pausa' é a espera após o passo, só onde a interface precisa.
+# 'ponto_seguro' marca onde uma pausa pode parar o item (o início do item sempre pode).
+# 'exigir_mudanca' faz a espera por tela falhar (timeout) se o Raffinato não reagir.
+PLANO_ITEM_PADRAO = [
+    {'etapa': 'clique_busca', 'acao': 'clicar', 'alvo': 'busca', 'pausa': 0.05},
+    {'etapa': 'selecionar_busca', 'acao': 'atalho', 'teclas': ['ctrl', 'a']},
+    {'etapa': 'limpar_busca', 'acao': 'tecla', 'tecla': 'delete'},
+    {'etapa': 'digitar_item', 'acao': 'texto', 'valor': 'item'},
+    {'etapa': 'pesquisar', 'acao': 'tecla', 'tecla': 'enter'},
+    {'etapa': 'espera_pesquisa', 'acao': 'aguardar', 'tempo': 'tempo_espera_pesquisa', 'exigir_mudanca': True},
+    {'etapa': 'clique_quantidade', 'acao': 'clicar', 'alvo': 'quantidade', 'pausa': 0.05, 'ponto_seguro': True},
+    {'etapa': 'selecionar_quantidade', 'acao': 'atalho', 'teclas': ['ctrl', 'a']},
+    {'etapa': 'limpar_quantidade', 'acao': 'tecla', 'tecla': 'delete'},
+    {'etapa': 'digitar_quantidade', 'acao': 'texto', 'valor': 'quantidade'},
+    {'etapa': 'tab_quantidade', 'acao': 'tecla', 'tecla': 'tab'},
+    {'etapa': 'espera_confirmacao', 'acao': 'aguardar', 'tempo': 'tempo_espera_confirmacao'},
+    {'etapa': 'confirmar', 'acao': 'tecla', 'tecla': 'enter', 'pausa': 0.1}
+]
+
+# --- CATÁLOGO DE ITENS ---
+CHAVES_METADADOS = ('codigo', 'unidade', 'busca')
+VERSAO_CACHE_CATALOGO = 1
+
+class ErroCatalogo(ValueError):
+    """Catálogo inválido; `erros` traz uma mensagem 'arquivo:linha: problema' por erro."""
+    
+    def __init__(self, erros: List[str]):
+        self.erros = erros
+        super().__init__("\n".join(erros))
+
+class ErroConfiguracao(ValueError):
+    """Arquivo de coordenadas/configurações ilegível ou com valores do tipo errado."""
+
+class Catalogo:
+    """Itens por categoria e seus metadados (código, unidade e texto de busca no Raffinato).
+    
+    Formato dos arquivos (um arquivo único ou uma pasta com um .txt por categoria):
+    
+        # comentário
+        [CATEGORIA]
+        NOME DO ITEM | codigo=123 | unidade=KG | busca=ACETO BALS
+    
+    Numa pasta, a categoria padrão de cada arquivo é o nome dele em maiúsculas.
+    """
+    
+    def __init__(self, categorias: Dict[str, List[str]], metadados: Dict[str, Dict[str, str]]):
+        self.categorias = categorias
+        self.metadados = metadados
+    
+    @property
+    def itens(self) -> List[str]:
+        """Todos os itens, sem repetição, na ordem das categorias."""
+        return list(dict.fromkeys(item for itens in self.categorias.values() for item in itens))
+    
+    @property
+    def aliases(self) -> Dict[str, str]:
+        """Texto de busca no Raffinato por item, para os itens que definem 'busca'."""
+        return {item: dados['busca'] for item, dados in self.metadados.items() if 'busca' in dados}
+    
+    @property
+    def codigos(self) -> Dict[str, str]:
+        return {dados['codigo']: item for item, dados in self.metadados.items() if 'codigo' in dados}
+    
+    def para_dict(self) -> Dict:
+        return {'categorias': self.categorias, 'metadados': self.metadados}
+    
+    @classmethod
+    def de_dict(cls, dados: Dict) -> 'Catalogo':
+        return cls(dados['categorias'], dados['metadados'])
+
+def _arquivos_catalogo(caminho: str) -> List[str]:
+    if os.path.isdir(caminho):
+        return sorted(os.path.join(caminho, nome) for nome in os.listdir(caminho)
+                      if nome.lower().endswith('.txt') and not nome.startswith('.'))
+    return [caminho]
+
+def assinatura_catalogo(caminho: str) -> List[List]:
+    """(arquivo, mtime_ns, tamanho) de cada arquivo do catálogo: muda sempre que algum é editado."""
+    assinatura = []
+    for arquivo in _arquivos_catalogo(caminho):
+        try:
+            estado = os.stat(arquivo)
+        except OSError:
+            assinatura.append([os.path.basename(arquivo), None, None])
+            continue
+        assinatura.append([os.path.basename(arquivo), estado.st_mtime_ns, estado.st_size])
+    return assinatura
+
+def compilar_catalogo(caminho: str) -> Catalogo:
+    """Lê e valida o catálogo; junta todos os problemas encontrados num único ErroCatalogo."""
+    arquivos = _arquivos_catalogo(caminho)
+    if not arquivos:
+        raise ErroCatalogo([f"{caminho}: nenhum arquivo .txt de categoria na pasta"])
+    
+    categorias: Dict[str, List[str]] = {}
+    metadados: Dict[str, Dict[str, str]] = {}
+    origem_codigo: Dict[str, str] = {}
+    erros: List[str] = []
+    em_pasta = os.path.isdir(caminho)
+    
+    for arquivo in arquivos:
+        nome = os.path.basename(arquivo)
+        categoria = os.path.splitext(nome)[0].upper() if em_pasta else None
+        vistos_na_categoria: Dict[str, Set[str]] = {}
+        try:
+            with open(arquivo, 'r', encoding='utf-8-sig') as f:
+                linhas = f.read().splitlines()
+        except OSError as e:
+            erros.append(f"{nome}: não foi possível ler ({e.strerror or e})")
+            continue
+        
+        for numero, linha in enumerate(linhas, start=1):
+            linha = linha.strip()
+            if not linha or linha.startswith('#'):
+                continue
+            local = f"{nome}:{numero}"
+            if linha.startswith('[') and linha.endswith(']'):
+                categoria = linha[1:-1].strip().upper()
+                if not categoria:
+                    erros.append(f"{local}: nome de categoria vazio")
+                    categoria = None
+                continue
+            if categoria is None:
+                erros.append(f"{local}: item '{linha}' antes de qualquer [CATEGORIA]")
+                continue
+            
+            partes = [parte.strip() for parte in linha.split('|')]
+            item, dados = partes[0], {}
+            if not item:
+                erros.append(f"{local}: linha sem nome de item")
+                continue
+            for parte in partes[1:]:
+                chave, separador, valor = (texto.strip() for texto in parte.partition('='))
+                chave = chave.lower()
+                if not separador or not valor:
+                    erros.append(f"{local}: metadado '{parte}' deve ser chave=valor")
+                elif chave not in CHAVES_METADADOS:
+                    erros.append(f"{local}: metadado desconhecido '{chave}' "
+                                 f"(use {', '.join(CHAVES_METADADOS)})")
+                else:
+                    dados[chave] = valor
+            
+            chave_item = normalizar_texto(item)
+            vistos = vistos_na_categoria.setdefault(categoria, set())
+            if chave_item in vistos:
+                erros.append(f"{local}: '{item}' repetido na categoria {categoria}")
+                continue
+            vistos.add(chave_item)
+            
+            if dados:
+                anteriores = metadados.get(item, {})
+                for chave, valor in dados.items():
+                    if chave in anteriores and anteriores[chave] != valor:
+                        erros.append(f"{local}: '{item}' já tem {chave}={anteriores[chave]} em outra categoria")
+                if 'codigo' in dados:
+                    dono = origem_codigo.setdefault(dados['codigo'], item)
+                    if dono != item:
+                        erros.append(f"{local}: código {dados['codigo']} já pertence a '{dono}'")
+                metadados[item] = dict(anteriores, **dados)
+            categorias.setdefault(categoria, []).append(item)
+    
+    if erros:
+        raise ErroCatalogo(erros)
+    return Catalogo(categorias, metadados)
+
+def _campos_errados(secao: str, dados: Dict, padrao: Dict) -> List[str]:
+    """Valida tipos das configurações contra os valores padrão."""
+    erros = []
+    for chave, valor in dados.items():
+        if chave not in padrao:
+            sugestao = difflib.get_close_matches(chave, list(padrao), n=1)
+            dica = f" (quis dizer '{sugestao[0]}'?)" if sugestao else ""
+            erros.append(f"{secao}.{chave}: configuração desconhecida{dica}")
+            continue
+        esperado = padrao[chave]
+        if esperado is None:
+            continue
+        if isinstance(esperado, bool):
+            valido = isinstance(valor, bool)
+        elif isinstance(esperado, (int, float)):
+            valido = isinstance(valor, (int, float)) and not isinstance(valor, bool)
+        else:
+            valido = isinstance(valor, type(esperado))
+        if not valido:
+            erros.append(f"{secao}.{chave}: esperado {type(esperado).__name__}, lido {valor!r}")
+    return erros
+
 class ConfigManager:
     """Gerencia operações de leitura/escrita em arquivos de configuração."""
     
     def __init__(self, caminho_itens: str, caminho_coords: str):
         self.caminho_itens = caminho_itens
         self.caminho_coords = caminho_coords
+        self._catalogo: Optional[Catalogo] = None
+        self._assinatura: Optional[List[List]] = None
+    
+    def _caminho_cache(self) -> str:
+        pasta = self.caminho_itens if os.path.isdir(self.caminho_itens) else os.path.dirname(self.caminho_itens)
+        return os.path.join(pasta, '.catalogo_cache.json')
+    
+    def _ler_cache(self, assinatura: List[List]) -> Optional[Catalogo]:
+        try:
+            with open(self._caminho_cache(), 'r', encoding='utf-8') as f:
+                dados = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if dados.get('versao') != VERSAO_CACHE_CATALOGO or dados.get('assinatura') != assinatura:
+            return None
+        return Catalogo.de_dict(dados['catalogo'])
+    
+    def _gravar_cache(self, assinatura: List[List], catalogo: Catalogo):
+        dados = {'versao': VERSAO_CACHE_CATALOGO, 'assinatura': assinatura, 'catalogo': catalogo.para_dict()}
+        try:
+            with open(self._caminho_cache(), 'w', encoding='utf-8') as f:
+                json.dump(dados, f, ensure_ascii=False)
+        except OSError:
+            pass  # Sem cache só custa reler os arquivos na próxima vez
+    
+    def catalogo_mudou(self) -> bool:
+        """True se algum arquivo do catálogo mudou desde a última carga (só faz os.stat)."""
+        return assinatura_catalogo(self.caminho_itens) != self._assinatura
+    
+    def carregar_catalogo(self) -> Catalogo:
+        """Carrega o catálogo, reaproveitando a versão compilada enquanto os arquivos não mudam.
+        
+        Levanta ErroCatalogo com todos os problemas encontrados.
+        """
+        assinatura = assinatura_catalogo(self.caminho_itens)
+        if self._catalogo is not None and assinatura == self._assinatura:
+            return self._catalogo
+        if any(tamanho is None for _, _, tamanho in assinatura):
+            raise ErroCatalogo([f"{self.caminho_itens}: catálogo não encontrado"])
+        
+        catalogo = self._ler_cache(assinatura)
+        if catalogo is None:
+            catalogo = compilar_catalogo(self.caminho_itens)
+            self._gravar_cache(assinatura, catalogo)
+        self._catalogo, self._assinatura = catalogo, assinatura
+        return catalogo
     
     def carregar_itens(self) -> Dict[str, List[str]]:
         """Carrega itens organizados por categoria."""
-        categorias = {'COZINHA': [], 'CARNES': []}
-        categoria_atual = None
-        
-        try:
-            with open(self.caminho_itens, 'r', encoding='utf-8') as f:
-                for line in f:
-                    line = line.strip()
-                    if not line:
-                        continue
-                    
-                    if line.startswith('[') and line.endswith(']'):
-                        categoria_atual = line[1:-1].upper()
-                        if categoria_atual not in categorias:
-                            categorias[categoria_atual] = []
-                    elif categoria_atual:
-                        categorias[categoria_atual].append(line)
-            
-            return categorias
-        except (FileNotFoundError, IOError) as e:
-            print(f"Erro ao carregar itens: {e}")
-            return categorias
+        return self.carregar_catalogo().categorias
     
     def carregar_configuracoes(self) -> Tuple[Optional[Dict], Dict]:
-        """Carrega coordenadas e configurações do arquivo JSON."""
+        """Carrega coordenadas e configurações do arquivo JSON.
+        
+        Sem o arquivo (primeira execução) devolve os valores padrão; um arquivo
+        ilegível ou com valores errados levanta ErroConfiguracao em vez de ser
+        trocado silenciosamente pelos padrões (e sobrescrito na calibração).
+        """
         try:
-            with open(self.caminho_coords, 'r') as f:
+            with open(self.caminho_coords, 'r', encoding='utf-8') as f:
                 data = json.load(f)
-                coordenadas = data.get('coordenadas')
-                configuracoes = data.get('configuracoes', DEFAULTS)
-                return coordenadas, configuracoes
-        except (FileNotFoundError, json.JSONDecodeError):
+        except FileNotFoundError:
             return None, DEFAULTS
+        except json.JSONDecodeError as e:
+            raise ErroConfiguracao(f"{self.caminho_coords}:{e.lineno}:{e.colno}: JSON inválido ({e.msg})") from e
+        except OSError as e:
+            raise ErroConfiguracao(f"{self.caminho_coords}: não foi possível ler ({e.strerror or e})") from e
+        
+        if not isinstance(data, dict):
+            raise ErroConfiguracao(f"{self.caminho_coords}: esperado um objeto com 'coordenadas' e 'configuracoes'")
+        coordenadas = data.get('coordenadas')
+        configuracoes = data.get('configuracoes', DEFAULTS)
+        erros = []
+        if coordenadas is not None:
+            if not isinstance(coordenadas, dict):
+                erros.append("coordenadas: esperado um objeto")
+            else:
+                for nome, ponto in coordenadas.items():
+                    if not (isinstance(ponto, dict) and isinstance(ponto.get('x'), int)
+                            and isinstance(ponto.get('y'), int)):
+                        erros.append(f"coordenadas.{nome}: esperado {{'x': inteiro, 'y': inteiro}}")
+        if not isinstance(configuracoes, dict):
+            erros.append("configuracoes: esperado um objeto")
+        else:
+            erros.extend(_campos_errados('configuracoes', configuracoes, DEFAULTS))
+        if erros:
+            raise ErroConfiguracao(f"{self.caminho_coords}: " + "; ".join(erros))
+        return coordenadas, configuracoes
     
     def salvar_configuracoes(self, coords: Dict, configs: Dict) -> bool:
         """Salva coordenadas e configurações no arquivo JSON."""
@@ -80,543 +377,3270 @@ class ConfigManager:
             print(f"Erro ao salvar configurações: {e}")
             return False
 
-class AutomationEngine:
-    """Responsável pela execução das automações."""
+# --- BACKENDS DE ENTRADA ---
+class FailsafeAcionado(Exception):
+    """O operador levou o mouse ao canto da tela para abortar a automação."""
+
+class AreaTransferenciaIndisponivel(OSError):
+    """Sem área de transferência utilizável (ex.: Linux sem xclip)."""
+
+class InputBackend:
+    """Interface das ações de mouse, teclado e tela usadas pela automação."""
     
-    def __init__(self, coordenadas: Dict, configs: Dict):
-        self.coordenadas = coordenadas
-        self.configs = configs
-        pyautogui.PAUSE = float(self.configs.get('pyautogui_pause', 0.3))
+    def click(self, x: int, y: int):
+        raise NotImplementedError
+    
+    def hotkey(self, *teclas: str):
+        raise NotImplementedError
+    
+    def press(self, tecla: str):
+        raise NotImplementedError
+    
+    def write(self, texto: str):
+        raise NotImplementedError
+    
+    def screenshot(self, region: Tuple[int, int, int, int]):
+        """Captura uma região (x, y, largura, altura); o retorno expõe tobytes()."""
+        raise NotImplementedError
+    
+    def position(self) -> Tuple[int, int]:
+        raise NotImplementedError
+    
+    def copy(self, texto: str):
+        """Coloca o texto na área de transferência."""
+        raise NotImplementedError
+    
+    def paste(self) -> str:
+        """Lê o texto atual da área de transferência."""
+        raise NotImplementedError
+    
+    def localizar(self, modelo, region: Optional[Tuple[int, int, int, int]] = None) -> Optional[Tuple[int, int]]:
+        """Procura a imagem `modelo` na região (ou na tela inteira); devolve o canto superior esquerdo."""
+        raise NotImplementedError
+    
+    def carregar_imagem(self, caminho: str):
+        """Lê uma imagem salva (ex.: a âncora da calibração) no formato que `localizar` aceita."""
+        raise NotImplementedError
+
+class PyAutoGUIBackend(InputBackend):
+    """Backend real: controla mouse e teclado da sessão gráfica via pyautogui."""
+    
+    def __init__(self, pausa: float = 0.0):
+        # Importado aqui para que o módulo funcione em máquinas sem display
+        import pyautogui
+        import pyperclip
+        self._pyautogui = pyautogui
+        self._pyperclip = pyperclip
+        pyautogui.PAUSE = pausa
         pyautogui.FAILSAFE = True
     
-    def _processar_item(self, item: str, quantidade: float, log_callback):
-        """Processa um único item."""
+    def _chamar(self, funcao, *args, **kwargs):
         try:
-            log_callback(f"📦 Processando: {item} | Qtd: {quantidade:.3f}")
-            
-            # Campo de busca
-            pyautogui.click(self.coordenadas['busca']['x'], self.coordenadas['busca']['y'])
-            pyautogui.hotkey('ctrl', 'a')
-            pyautogui.press('delete')
-            pyautogui.write(item)
-            pyautogui.press('enter')
-            time.sleep(float(self.configs.get('tempo_espera_pesquisa', 4.0)))
-            
-            # Campo de quantidade
-            pyautogui.click(self.coordenadas['quantidade']['x'], self.coordenadas['quantidade']['y'])
-            pyautogui.hotkey('ctrl', 'a')
-            pyautogui.press('delete')
-            pyautogui.write(str(quantidade).replace('.', ','))
-            
-            # Confirmação
-            pyautogui.press('tab')
-            time.sleep(float(self.configs.get('tempo_espera_confirmacao', 1.0)))
-            pyautogui.press('enter')
-            
-            log_callback(f"✅ Item '{item}' processado com sucesso!")
-        except Exception as e:
-            log_callback(f"❌ ERRO ao processar '{item}': {e}")
-            raise
+            return funcao(*args, **kwargs)
+        except self._pyautogui.FailSafeException as e:
+            raise FailsafeAcionado(str(e)) from e
     
-    def run(self, itens: Dict[str, float], log_callback, progress_callback, stop_event, pause_event):
-        """Executa a automação."""
-        total_itens = len(itens)
-        for i, (item, quantidade) in enumerate(itens.items()):
-            if stop_event.is_set():
-                log_callback("⚠️ Automação interrompida pelo usuário.")
-                return "Interrompido"
-            
-            pause_event.wait()
-            self._processar_item(item, quantidade, log_callback)
-            progress_callback(i + 1, total_itens)
-        
-        return "✅ Processamento concluído com sucesso!"
+    def click(self, x: int, y: int):
+        self._chamar(self._pyautogui.click, x, y)
+    
+    def hotkey(self, *teclas: str):
+        self._chamar(self._pyautogui.hotkey, *teclas)
+    
+    def press(self, tecla: str):
+        self._chamar(self._pyautogui.press, tecla)
+    
+    def write(self, texto: str):
+        self._chamar(self._pyautogui.write, texto)
+    
+    def screenshot(self, region: Tuple[int, int, int, int]):
+        return self._pyautogui.screenshot(region=region)
+    
+    def position(self) -> Tuple[int, int]:
+        pos = self._pyautogui.position()
+        return pos.x, pos.y
+    
+    def copy(self, texto: str):
+        try:
+            self._pyperclip.copy(texto)
+        except self._pyperclip.PyperclipException as e:
+            raise AreaTransferenciaIndisponivel(str(e)) from e
+    
+    def paste(self) -> str:
+        try:
+            return self._pyperclip.paste()
+        except self._pyperclip.PyperclipException as e:
+            raise AreaTransferenciaIndisponivel(str(e)) from e
+    
+    def localizar(self, modelo, region: Optional[Tuple[int, int, int, int]] = None) -> Optional[Tuple[int, int]]:
+        # Em tons de cinza e só dentro da região: a busca fica em milissegundos
+        captura = self._pyautogui.screenshot(region=region)
+        try:
+            encontrado = self._pyautogui.locate(modelo, captura, grayscale=True)
+        except self._pyautogui.ImageNotFoundException:
+            return None
+        if encontrado is None:
+            return None
+        deslocamento_x, deslocamento_y = (region[0], region[1]) if region else (0, 0)
+        return deslocamento_x + int(encontrado.left), deslocamento_y + int(encontrado.top)
+    
+    def carregar_imagem(self, caminho: str):
+        from PIL import Image
+        with Image.open(caminho) as imagem:
+            return imagem.convert('RGB')
 
-class RaffinatoGUI:
-    """Interface gráfica principal."""
-    
-    def __init__(self, root: tk.Tk):
-        self.root = root
-        self._configurar_janela()
-        self._inicializar_managers_e_eventos()
-        self._construir_interface()
-        self._atualizar_estado_botoes("ocioso")
-    
-    def _configurar_janela(self):
-        self.root.title("🚀 Robô de Saídas v3.0 PRO - By-Rubemxz")
-        self.root.geometry("1100x800")
-        self.root.minsize(1000, 700)
-    
-    def _inicializar_managers_e_eventos(self):
-        script_dir = os.path.dirname(os.path.abspath(__file__))
-        self.config_manager = ConfigManager(
-            os.path.join(script_dir, ARQUIVO_ITENS),
-            os.path.join(script_dir, ARQUIVO_COORDENADAS)
-        )
-        self.coordenadas, self.configs = self.config_manager.carregar_configuracoes()
-        self.entradas: Dict[str, ttk.Entry] = {}
-        self.widgets_itens: List[Dict] = []
-        self.stop_event = threading.Event()
-        self.pause_event = threading.Event()
-        self.pause_event.set()
-        self.categoria_selecionada = tk.StringVar(value="COZINHA")
-    
-    def _construir_interface(self):
-        self.main_frame = ttk.Frame(self.root, padding="15")
-        self.main_frame.pack(fill="both", expand=True)
-        
-        self._criar_header()
-        self._criar_seletor_categoria()
-        self._criar_barra_pesquisa()
-        self._criar_lista_itens()
-        self._criar_area_log()
-        self._criar_area_progresso()
-        self._criar_botoes_controle()
-    
-    def _criar_header(self):
-        header_frame = ttk.Frame(self.main_frame)
-        header_frame.pack(fill="x", pady=(0, 15))
-        
-        titulo = ttk.Label(
-            header_frame,
-            text="🚀 Robô de Saídas v3.0 PRO",
-            font=("Segoe UI", 22, "bold"),
-            bootstyle="primary"
-        )
-        titulo.pack()
-        
-        subtitulo = ttk.Label(
-            header_frame,
-            text="Sistema Inteligente de Automação de Saídas",
-            font=("Segoe UI", 10),
-            bootstyle="secondary"
-        )
-        subtitulo.pack()
-    
-    def _criar_seletor_categoria(self):
-        cat_frame = ttk.Labelframe(
-            self.main_frame,
-            text=" 📂 Selecione a Categoria ",
-            padding="15",
-            bootstyle="info"
-        )
-        cat_frame.pack(fill="x", pady=(0, 10))
-        
-        btn_frame = ttk.Frame(cat_frame)
-        btn_frame.pack()
-        
-        ttk.Radiobutton(
-            btn_frame,
-            text="🍳 COZINHA",
-            variable=self.categoria_selecionada,
-            value="COZINHA",
-            command=self._trocar_categoria,
-            bootstyle="info-toolbutton",
-            width=20
-        ).pack(side="left", padx=5)
-        
-        ttk.Radiobutton(
-            btn_frame,
-            text="🥩 CARNES",
-            variable=self.categoria_selecionada,
-            value="CARNES",
-            command=self._trocar_categoria,
-            bootstyle="danger-toolbutton",
-            width=20
-        ).pack(side="left", padx=5)
-    
-    def _criar_barra_pesquisa(self):
-        frame_pesquisa = ttk.Frame(self.main_frame)
-        frame_pesquisa.pack(fill="x", pady=(0, 10))
-        
-        ttk.Label(
-            frame_pesquisa,
-            text="🔍 Pesquisar Item:",
-            font=("Segoe UI", 11, "bold")
-        ).pack(side="left", padx=(0, 10))
-        
-        self.search_var = tk.StringVar()
-        self.search_var.trace_add("write", self._filtrar_itens)
-        search_entry = ttk.Entry(frame_pesquisa, textvariable=self.search_var, font=("Segoe UI", 10))
-        search_entry.pack(side="left", fill="x", expand=True)
-    
-    def _criar_lista_itens(self):
-        self.container_itens = ttk.Labelframe(
-            self.main_frame,
-            text=" 📋 Itens para Saída ",
-            padding="10",
-            bootstyle="primary"
-        )
-        self.container_itens.pack(fill="both", expand=True, pady=(0, 10))
-        
-        self.canvas_itens = tk.Canvas(self.container_itens, highlightthickness=0)
-        scrollbar = ttk.Scrollbar(self.container_itens, orient="vertical", command=self.canvas_itens.yview)
-        self.frame_itens = ttk.Frame(self.canvas_itens)
-        
-        self.frame_itens.bind("<Configure>", lambda e: self.canvas_itens.configure(scrollregion=self.canvas_itens.bbox("all")))
-        self.canvas_itens.bind("<MouseWheel>", self._on_mousewheel)
-        
-        self.canvas_itens.create_window((0, 0), window=self.frame_itens, anchor="nw")
-        self.canvas_itens.configure(yscrollcommand=scrollbar.set)
-        self.canvas_itens.pack(side="left", fill="both", expand=True)
-        scrollbar.pack(side="right", fill="y")
-        
-        self._carregar_itens_na_interface()
+class CapturaSimulada:
+    """Captura de tela do RaffinatoSimulado, comparável byte a byte."""
     
-    def _carregar_itens_na_interface(self):
-        self.itens_por_categoria = self.config_manager.carregar_itens()
-        self._atualizar_lista_categoria()
+    def __init__(self, estado: Tuple):
+        self._dados = repr(estado).encode('utf-8')
     
-    def _atualizar_lista_categoria(self):
-        # Limpar widgets existentes
-        for widget in self.frame_itens.winfo_children():
-            widget.destroy()
-        
-        self.entradas.clear()
-        self.widgets_itens.clear()
-        
-        categoria = self.categoria_selecionada.get()
-        itens = self.itens_por_categoria.get(categoria, [])
-        
-        if not itens:
-            ttk.Label(
-                self.frame_itens,
-                text=f"Nenhum item encontrado na categoria {categoria}",
-                bootstyle="warning",
-                font=("Segoe UI", 11)
-            ).pack(pady=20)
+    def tobytes(self) -> bytes:
+        return self._dados
+
+class RaffinatoSimulado(InputBackend):
+    """Substituto em processo do Raffinato para medir e ajustar a automação.
+    
+    Modela o campo de busca, a latência da pesquisa, o foco dos campos e o
+    diálogo de quantidade. Tudo que é confirmado fica em `registros`; ações
+    fora de hora (ex.: clicar na quantidade antes do diálogo abrir) vão para
+    `erros`.
+    """
+    
+    TOLERANCIA_CLIQUE = 30
+    
+    def __init__(self, catalogo: List[str], coordenadas: Dict, latencia_pesquisa: float = 0.3,
+                 latencia_confirmacao: float = 0.1, pausa: float = 0.0):
+        self.catalogo = list(catalogo)
+        self.coordenadas = coordenadas
+        self.latencia_pesquisa = latencia_pesquisa
+        self.latencia_confirmacao = latencia_confirmacao
+        self.pausa = pausa
+        self.campos = {'busca': '', 'quantidade': ''}
+        self.foco: Optional[str] = None
+        self.selecionado = False
+        self.area_transferencia = ''
+        self.dialogo: Optional[Dict] = None
+        self.registros: List[Tuple[str, str]] = []
+        self.erros: List[str] = []
+    
+    def deslocar_janela(self, dx: int, dy: int):
+        """Simula o usuário arrastando a janela do Raffinato."""
+        self.coordenadas = deslocar_coordenadas(self.coordenadas, dx, dy)
+    
+    def _agir(self):
+        if self.pausa:
+            time.sleep(self.pausa)
+    
+    def _dialogo_visivel(self) -> bool:
+        return self.dialogo is not None and time.monotonic() >= self.dialogo['aberto_em']
+    
+    def _campo_em(self, x: int, y: int) -> Optional[str]:
+        for campo in ('busca', 'quantidade'):
+            alvo = self.coordenadas[campo]
+            if abs(alvo['x'] - x) <= self.TOLERANCIA_CLIQUE and abs(alvo['y'] - y) <= self.TOLERANCIA_CLIQUE:
+                return campo
+        return None
+    
+    def _pesquisar(self):
+        termo = self.campos['busca'].strip().lower()
+        encontrados = [item for item in self.catalogo if termo and termo in item.lower()]
+        exatos = [item for item in encontrados if item.lower() == termo]
+        if exatos:
+            encontrados = exatos
+        if len(encontrados) != 1:
+            self.erros.append(f"Pesquisa '{self.campos['busca']}' retornou {len(encontrados)} itens")
             return
-        
-        # Criar header da tabela
-        header_frame = ttk.Frame(self.frame_itens)
-        header_frame.grid(row=0, column=0, columnspan=2, sticky="ew", pady=(0, 10))
-        
-        ttk.Label(
-            header_frame,
-            text="ITEM",
-            font=("Segoe UI", 10, "bold"),
-            bootstyle="inverse-primary"
-        ).grid(row=0, column=0, padx=10, sticky="w")
-        
-        if categoria == "CARNES":
-            ttk.Label(
-                header_frame,
-                text="QUANTIDADE (use + para somar, ex: 25.5+12.6)",
-                font=("Segoe UI", 10, "bold"),
-                bootstyle="inverse-danger"
-            ).grid(row=0, column=1, padx=10, sticky="w")
-        else:
-            ttk.Label(
-                header_frame,
-                text="QUANTIDADE",
-                font=("Segoe UI", 10, "bold"),
-                bootstyle="inverse-info"
-            ).grid(row=0, column=1, padx=10, sticky="w")
-        
-        # Criar linhas de itens
-        for idx, item in enumerate(itens, start=1):
-            frame_item = ttk.Frame(self.frame_itens)
-            frame_item.grid(row=idx, column=0, columnspan=2, sticky="ew", pady=2)
-            
-            label = ttk.Label(
-                frame_item,
-                text=item,
-                font=("Segoe UI", 10),
-                width=60
-            )
-            label.grid(row=0, column=0, padx=10, pady=6, sticky="w")
-            
-            entry = ttk.Entry(frame_item, width=30, font=("Segoe UI", 10))
-            entry.insert(0, "0")
-            entry.grid(row=0, column=1, padx=10, pady=6, sticky="ew")
-            
-            # Bind eventos de scroll
-            label.bind("<MouseWheel>", self._on_mousewheel)
-            entry.bind("<MouseWheel>", self._on_mousewheel)
-            
-            self.entradas[item] = entry
-            self.widgets_itens.append({
-                'frame': frame_item,
-                'label': label,
-                'entry': entry,
-                'item_name': item.lower()
-            })
+        self.dialogo = {
+            'item': encontrados[0],
+            'aberto_em': time.monotonic() + self.latencia_pesquisa,
+            'confirmavel_em': None
+        }
+        self.campos['quantidade'] = ''
     
-    def _trocar_categoria(self):
-        self._atualizar_lista_categoria()
-        self.search_var.set("")
+    def click(self, x: int, y: int):
+        campo = self._campo_em(x, y)
+        if campo == 'quantidade' and not self._dialogo_visivel():
+            self.erros.append("Clique no campo de quantidade com o diálogo fechado")
+            campo = None
+        self.foco = campo
+        self.selecionado = False
+        self._agir()
     
-    def _filtrar_itens(self, *args):
-        termo_busca = self.search_var.get().lower()
-        for widget_info in self.widgets_itens:
-            if termo_busca in widget_info['item_name']:
-                widget_info['frame'].grid()
+    def _inserir(self, texto: str):
+        if self.foco in self.campos:
+            if self.selecionado:
+                self.campos[self.foco] = ''
+            self.campos[self.foco] += texto
+        self.selecionado = False
+    
+    def hotkey(self, *teclas: str):
+        teclas = tuple(teclas)
+        if teclas == ('ctrl', 'a') and self.foco:
+            self.selecionado = True
+        elif teclas == ('ctrl', 'c') and self.foco in self.campos and self.selecionado:
+            self.area_transferencia = self.campos[self.foco]
+        elif teclas == ('ctrl', 'v'):
+            self._inserir(self.area_transferencia)
+        self._agir()
+    
+    def press(self, tecla: str):
+        if tecla in ('delete', 'backspace') and self.foco:
+            if self.selecionado:
+                self.campos[self.foco] = ''
             else:
-                widget_info['frame'].grid_remove()
+                self.campos[self.foco] = self.campos[self.foco][:-1]
+            self.selecionado = False
+        elif tecla == 'enter':
+            if self.foco == 'busca':
+                self._pesquisar()
+            elif self.foco == 'confirmar':
+                confirmavel_em = self.dialogo['confirmavel_em']
+                if time.monotonic() < confirmavel_em:
+                    self.erros.append(f"Confirmação de '{self.dialogo['item']}' antes do tempo")
+                else:
+                    self.registros.append((self.dialogo['item'], self.campos['quantidade']))
+                    self.dialogo = None
+                    self.campos['busca'] = ''
+                    self.foco = 'busca'
+        elif tecla == 'escape':
+            self.dialogo = None
+            self.foco = None
+        elif tecla == 'tab' and self.foco == 'quantidade' and self.dialogo:
+            self.dialogo['confirmavel_em'] = time.monotonic() + self.latencia_confirmacao
+            self.foco = 'confirmar'
+        self._agir()
     
-    def _on_mousewheel(self, event):
-        self.canvas_itens.yview_scroll(-1 * int(event.delta / 120), "units")
+    def write(self, texto: str):
+        # Como o pyautogui, ignora caracteres sem tecla correspondente (Ç, Ê, Ã...)
+        self._inserir(''.join(c for c in texto if ord(c) < 128))
+        self._agir()
     
-    def _criar_area_log(self):
-        log_frame = ttk.Labelframe(
-            self.main_frame,
-            text=" 📄 Log de Execução ",
-            padding="10",
-            bootstyle="secondary"
-        )
-        log_frame.pack(fill="x", pady=(0, 10))
-        
-        self.log_text = scrolledtext.ScrolledText(
-            log_frame,
-            height=8,
-            font=("Consolas", 9),
-            wrap=tk.WORD
-        )
-        self.log_text.pack(fill="both", expand=True)
+    def screenshot(self, region: Tuple[int, int, int, int]):
+        x, y, largura, altura = region
+        campo = self._campo_em(x + largura // 2, y + altura // 2)
+        if campo == 'quantidade':
+            visivel = self._dialogo_visivel()
+            confirmavel = bool(visivel and self.dialogo['confirmavel_em']
+                               and time.monotonic() >= self.dialogo['confirmavel_em'])
+            return CapturaSimulada(('quantidade', visivel, self.campos['quantidade'] if visivel else '', confirmavel))
+        if campo == 'busca':
+            return CapturaSimulada(('busca', self.campos['busca']))
+        grade = self.coordenadas.get('grade')
+        if grade and abs(grade['x'] - (x + largura // 2)) <= self.TOLERANCIA_CLIQUE \
+                and abs(grade['y'] - (y + altura // 2)) <= self.TOLERANCIA_CLIQUE:
+            # A grade do Raffinato ganha uma linha a cada saída registrada
+            return CapturaSimulada(('grade', len(self.registros)))
+        ancora = self.coordenadas.get('ancora')
+        if ancora and (ancora['x'], ancora['y']) == (x, y):
+            return CapturaSimulada(('ancora',))
+        return CapturaSimulada(('fundo',))
     
-    def _criar_area_progresso(self):
-        prog_frame = ttk.Frame(self.main_frame)
-        prog_frame.pack(fill="x", pady=(0, 10))
-        
-        self.progressbar = ttk.Progressbar(prog_frame, mode='determinate', bootstyle="success-striped")
-        self.progressbar.pack(fill="x")
+    def position(self) -> Tuple[int, int]:
+        return 0, 0
+    
+    def localizar(self, modelo, region: Optional[Tuple[int, int, int, int]] = None) -> Optional[Tuple[int, int]]:
+        ancora = self.coordenadas.get('ancora')
+        if not ancora or modelo.tobytes() != CapturaSimulada(('ancora',)).tobytes():
+            return None
+        if region:
+            x, y, largura, altura = region
+            if not (x <= ancora['x'] and ancora['x'] + ancora['largura'] <= x + largura
+                    and y <= ancora['y'] and ancora['y'] + ancora['altura'] <= y + altura):
+                return None
+        return ancora['x'], ancora['y']
+    
+    def carregar_imagem(self, caminho: str):
+        return CapturaSimulada(('ancora',))
+    
+    def copy(self, texto: str):
+        self.area_transferencia = texto
+    
+    def paste(self) -> str:
+        return self.area_transferencia
+
+class BackendCronometrado(InputBackend):
+    """Envolve outro backend medindo a duração de cada ação."""
+    
+    def __init__(self, backend: InputBackend):
+        self.backend = backend
+        self.duracoes: Dict[str, List[float]] = {}
+    
+    def _medir(self, acao: str, funcao, *args, **kwargs):
+        inicio = time.perf_counter()
+        try:
+            return funcao(*args, **kwargs)
+        finally:
+            self.duracoes.setdefault(acao, []).append(time.perf_counter() - inicio)
+    
+    def click(self, x: int, y: int):
+        self._medir('click', self.backend.click, x, y)
+    
+    def hotkey(self, *teclas: str):
+        self._medir('hotkey', self.backend.hotkey, *teclas)
+    
+    def press(self, tecla: str):
+        self._medir('press', self.backend.press, tecla)
+    
+    def write(self, texto: str):
+        self._medir('write', self.backend.write, texto)
+    
+    def screenshot(self, region: Tuple[int, int, int, int]):
+        return self._medir('screenshot', self.backend.screenshot, region)
+    
+    def position(self) -> Tuple[int, int]:
+        return self.backend.position()
+    
+    def copy(self, texto: str):
+        self._medir('copy', self.backend.copy, texto)
+    
+    def paste(self) -> str:
+        return self._medir('paste', self.backend.paste)
+    
+    def localizar(self, modelo, region: Optional[Tuple[int, int, int, int]] = None) -> Optional[Tuple[int, int]]:
+        return self._medir('localizar', self.backend.localizar, modelo, region)
+    
+    def carregar_imagem(self, caminho: str):
+        return self.backend.carregar_imagem(caminho)
+
+# --- PLANO DE AÇÕES DO ITEM ---
+ACOES_PLANO = {
+    'clicar': ('alvo',),
+    'atalho': ('teclas',),
+    'tecla': ('tecla',),
+    'texto': ('valor',),
+    'aguardar': ('tempo',)
+}
+
+# Configurações que um passo 'aguardar' pode usar como tempo (só as numéricas)
+_CONFIGURACOES_TEMPO = {
+    chave for chave, valor in DEFAULTS.items()
+    if isinstance(valor, (int, float)) and not isinstance(valor, bool)
+}
+
+def _validar_passo(indice: int, passo: Dict) -> Dict:
+    """Confere um passo declarado e devolve uma cópia normalizada."""
+    if not isinstance(passo, dict):
+        raise ValueError(f"Passo {indice} do plano não é um objeto: {passo!r}")
+    acao = passo.get('acao')
+    if acao not in ACOES_PLANO:
+        raise ValueError(f"Passo {indice} do plano tem ação desconhecida: {acao!r}")
+    for campo in ACOES_PLANO[acao]:
+        if campo not in passo:
+            raise ValueError(f"Passo {indice} ({acao}) sem o campo obrigatório '{campo}'")
+    if acao == 'clicar' and passo['alvo'] not in ('busca', 'quantidade'):
+        raise ValueError(f"Passo {indice}: alvo de clique inválido: {passo['alvo']!r}")
+    if acao == 'texto' and passo['valor'] not in ('item', 'quantidade'):
+        raise ValueError(f"Passo {indice}: valor de texto inválido: {passo['valor']!r}")
+    if acao == 'aguardar' and not isinstance(passo['tempo'], (int, float)) and passo['tempo'] not in _CONFIGURACOES_TEMPO:
+        raise ValueError(f"Passo {indice}: tempo deve ser um número ou uma configuração numérica: {passo['tempo']!r}")
+    
+    normalizado = dict(passo)
+    normalizado['etapa'] = str(passo.get('etapa', acao))
+    normalizado['pausa'] = float(passo.get('pausa', 0.0))
+    normalizado['ponto_seguro'] = bool(passo.get('ponto_seguro', False))
+    normalizado['exigir_mudanca'] = bool(passo.get('exigir_mudanca', False))
+    if acao == 'atalho':
+        normalizado['teclas'] = [str(t) for t in passo['teclas']]
+    return normalizado
+
+def compilar_plano(passos: List[Dict]) -> List[Dict]:
+    """Compila o plano declarado em passos executáveis.
     
-    def _criar_botoes_controle(self):
-        botoes_frame = ttk.Frame(self.main_frame)
-        botoes_frame.pack(fill="x")
+    - ctrl+a + delete seguidos de texto viram um único 'sobrescrever';
+    - a pausa antes de um 'aguardar' é descartada, pois a espera já a cobre;
+    - o passo que precede um 'aguardar' captura a referência da tela.
+    """
+    validados = [_validar_passo(i, passo) for i, passo in enumerate(passos)]
+    compilado: List[Dict] = []
+    i = 0
+    while i < len(validados):
+        passo = validados[i]
+        seguintes = validados[i + 1:i + 3]
+        if (passo['acao'] == 'atalho' and [t.lower() for t in passo['teclas']] == ['ctrl', 'a']
+                and len(seguintes) == 2
+                and seguintes[0]['acao'] == 'tecla' and seguintes[0]['tecla'] in ('delete', 'backspace')
+                and seguintes[1]['acao'] == 'texto'):
+            compilado.append({
+                'etapa': seguintes[1]['etapa'],
+                'acao': 'sobrescrever',
+                'valor': seguintes[1]['valor'],
+                'pausa': seguintes[1]['pausa'],
+                'ponto_seguro': passo['ponto_seguro']
+            })
+            i += 3
+            continue
         
-        self.btn_iniciar = ttk.Button(
-            botoes_frame,
-            text="▶ INICIAR AUTOMAÇÃO",
-            command=self._iniciar_automacao,
-            bootstyle="success",
-            width=25
-        )
-        self.btn_iniciar.grid(row=0, column=0, padx=5, sticky="ew")
-        
-        self.btn_pausar = ttk.Button(
-            botoes_frame,
-            text="⏸ PAUSAR",
-            command=self._pausar_retomar_automacao,
-            bootstyle="warning",
-            width=20
-        )
-        self.btn_pausar.grid(row=0, column=1, padx=5, sticky="ew")
-        
-        self.btn_parar = ttk.Button(
-            botoes_frame,
-            text="⏹ PARAR",
-            command=self._parar_automacao,
-            bootstyle="danger",
-            width=20
-        )
-        self.btn_parar.grid(row=0, column=2, padx=5, sticky="ew")
-        
-        self.btn_limpar = ttk.Button(
-            botoes_frame,
-            text="🧹 LIMPAR CAMPOS",
-            command=self._limpar_campos,
-            bootstyle="secondary",
-            width=20
-        )
-        self.btn_limpar.grid(row=0, column=3, padx=5, sticky="ew")
-        
-        for i in range(4):
-            botoes_frame.columnconfigure(i, weight=1)
-    
-    def _adicionar_log(self, mensagem: str):
-        if self.root.winfo_exists():
-            timestamp = time.strftime('%H:%M:%S')
-            self.log_text.insert(tk.END, f"[{timestamp}] {mensagem}\n")
-            self.log_text.see(tk.END)
-            self.root.update_idletasks()
-    
-    def _atualizar_progresso(self, valor, total):
-        if self.root.winfo_exists():
-            self.progressbar['value'] = valor
-            self.progressbar['maximum'] = total
-            self.root.update_idletasks()
-    
-    def _limpar_campos(self):
-        for entry in self.entradas.values():
-            entry.delete(0, tk.END)
-            entry.insert(0, "0")
-        self._adicionar_log("🧹 Campos de quantidade foram limpos.")
-    
-    def _calcular_soma(self, expressao: str) -> float:
-        """Calcula soma de expressões matemáticas (ex: 25.5+12.6)."""
-        try:
-            # Substituir vírgulas por pontos
-            expressao = expressao.replace(',', '.')
-            # Avaliar expressão matemática simples
-            resultado = eval(expressao, {"__builtins__": {}}, {})
-            return float(resultado)
-        except:
-            return 0.0
-    
-    def _obter_itens_selecionados(self) -> Dict[str, float]:
-        """Obtém itens com quantidade > 0."""
-        itens_processados = {}
-        categoria = self.categoria_selecionada.get()
-        
-        for item, entry in self.entradas.items():
-            valor_str = entry.get().strip()
-            
-            if not valor_str or valor_str == "0":
-                continue
-            
-            # Para categoria CARNES, calcular soma se houver operação
-            if categoria == "CARNES" and ('+' in valor_str or '-' in valor_str or '*' in valor_str or '/' in valor_str):
-                quantidade = self._calcular_soma(valor_str)
-                if quantidade > 0:
-                    itens_processados[item] = quantidade
-                    self._adicionar_log(f"🧮 {item}: {valor_str} = {quantidade:.3f}")
-            else:
-                try:
-                    quantidade = float(valor_str.replace(',', '.'))
-                    if quantidade > 0:
-                        itens_processados[item] = quantidade
-                except ValueError:
-                    self._adicionar_log(f"⚠️ Valor inválido para '{item}': {valor_str}")
-        
-        return itens_processados
-    
-    def _atualizar_estado_botoes(self, estado: str):
-        if estado == "ocioso":
-            self.btn_iniciar.config(state="normal")
-            self.btn_pausar.config(state="disabled", text="⏸ PAUSAR")
-            self.btn_parar.config(state="disabled")
-            self.btn_limpar.config(state="normal")
-        elif estado == "executando":
-            self.btn_iniciar.config(state="disabled")
-            self.btn_pausar.config(state="normal", text="⏸ PAUSAR")
-            self.btn_parar.config(state="normal")
-            self.btn_limpar.config(state="disabled")
-        elif estado == "pausado":
-            self.btn_iniciar.config(state="disabled")
-            self.btn_pausar.config(state="normal", text="▶ RETOMAR")
-            self.btn_parar.config(state="normal")
-            self.btn_limpar.config(state="disabled")
-    
-    def _pausar_retomar_automacao(self):
-        if self.pause_event.is_set():
-            self.pause_event.clear()
-            self._adicionar_log("⏸ Automação PAUSADA.")
-            self._atualizar_estado_botoes("pausado")
+        anterior = compilado[-1] if compilado else None
+        if anterior and passo['acao'] == 'aguardar':
+            anterior['pausa'] = 0.0
+            anterior['referencia'] = True
+            compilado.append(passo)
         else:
-            self.pause_event.set()
-            self._adicionar_log("▶ Automação RETOMADA.")
-            self._atualizar_estado_botoes("executando")
-    
-    def _parar_automacao(self):
-        if messagebox.askyesno("Parar Automação", "⚠️ Tem certeza que deseja parar a execução?"):
-            self.stop_event.set()
-            if not self.pause_event.is_set():
-                self.pause_event.set()
-            self._adicionar_log("🛑 Parada solicitada pelo usuário...")
-    
-    def _calibrar_gps(self):
-        self.root.iconify()
-        try:
-            messagebox.showinfo(
-                "🎯 Calibração Necessária",
-                "Vamos calibrar as posições do mouse.\n\n"
-                "Pressione OK e siga as instruções no console."
-            )
-            
-            print("\n" + "="*60)
-            print("CALIBRAÇÃO - PASSO 1")
-            print("="*60)
-            input("Posicione o mouse sobre o CAMPO DE BUSCA e pressione Enter...")
-            busca_pos = pyautogui.position()
-            print(f"✅ Coordenada registrada: X={busca_pos.x}, Y={busca_pos.y}\n")
-            
-            messagebox.showinfo(
-                "🎯 Calibração - Passo 2",
-                "Agora, no sistema Raffinato, pesquise um item qualquer\n"
-                "para que a janela de ajuste de quantidade apareça.\n\n"
-                "Pressione OK quando estiver pronto."
-            )
-            
-            print("="*60)
-            print("CALIBRAÇÃO - PASSO 2")
-            print("="*60)
-            input("Posicione o mouse sobre o CAMPO DE QUANTIDADE e pressione Enter...")
-            quantidade_pos = pyautogui.position()
-            print(f"✅ Coordenada registrada: X={quantidade_pos.x}, Y={quantidade_pos.y}\n")
-            
-            self.coordenadas = {
-                'busca': {'x': busca_pos.x, 'y': busca_pos.y},
-                'quantidade': {'x': quantidade_pos.x, 'y': quantidade_pos.y}
-            }
-            
-            if self.config_manager.salvar_configuracoes(self.coordenadas, self.configs):
-                messagebox.showinfo("✅ Sucesso", "Calibração concluída com sucesso!")
-                self._adicionar_log("✅ Calibração GPS concluída com sucesso!")
-            else:
-                messagebox.showerror("❌ Erro", "Não foi possível salvar as coordenadas.")
-        finally:
-            self.root.deiconify()
+            compilado.append(passo)
+        i += 1
     
-    def _iniciar_automacao(self):
-        if not self.coordenadas:
-            self._calibrar_gps()
-            if not self.coordenadas:
-                self._adicionar_log("❌ Calibração cancelada. Automaçãonão iniciada.")
-                return
+    for passo in compilado:
+        passo.setdefault('referencia', False)
+    return compilado
+
+def aplicar_pausa_legada(plano: List[Dict], pausa: float) -> List[Dict]:
+    """Leva o antigo 'pyautogui_pause' (pausa após toda ação) para o plano compilado.
+    
+    Ele passa a ser a pausa mínima só dos passos que já pausam para a interface
+    assentar; as demais ações seguem sem espera.
+    """
+    if pausa > 0:
+        for passo in plano:
+            if passo['pausa'] > 0:
+                passo['pausa'] = max(passo['pausa'], pausa)
+    return plano
+
+# --- BUSCA DE ITENS ---
+_SEPARADORES_BUSCA = re.compile(r'[^0-9a-z]+')
+
+def normalizar_texto(texto: str) -> str:
+    """Remove acentos e diferenças de maiúsculas (ex.: 'AÇUCAR SACHÊ' -> 'acucar sache')."""
+    decomposto = unicodedata.normalize('NFKD', texto)
+    return ''.join(c for c in decomposto if not unicodedata.combining(c)).casefold()
+
+def _termos_busca(texto: str) -> List[str]:
+    return [termo for termo in _SEPARADORES_BUSCA.split(normalizar_texto(texto)) if termo]
+
+class IndiceBusca:
+    """Índice de palavras do catálogo para a pesquisa da interface.
+    
+    Um item combina quando cada termo da consulta é prefixo de alguma de suas
+    palavras, ignorando acentos e maiúsculas. Se a consulta só estende a
+    anterior, o resultado é refinado a partir do último em vez do índice.
+    """
+    
+    def __init__(self, itens: List[str]):
+        self.itens = list(itens)
+        self._palavras_itens = [tuple(_termos_busca(item)) for item in self.itens]
+        por_palavra: Dict[str, List[int]] = {}
+        for indice, palavras in enumerate(self._palavras_itens):
+            for palavra in set(palavras):
+                por_palavra.setdefault(palavra, []).append(indice)
+        self._palavras = sorted(por_palavra)
+        self._itens_por_palavra = [por_palavra[palavra] for palavra in self._palavras]
+        self._ultimos_termos: List[str] = []
+        self._ultimo_resultado = list(range(len(self.itens)))
+    
+    def _com_prefixo(self, prefixo: str) -> Set[int]:
+        encontrados: Set[int] = set()
+        posicao = bisect.bisect_left(self._palavras, prefixo)
+        while posicao < len(self._palavras) and self._palavras[posicao].startswith(prefixo):
+            encontrados.update(self._itens_por_palavra[posicao])
+            posicao += 1
+        return encontrados
+    
+    def _combina(self, indice: int, termos: List[str]) -> bool:
+        palavras = self._palavras_itens[indice]
+        return all(any(palavra.startswith(termo) for palavra in palavras) for termo in termos)
+    
+    def _refina_anterior(self, termos: List[str]) -> bool:
+        anteriores = self._ultimos_termos
+        return (bool(anteriores) and len(termos) >= len(anteriores)
+                and all(novo.startswith(antigo) for novo, antigo in zip(termos, anteriores)))
+    
+    def buscar(self, consulta: str) -> List[int]:
+        """Índices, na ordem do catálogo, dos itens que combinam com a consulta."""
+        termos = _termos_busca(consulta)
+        if not termos:
+            resultado = list(range(len(self.itens)))
+        elif self._refina_anterior(termos):
+            resultado = [i for i in self._ultimo_resultado if self._combina(i, termos)]
+        else:
+            candidatos: Optional[Set[int]] = None
+            for termo in sorted(termos, key=len, reverse=True):
+                encontrados = self._com_prefixo(termo)
+                candidatos = encontrados if candidatos is None else candidatos & encontrados
+                if not candidatos:
+                    break
+            resultado = sorted(i for i in candidatos if self._combina(i, termos))
         
-        itens_a_processar = self._obter_itens_selecionados()
-        if not itens_a_processar:
-            messagebox.showwarning("⚠️ Aviso", "Nenhum item com quantidade foi selecionado.")
-            return
+        self._ultimos_termos = termos
+        self._ultimo_resultado = resultado
+        return resultado
+
+class IndiceConsultas:
+    """Menor texto de pesquisa que seleciona cada item sozinho na busca do Raffinato.
+    
+    Quase todo item começa com "MP - ", então digitar o nome inteiro é
+    desperdício. Em `modo='contem'` (a busca do Raffinato procura o texto em
+    qualquer parte do nome) a consulta é o menor trecho, começando no início de
+    uma palavra, que só aparece naquele item; em `modo='prefixo'` é o menor
+    prefixo único. A unicidade é avaliada sem acentos e sem maiúsculas, o que
+    é conservador para uma busca que diferencie esses caracteres. Trechos só
+    com ASCII são preferidos, pois podem ser digitados se a colagem falhar.
+    `personalizadas` ({item: consulta}) tem prioridade sobre o cálculo.
+    """
+    
+    def __init__(self, catalogo: List[str], personalizadas: Optional[Dict[str, str]] = None,
+                 tamanho_minimo: int = 3, modo: str = 'contem'):
+        if modo not in ('contem', 'prefixo'):
+            raise ValueError(f"Modo de busca desconhecido: {modo!r}")
+        self.catalogo = list(dict.fromkeys(catalogo))
+        self.personalizadas = dict(personalizadas or {})
+        self.tamanho_minimo = max(1, int(tamanho_minimo))
+        self.modo = modo
+        self._normalizados = [normalizar_texto(item) for item in self.catalogo]
+        self._posicao = {item: i for i, item in enumerate(self.catalogo)}
+        self._cache: Dict[str, str] = {}
+        self._trigramas: Dict[str, Set[int]] = {}
+        for indice, nome in enumerate(self._normalizados):
+            for i in range(len(nome) - 2):
+                self._trigramas.setdefault(nome[i:i + 3], set()).add(indice)
+    
+    def _candidatos(self, trecho: str) -> Set[int]:
+        """Itens que contêm o trecho normalizado (usa os trigramas para restringir)."""
+        if len(trecho) < 3:
+            return {i for i, nome in enumerate(self._normalizados) if trecho in nome}
+        conjunto: Optional[Set[int]] = None
+        for i in range(len(trecho) - 2):
+            encontrados = self._trigramas.get(trecho[i:i + 3], set())
+            conjunto = encontrados if conjunto is None else conjunto & encontrados
+            if not conjunto:
+                return set()
+        return {i for i in conjunto if trecho in self._normalizados[i]}
+    
+    def _menor_trecho(self, indice: int) -> str:
+        item = self.catalogo[indice]
+        nome = self._normalizados[indice]
+        if len(nome) != len(item):
+            # A normalização mudou o tamanho (caractere incomum); usar o nome inteiro
+            return item
         
-        self.stop_event.clear()
-        self.pause_event.set()
-        self._atualizar_progresso(0, len(itens_a_processar))
-        self._atualizar_estado_botoes("executando")
+        if self.modo == 'prefixo':
+            inicios = [0]
+        else:
+            inicios = [i for i, c in enumerate(nome) if c.isalnum() and (i == 0 or not nome[i - 1].isalnum())]
         
-        self._adicionar_log(f"🚀 Iniciando automação com {len(itens_a_processar)} item(ns)...")
-        self._adicionar_log(f"📂 Categoria: {self.categoria_selecionada.get()}")
+        # Para cada início, o conjunto de itens que ainda contêm o trecho só diminui
+        ativos = {}
+        for inicio in inicios:
+            fim = inicio + self.tamanho_minimo
+            if fim <= len(nome):
+                ativos[inicio] = self._candidatos(nome[inicio:fim])
         
-        threading.Thread(
-            target=self._thread_executar_automacao,
-            args=(itens_a_processar,),
-            daemon=True
-        ).start()
+        reserva = None
+        for tamanho in range(self.tamanho_minimo, len(nome) + 1):
+            for inicio in list(ativos):
+                fim = inicio + tamanho
+                if fim > len(nome):
+                    del ativos[inicio]
+                    continue
+                trecho = nome[inicio:fim]
+                if self.modo == 'prefixo':
+                    iguais = {i for i in ativos[inicio] if self._normalizados[i].startswith(trecho)}
+                else:
+                    iguais = {i for i in ativos[inicio] if trecho in self._normalizados[i]}
+                ativos[inicio] = iguais
+                if iguais != {indice} or trecho[-1] == ' ':
+                    continue
+                consulta = item[inicio:fim]
+                if consulta.isascii():
+                    return consulta
+                if reserva is None:
+                    reserva = consulta
+            if reserva is not None and not ativos:
+                break
+        return reserva or item
+    
+    def consulta(self, item: str) -> str:
+        """Texto a digitar na busca para o item (o nome inteiro se não houver atalho seguro)."""
+        if item in self.personalizadas:
+            return self.personalizadas[item]
+        if item not in self._cache:
+            indice = self._posicao.get(item)
+            self._cache[item] = item if indice is None else self._menor_trecho(indice)
+        return self._cache[item]
+    
+    def precalcular(self) -> Dict[str, str]:
+        """Calcula a consulta de todo o catálogo de uma vez."""
+        return {item: self.consulta(item) for item in self.catalogo}
+
+# --- RASTRO DE TEMPOS ---
+def _percentil(valores: List[float], fracao: float) -> float:
+    """Percentil por posição mais próxima (valores já não precisam estar ordenados)."""
+    ordenados = sorted(valores)
+    indice = min(len(ordenados) - 1, max(0, int(round(fracao * (len(ordenados) - 1)))))
+    return ordenados[indice]
+
+def _caminho_local(caminho: str) -> str:
+    """Resolve caminhos relativos a partir da pasta do robô."""
+    return caminho if os.path.isabs(caminho) else os.path.join(SCRIPT_DIR, caminho)
+
+class RastroExecucao:
+    """Cronometra cada passo de uma execução e grava um rastro JSONL opcional.
+    
+    Só os `manter` rastros mais recentes da pasta são guardados (0 = todos).
+    """
+    
+    def __init__(self, pasta: Optional[str] = None, manter: int = 0):
+        self.caminho: Optional[str] = None
+        self._arquivo = None
+        if pasta:
+            os.makedirs(pasta, exist_ok=True)
+            self.caminho = os.path.join(pasta, time.strftime('execucao-%Y%m%d-%H%M%S.jsonl'))
+            self._arquivo = open(self.caminho, 'a', encoding='utf-8')
+            if manter > 0:
+                self._apagar_antigos(pasta, manter)
+        self.duracoes_ns: Dict[str, List[int]] = {}
+        self.itens_concluidos = 0
+        self._inicio_ns = time.perf_counter_ns()
+    
+    def registrar(self, item: str, etapa: str, duracao_ns: int):
+        """Registra a duração de uma etapa de um item."""
+        self.duracoes_ns.setdefault(etapa, []).append(duracao_ns)
+        if self._arquivo:
+            registro = {
+                't_ns': time.perf_counter_ns() - self._inicio_ns,
+                'item': item,
+                'etapa': etapa,
+                'duracao_ns': duracao_ns
+            }
+            self._arquivo.write(json.dumps(registro, ensure_ascii=False) + '\n')
+    
+    @staticmethod
+    def _apagar_antigos(pasta: str, manter: int):
+        # O nome traz a data e a hora: a ordem alfabética é a cronológica
+        antigos = sorted(glob.glob(os.path.join(glob.escape(pasta), 'execucao-*.jsonl')))[:-manter]
+        for caminho in antigos:
+            try:
+                os.remove(caminho)
+            except OSError:
+                pass  # Rastro é opcional: um arquivo preso fica para a próxima limpeza
+    
+    def concluir_item(self, item: str, duracao_ns: int):
+        self.itens_concluidos += 1
+        self.registrar(item, 'item', duracao_ns)
+    
+    def fechar(self):
+        if self._arquivo:
+            self._arquivo.close()
+            self._arquivo = None
+    
+    def resumo(self) -> Dict:
+        """Estatísticas por etapa (ms) e vazão da execução até agora."""
+        decorrido = (time.perf_counter_ns() - self._inicio_ns) / 1e9
+        return {
+            'tempo_total': decorrido,
+            'itens': self.itens_concluidos,
+            'itens_por_minuto': self.itens_concluidos / decorrido * 60 if decorrido else 0.0,
+            'etapas': {
+                etapa: {
+                    'n': len(valores),
+                    'p50': _percentil(valores, 0.5) / 1e6,
+                    'p95': _percentil(valores, 0.95) / 1e6,
+                    'max': max(valores) / 1e6
+                }
+                for etapa, valores in self.duracoes_ns.items()
+            }
+        }
+    
+    def linhas_resumo(self) -> List[str]:
+        resumo = self.resumo()
+        linhas = [f"⏱️ {resumo['itens']} item(ns) em {resumo['tempo_total']:.1f} s "
+                  f"({resumo['itens_por_minuto']:.1f} itens/min)"]
+        for etapa, estat in resumo['etapas'].items():
+            linhas.append(f"   {etapa:<22} p50 {estat['p50']:8.1f} ms | p95 {estat['p95']:8.1f} ms "
+                          f"| max {estat['max']:8.1f} ms")
+        if self.caminho:
+            linhas.append(f"📝 Rastro salvo em {self.caminho}")
+        return linhas
+
+# --- DIÁRIO DE EXECUÇÃO ---
+class DiarioExecucao:
+    """Diário append-only, com fsync a cada registro, do plano e dos itens concluídos.
+    
+    Permite retomar uma execução interrompida (erro, PARAR ou queda do
+    processo) sem repetir saídas já lançadas no Raffinato.
+    """
+    
+    def __init__(self, caminho: str):
+        self.caminho = caminho
+        self._arquivo = None
+    
+    def _gravar(self, registro: Dict):
+        registro['ts'] = time.time()
+        self._arquivo.write(json.dumps(registro, ensure_ascii=False) + '\n')
+        self._arquivo.flush()
+        os.fsync(self._arquivo.fileno())
+    
+    def iniciar(self, itens: Dict[str, float]):
+        """Começa um novo diário com o plano da execução (descarta o anterior)."""
+        self._arquivo = open(self.caminho, 'w', encoding='utf-8')
+        self._gravar({'tipo': 'plano', 'itens': [[item, qtd] for item, qtd in itens.items()]})
+    
+    def registrar_inicio(self, item: str):
+        self._gravar({'tipo': 'inicio', 'item': item})
+    
+    def registrar_conclusao(self, item: str):
+        self._gravar({'tipo': 'concluido', 'item': item})
+    
+    def registrar_falha(self, item: str):
+        """Item desistido após as tentativas; fica na lista de falhas, não na retomada."""
+        self._gravar({'tipo': 'falha', 'item': item})
     
-    def _thread_executar_automacao(self, itens: Dict[str, float]):
+    def finalizar(self, status: str = 'concluido'):
+        """Marca o diário como encerrado; execuções finalizadas não são retomadas."""
+        if self._arquivo is None:
+            self._arquivo = open(self.caminho, 'a', encoding='utf-8')
+        self._gravar({'tipo': 'fim', 'status': status})
+        self.fechar()
+    
+    def fechar(self):
+        if self._arquivo:
+            self._arquivo.close()
+            self._arquivo = None
+    
+    @staticmethod
+    def ler_pendencias(caminho: str) -> Optional[Dict]:
+        """Lê um diário e devolve o que falta processar, ou None se não há o que retomar.
+        
+        Retorna {'itens': {item: qtd}, 'concluidos': int, 'em_andamento': item|None};
+        'em_andamento' é o item iniciado e não confirmado, que fica de fora da
+        retomada porque pode já ter sido lançado.
+        """
+        plano: Optional[List] = None
+        concluidos = set()
+        em_andamento = None
         try:
-            self._adicionar_log("⏳ Aguardando 5 segundos para você posicionar a janela do Raffinato...")
-            self.root.iconify()
-            time.sleep(5)
-            
-            engine = AutomationEngine(self.coordenadas, self.configs)
-            resultado = engine.run(
-                itens,
-                self._adicionar_log,
-                self._atualizar_progresso,
-                self.stop_event,
-                self.pause_event
-            )
-            
-            messagebox.showinfo("🎉 Concluído", resultado)
-            self._adicionar_log(resultado)
-            
-        except Exception as e:
-            self._adicionar_log(f"❌ ERRO CRÍTICO: {e}")
-            messagebox.showerror("❌ Erro Crítico", f"Ocorreu um erro inesperado:\n\n{e}")
-        finally:
-            if self.root.winfo_exists():
-                self.root.deiconify()
-                self._atualizar_estado_botoes("ocioso")
-                self._adicionar_log("✅ Pronto para nova execução.")
+            with open(caminho, 'r', encoding='utf-8') as f:
+                for linha in f:
+                    try:
+                        registro = json.loads(linha)
+                    except json.JSONDecodeError:
+                        # Última linha truncada por uma queda no meio da escrita
+                        continue
+                    tipo = registro.get('tipo')
+                    if tipo == 'plano':
+                        plano = registro['itens']
+                    elif tipo == 'inicio':
+                        em_andamento = registro['item']
+                    elif tipo in ('concluido', 'falha'):
+                        concluidos.add(registro['item'])
+                        em_andamento = None
+                    elif tipo == 'fim':
+                        return None
+        except (FileNotFoundError, IOError):
+            return None
+        
+        if plano is None:
+            return None
+        pendentes = {item: qtd for item, qtd in plano if item not in concluidos and item != em_andamento}
+        if not pendentes and em_andamento is None:
+            return None
+        return {'itens': pendentes, 'concluidos': len(concluidos), 'em_andamento': em_andamento}
 
-def main():
-    """Função principal da aplicação."""
-    root = tk.Tk()
-    Style(theme='darkly')  # Tema moderno e profissional
-    RaffinatoGUI(root)
-    root.mainloop()
+# --- HISTÓRICO DE EXECUÇÕES ---
+class OrcamentosEspera:
+    """Tempos de espera aprendidos do histórico: por item, por hora do dia ou por etapa.
+    
+    Cada orçamento é o p95 (ou outro `percentil`) das respostas observadas
+    mais uma margem, limitado ao tempo configurado (que continua sendo o teto).
+    """
+    
+    def __init__(self, respostas: Dict[str, List[Tuple[str, int, float]]], margem: float,
+                 amostras_minimas: int, hora: Optional[int] = None, percentil: float = 0.95):
+        self.margem = margem
+        self.percentil = percentil
+        self.amostras_minimas = amostras_minimas
+        self.hora = time.localtime().tm_hour if hora is None else hora
+        self.por_item: Dict[Tuple[str, str], float] = {}
+        self.por_hora: Dict[str, float] = {}
+        self.por_etapa: Dict[str, float] = {}
+        self.amostras: Dict[str, int] = {}
+        for etapa, linhas in respostas.items():
+            self.amostras[etapa] = len(linhas)
+            por_item: Dict[str, List[float]] = {}
+            da_hora = []
+            for item, hora, resposta in linhas:
+                por_item.setdefault(item, []).append(resposta)
+                if hora == self.hora:
+                    da_hora.append(resposta)
+            for item, valores in por_item.items():
+                if len(valores) >= amostras_minimas:
+                    self.por_item[(item, etapa)] = self._orcamento(valores)
+            if len(da_hora) >= amostras_minimas:
+                self.por_hora[etapa] = self._orcamento(da_hora)
+            if len(linhas) >= amostras_minimas:
+                self.por_etapa[etapa] = self._orcamento([linha[2] for linha in linhas])
+    
+    def _orcamento(self, valores: List[float]) -> float:
+        return _percentil(valores, self.percentil) * (1 + self.margem)
+    
+    def para(self, item: str, etapa: str) -> Optional[float]:
+        """Orçamento mais específico disponível, ou None se o histórico ainda é curto."""
+        orcamento = self.por_item.get((item, etapa))
+        if orcamento is None:
+            orcamento = self.por_hora.get(etapa, self.por_etapa.get(etapa))
+        return orcamento
+
+class HistoricoExecucao:
+    """Histórico local (SQLite) das latências de cada etapa, execução após execução.
+    
+    Nas esperas, grava também quanto o Raffinato levou de fato para responder
+    (observado pela tela) e o tempo configurado, de onde saem os orçamentos
+    aprendidos e o relatório de economia.
+    """
+    
+    JANELA_AMOSTRAS = 5000
+    
+    def __init__(self, caminho: str):
+        self.caminho = caminho
+        self._conexao = None
+        self._execucao: Optional[int] = None
+        self._pendentes: List[Tuple] = []
+    
+    def _abrir(self):
+        if self._conexao is not None:
+            return self._conexao
+        # sqlite3 só é importado aqui: quem não usa o histórico não paga a importação
+        import sqlite3
+        self._conexao = sqlite3.connect(self.caminho)
+        self._conexao.executescript("""
+            CREATE TABLE IF NOT EXISTS execucoes (
+                id INTEGER PRIMARY KEY,
+                inicio REAL NOT NULL,
+                fim REAL,
+                status TEXT,
+                modo_espera TEXT
+            );
+            CREATE TABLE IF NOT EXISTS etapas (
+                execucao INTEGER NOT NULL REFERENCES execucoes(id),
+                ts REAL NOT NULL,
+                hora INTEGER NOT NULL,
+                item TEXT NOT NULL,
+                etapa TEXT NOT NULL,
+                duracao REAL NOT NULL,
+                resposta REAL,
+                espera_padrao REAL
+            );
+            CREATE INDEX IF NOT EXISTS idx_etapas_etapa ON etapas (etapa, ts);
+            CREATE INDEX IF NOT EXISTS idx_etapas_execucao ON etapas (execucao);
+        """)
+        return self._conexao
+    
+    def iniciar(self, modo_espera: str):
+        """Abre o banco (na thread da automação) e registra o início da execução."""
+        cursor = self._abrir().execute(
+            "INSERT INTO execucoes (inicio, modo_espera) VALUES (?, ?)", (time.time(), modo_espera))
+        self._conexao.commit()
+        self._execucao = cursor.lastrowid
+    
+    def registrar(self, item: str, etapa: str, duracao: float,
+                  resposta: Optional[float] = None, espera_padrao: Optional[float] = None):
+        """Guarda a medição em memória; `gravar` a persiste ao fim de cada item."""
+        agora = time.time()
+        self._pendentes.append((self._execucao, agora, time.localtime(agora).tm_hour,
+                                item, etapa, duracao, resposta, espera_padrao))
+    
+    def gravar(self):
+        if self._conexao is None or not self._pendentes:
+            return
+        self._conexao.executemany("INSERT INTO etapas VALUES (?, ?, ?, ?, ?, ?, ?, ?)", self._pendentes)
+        self._conexao.commit()
+        self._pendentes = []
+    
+    def finalizar(self, status: str):
+        if self._conexao is None:
+            return
+        self.gravar()
+        self._conexao.execute("UPDATE execucoes SET fim = ?, status = ? WHERE id = ?",
+                              (time.time(), status, self._execucao))
+        self._conexao.commit()
+    
+    def fechar(self):
+        if self._conexao is not None:
+            self._conexao.close()
+            self._conexao = None
+    
+    def orcamentos(self, etapas: List[str], margem: float, amostras_minimas: int,
+                   percentil: float = 0.95) -> OrcamentosEspera:
+        """Calcula os orçamentos a partir das respostas mais recentes de cada etapa."""
+        respostas: Dict[str, List[Tuple[str, int, float]]] = {}
+        for etapa in etapas:
+            respostas[etapa] = self._abrir().execute(
+                "SELECT item, hora, resposta FROM etapas WHERE etapa = ? AND resposta IS NOT NULL "
+                "ORDER BY ts DESC LIMIT ?", (etapa, self.JANELA_AMOSTRAS)).fetchall()
+        return OrcamentosEspera(respostas, margem, amostras_minimas, percentil=percentil)
+    
+    def relatorio(self, limite: int = 10) -> Dict:
+        """Economia de espera por execução, comparada com os tempos configurados."""
+        execucoes = self._abrir().execute("""
+            SELECT e.id, e.inicio, e.status, e.modo_espera,
+                   COUNT(DISTINCT CASE WHEN t.etapa = 'item' THEN t.item END),
+                   COALESCE(SUM(CASE WHEN t.espera_padrao IS NOT NULL THEN t.espera_padrao END), 0),
+                   COALESCE(SUM(CASE WHEN t.espera_padrao IS NOT NULL THEN t.duracao END), 0)
+            FROM execucoes e LEFT JOIN etapas t ON t.execucao = e.id
+            GROUP BY e.id ORDER BY e.id DESC LIMIT ?
+        """, (limite,)).fetchall()
+        return {
+            'execucoes': [
+                {
+                    'id': linha[0],
+                    'inicio': linha[1],
+                    'status': linha[2] or 'em andamento',
+                    'modo_espera': linha[3],
+                    'itens': linha[4],
+                    'espera_padrao': linha[5],
+                    'espera_real': linha[6],
+                    'economia': linha[5] - linha[6]
+                }
+                for linha in execucoes
+            ]
+        }
+
+# --- VERIFICAÇÃO PÓS-ITEM ---
+def _diferenca_capturas(a: bytes, b: bytes) -> float:
+    """Fração de bytes diferentes entre duas capturas (1.0 se os tamanhos diferem)."""
+    if len(a) != len(b):
+        return 1.0
+    if not a:
+        return 0.0
+    return sum(x != y for x, y in zip(a, b)) / len(a)
+
+class VerificadorItens:
+    """Confere em segundo plano se cada item confirmado apareceu na tela do Raffinato.
+    
+    Modos:
+    - 'grade': a região da grade de saídas precisa mudar em relação à captura
+      do item anterior (uma linha nova apareceu);
+    - 'busca': o campo de busca precisa voltar ao estado vazio capturado no
+      início da execução.
+    
+    A captura é feita pela thread do verificador `atraso` segundos depois da
+    confirmação; a comparação também. O robô só espera pela captura pendente
+    antes do passo que a invalidaria (`barreira`): a confirmação do próximo
+    item no modo 'grade' ou a digitação dele no campo de busca no modo 'busca'.
+    """
+    
+    MODOS = ('grade', 'busca')
+    
+    def __init__(self, backend: InputBackend, regiao: Tuple[int, int, int, int], modo: str,
+                 atraso: float, tolerancia: float):
+        if modo not in self.MODOS:
+            raise ValueError(f"modo_verificacao inválido: {modo!r} (use {', '.join(self.MODOS)})")
+        self.backend = backend
+        self.regiao = regiao
+        self.modo = modo
+        self.atraso = atraso
+        self.tolerancia = tolerancia
+        self.conferidos = 0
+        self.divergencias: List[Dict] = []
+        self._referencia: Optional[bytes] = None
+        self._fila: queue.Queue = queue.Queue()
+        self._capturado = threading.Event()
+        self._capturado.set()
+        self._thread: Optional[threading.Thread] = None
+    
+    def iniciar(self):
+        """Captura a referência inicial e sobe a thread de verificação."""
+        self._referencia = self.backend.screenshot(self.regiao).tobytes()
+        self._thread = threading.Thread(target=self._trabalhar, name='verificador-itens', daemon=True)
+        self._thread.start()
+    
+    def enfileirar(self, item: str, quantidade: float):
+        """Agenda a conferência de um item recém-confirmado."""
+        self._capturado.clear()
+        self._fila.put((item, quantidade, time.monotonic() + self.atraso))
+    
+    def aguardar_captura(self, parar: threading.Event):
+        """Bloqueia até a captura pendente ser feita (interrompível pela parada)."""
+        while not self._capturado.wait(0.02):
+            if parar.is_set():
+                return
+    
+    def _trabalhar(self):
+        while True:
+            tarefa = self._fila.get()
+            if tarefa is None:
+                return
+            item, quantidade, capturar_em = tarefa
+            time.sleep(max(0.0, capturar_em - time.monotonic()))
+            try:
+                captura = self.backend.screenshot(self.regiao).tobytes()
+            except Exception as e:
+                self._capturado.set()
+                self._divergir(item, quantidade, f"captura falhou: {e}")
+                continue
+            self._capturado.set()
+            
+            diferenca = _diferenca_capturas(captura, self._referencia)
+            if self.modo == 'grade':
+                ok = diferenca > self.tolerancia
+                self._referencia = captura
+            else:
+                ok = diferenca <= self.tolerancia
+            self.conferidos += 1
+            if not ok:
+                esperado = 'nova linha na grade' if self.modo == 'grade' else 'campo de busca vazio'
+                self._divergir(item, quantidade, f"tela não confirmou o registro ({esperado}; "
+                                                 f"diferença {diferenca:.1%})")
+    
+    def _divergir(self, item: str, quantidade: float, motivo: str):
+        self.divergencias.append({'item': item, 'quantidade': quantidade, 'erro': motivo})
+    
+    def concluir(self) -> List[Dict]:
+        """Espera as conferências pendentes e encerra a thread; devolve as divergências."""
+        if self._thread is not None:
+            self._fila.put(None)
+            self._thread.join()
+            self._thread = None
+        return self.divergencias
+
+# --- ÂNCORA DA JANELA ---
+class AncoraJanela:
+    """Localiza a janela do Raffinato por um pequeno modelo salvo na calibração.
+    
+    As posições calibradas valem relativas à âncora: se ela aparece em outro
+    lugar, todas se deslocam junto. A busca começa pela última posição
+    conhecida (região de interesse em cache, com `margem` pixels em volta) e
+    só varre a tela inteira se a âncora não estiver lá.
+    """
+    
+    def __init__(self, backend: InputBackend, modelo, x: int, y: int, largura: int, altura: int,
+                 margem: int, tolerancia: float):
+        self.backend = backend
+        self.modelo = modelo
+        self._bytes_modelo = modelo.tobytes()
+        self.x, self.y = x, y
+        self.largura, self.altura = largura, altura
+        self.margem = margem
+        self.tolerancia = tolerancia
+    
+    def no_lugar(self) -> bool:
+        """Conferência barata: uma captura do tamanho da âncora na posição esperada."""
+        captura = self.backend.screenshot((self.x, self.y, self.largura, self.altura)).tobytes()
+        return _diferenca_capturas(captura, self._bytes_modelo) <= self.tolerancia
+    
+    def relocalizar(self) -> Optional[Tuple[int, int]]:
+        """Procura a âncora e devolve o deslocamento (dx, dy), ou None se sumiu da tela."""
+        regiao = (max(0, self.x - self.margem), max(0, self.y - self.margem),
+                  self.largura + 2 * self.margem, self.altura + 2 * self.margem)
+        posicao = self.backend.localizar(self.modelo, regiao)
+        if posicao is None:
+            posicao = self.backend.localizar(self.modelo)
+        if posicao is None:
+            return None
+        deslocamento = (posicao[0] - self.x, posicao[1] - self.y)
+        self.x, self.y = posicao
+        return deslocamento
+
+def deslocar_coordenadas(coordenadas: Dict, dx: int, dy: int) -> Dict:
+    """Cópia das coordenadas com todos os pontos (inclusive a âncora) deslocados."""
+    return {nome: dict(ponto, x=ponto['x'] + dx, y=ponto['y'] + dy) for nome, ponto in coordenadas.items()}
+
+class JanelaNaoEncontrada(Exception):
+    """A âncora da janela do Raffinato não está em lugar nenhum da tela."""
+
+class AutomacaoInterrompida(Exception):
+    """Levantada dentro de um item quando o usuário pede para parar."""
+
+class TempoEsgotado(Exception):
+    """O Raffinato não reagiu dentro do tempo máximo de uma espera."""
+
+# Falhas que não adianta repetir: encerram a execução (o diário permite retomar)
+CLASSES_FALHA_FATAIS = ('failsafe', 'janela')
+
+def _passo_confirmacao(plano: List[Dict]) -> int:
+    """Índice do passo que lança o item no Raffinato: o de etapa 'confirmar' ou, sem ele, o último."""
+    indices = [indice for indice, passo in enumerate(plano) if passo['etapa'] == 'confirmar']
+    return indices[-1] if indices else len(plano) - 1
+
+def classificar_falha(erro: Exception) -> str:
+    """Classe da falha para o resumo: 'timeout', 'failsafe', 'janela' ou 'desconhecida'."""
+    if isinstance(erro, FailsafeAcionado):
+        return 'failsafe'
+    if isinstance(erro, JanelaNaoEncontrada):
+        return 'janela'
+    if isinstance(erro, (TempoEsgotado, TimeoutError)):
+        return 'timeout'
+    return 'desconhecida'
+
+def salvar_falhas(caminho: str, falhas: List[Dict]) -> bool:
+    """Grava a lista de falhas; o arquivo pode ser reprocessado como um pedido JSON."""
+    dados = {
+        'itens': {falha['item']: falha['quantidade'] for falha in falhas},
+        'falhas': falhas
+    }
+    try:
+        with open(caminho, 'w', encoding='utf-8') as f:
+            json.dump(dados, f, indent=4, ensure_ascii=False)
+        return True
+    except IOError as e:
+        print(f"Erro ao salvar falhas: {e}")
+        return False
+
+class AutomationEngine:
+    """Responsável pela execução das automações."""
+    
+    INTERVALO_VERIFICACAO_PAUSA = 0.02
+    
+    def __init__(self, coordenadas: Dict, configs: Dict, backend: Optional[InputBackend] = None,
+                 catalogo: Optional[List[str]] = None, aliases: Optional[Dict[str, str]] = None):
+        self.coordenadas = coordenadas
+        self.configs = configs
+        if backend is None:
+            # As pausas ficam no plano; a pausa global do pyautogui somaria a cada ação
+            backend = PyAutoGUIBackend(0.0)
+        self.backend = backend
+        self.pausa_legada = float(self._config('pyautogui_pause'))
+        self.plano = aplicar_pausa_legada(compilar_plano(self._config('plano_item') or PLANO_ITEM_PADRAO),
+                                          self.pausa_legada)
+        self._passo_confirmacao = _passo_confirmacao(self.plano)
+        self._item_confirmado = False
+        # A busca definida no catálogo vale, mas 'consultas_personalizadas' tem a palavra final
+        self.consultas = IndiceConsultas(
+            catalogo or [],
+            {**(aliases or {}), **self._config('consultas_personalizadas')},
+            tamanho_minimo=int(self._config('tamanho_minimo_consulta')),
+            modo=self._config('modo_busca_raffinato')
+        )
+        self.rastro = RastroExecucao()
+        self._parar = threading.Event()
+        self._pausar = threading.Event()
+        self._pausar.set()
+        self.falhas: List[Dict] = []
+        self.historico: Optional[HistoricoExecucao] = None
+        self.orcamentos: Optional[OrcamentosEspera] = None
+        self._ultima_resposta: Optional[float] = None
+        self.verificador: Optional[VerificadorItens] = None
+        self._barreira_verificacao = 0
+        self.ancora: Optional[AncoraJanela] = None
+        self._itens_sem_conferir_janela = 0
+    
+    def _config(self, chave: str):
+        """Lê uma configuração, recorrendo ao valor padrão quando ausente."""
+        return self.configs.get(chave, DEFAULTS[chave])
+    
+    def _agora_ns(self) -> int:
+        """Relógio dos tempos por etapa (a estimativa o troca por um relógio simulado)."""
+        return time.perf_counter_ns()
+    
+    def _esperar(self, segundos: float):
+        """Espera interrompível: retorna assim que o tempo passa ou a parada é pedida."""
+        if self._parar.wait(max(0.0, segundos)):
+            raise AutomacaoInterrompida()
+    
+    def _verificar_parada(self):
+        if self._parar.is_set():
+            raise AutomacaoInterrompida()
+    
+    def _ponto_de_pausa(self):
+        """Segura a execução enquanto pausada; só é chamado entre passos seguros."""
+        while not self._pausar.wait(self.INTERVALO_VERIFICACAO_PAUSA):
+            self._verificar_parada()
+        self._verificar_parada()
+    
+    def _regiao_quantidade(self) -> Tuple[int, int, int, int]:
+        """Região quadrada da tela centrada no campo de quantidade calibrado."""
+        lado = int(self._config('tamanho_regiao_tela'))
+        x = int(self.coordenadas['quantidade']['x']) - lado // 2
+        y = int(self.coordenadas['quantidade']['y']) - lado // 2
+        return (max(0, x), max(0, y), lado, lado)
+    
+    def _capturar_referencia(self, espera: Dict) -> Optional[bytes]:
+        """Captura a região monitorada antes da `espera`, para o modo 'tela' ou para o histórico.
+        
+        O histórico grava as durações dos passos sempre; no modo 'fixo' a tela só
+        é lida para medir a resposta com 'medir_resposta_tela' ligado e nas
+        esperas que exigem mudança. Nas demais a espera segue um sleep simples.
+        """
+        if self._config('modo_espera') != 'tela' and not (
+                self.historico is not None and self._config('medir_resposta_tela') and espera['exigir_mudanca']):
+            return None
+        return self.backend.screenshot(self._regiao_quantidade()).tobytes()
+    
+    def _aguardar(self, tempo, referencia: Optional[bytes], orcamento: Optional[float] = None) -> bool:
+        """Aguarda o Raffinato responder, usando o tempo configurado como teto.
+        
+        `tempo` é um número de segundos ou o nome de uma configuração. No modo
+        'tela', retorna assim que a região monitorada muda em relação à
+        referência e permanece estável por algumas leituras seguidas. No modo
+        'fixo' a espera é o `orcamento` aprendido (ou o teto); com referência,
+        a tela é observada para o histórico e a espera se estende até o teto
+        se o Raffinato ainda não respondeu.
+        """
+        teto = float(tempo if isinstance(tempo, (int, float)) else self._config(tempo))
+        espera = teto if orcamento is None else min(teto, orcamento)
+        self._ultima_resposta = None
+        if referencia is None:
+            self._esperar(espera)
+            return True
+        
+        inicio = time.monotonic()
+        respondeu = self._observar_tela(referencia, inicio + teto)
+        if respondeu:
+            self._ultima_resposta = time.monotonic() - inicio
+        if self._config('modo_espera') != 'tela':
+            self._esperar(inicio + espera - time.monotonic())
+            return True
+        return respondeu
+    
+    def _observar_tela(self, referencia: bytes, limite: float) -> bool:
+        """True quando a região muda e fica estável antes do limite (relógio monotônico)."""
+        intervalo = float(self._config('intervalo_verificacao_tela'))
+        leituras_necessarias = int(self._config('leituras_estaveis'))
+        regiao = self._regiao_quantidade()
+        ultima = referencia
+        mudou = False
+        estaveis = 0
+        
+        while time.monotonic() < limite:
+            self._esperar(min(intervalo, limite - time.monotonic()))
+            atual = self.backend.screenshot(regiao).tobytes()
+            if not mudou:
+                mudou = atual != referencia
+            elif atual == ultima:
+                estaveis += 1
+                if estaveis >= leituras_necessarias:
+                    return True
+            else:
+                estaveis = 0
+            ultima = atual
+        
+        return False
+    
+    def _colar_texto(self, texto: str) -> bool:
+        """Cola o texto com um único ctrl+v e confere o que chegou ao campo."""
+        try:
+            self.backend.copy(texto)
+            if self.backend.paste() != texto:
+                return False
+            self.backend.hotkey('ctrl', 'v')
+            if not self._config('verificar_colagem'):
+                return True
+            
+            self.backend.copy('')
+            self.backend.hotkey('ctrl', 'a')
+            self.backend.hotkey('ctrl', 'c')
+            return self.backend.paste() == texto
+        except OSError:
+            # Sem área de transferência disponível; failsafe e parada continuam subindo
+            return False
+    
+    def _inserir_texto(self, texto: str):
+        """Preenche o campo focado, colando quando configurado e digitando como reserva."""
+        if self._config('modo_digitacao') == 'colar' and self._colar_texto(texto):
+            return
+        # Se a colagem falhou, o campo está selecionado e a digitação o sobrescreve
+        self.backend.write(texto)
+    
+    def _orcamento_espera(self, passo: Dict, item: str) -> Optional[float]:
+        """Orçamento aprendido para uma espera configurada, só usado no modo 'fixo'."""
+        # No modo 'tela' a espera já termina quando o Raffinato responde
+        if (self.orcamentos is None or self._config('modo_espera') == 'tela'
+                or isinstance(passo['tempo'], (int, float))):
+            return None
+        return self.orcamentos.para(item, passo['etapa'])
+    
+    def _executar_passo(self, passo: Dict, valores: Dict[str, str], referencia: Optional[bytes],
+                        item: str = ''):
+        """Executa um passo compilado do plano."""
+        acao = passo['acao']
+        if acao == 'clicar':
+            alvo = self.coordenadas[passo['alvo']]
+            self.backend.click(alvo['x'], alvo['y'])
+        elif acao == 'atalho':
+            self.backend.hotkey(*passo['teclas'])
+        elif acao == 'tecla':
+            self.backend.press(passo['tecla'])
+        elif acao == 'texto':
+            self._inserir_texto(valores[passo['valor']])
+        elif acao == 'sobrescrever':
+            self.backend.hotkey('ctrl', 'a')
+            self._inserir_texto(valores[passo['valor']])
+        elif acao == 'aguardar':
+            orcamento = self._orcamento_espera(passo, item)
+            if not self._aguardar(passo['tempo'], referencia, orcamento) and passo['exigir_mudanca']:
+                raise TempoEsgotado(f"Raffinato não respondeu na etapa '{passo['etapa']}'")
+        
+        if passo['pausa'] > 0:
+            self._esperar(passo['pausa'])
+    
+    def _consulta_busca(self, item: str) -> str:
+        """Texto digitado na busca: consulta personalizada, consulta curta ou o nome inteiro."""
+        if self._config('consulta_curta') or item in self.consultas.personalizadas:
+            return self.consultas.consulta(item)
+        return item
+    
+    def _processar_item(self, item: str, quantidade: float, log_callback) -> List[Tuple[Dict, int, Optional[float]]]:
+        """Processa um único item; devolve (passo, duração em ns, resposta da tela) de cada passo.
+        
+        Só as ações no Raffinato ficam aqui dentro: rastro, histórico e
+        verificação são anotados depois, em `_contabilizar_item`, para que uma
+        falha deles nunca faça o item ser repetido.
+        """
+        self._item_confirmado = False
+        etapas: List[Tuple[Dict, int, Optional[float]]] = []
+        try:
+            consulta = self._consulta_busca(item)
+            if consulta != item:
+                log_callback(f"📦 Processando: {item} | Qtd: {quantidade:.3f} | Busca: '{consulta}'")
+            else:
+                log_callback(f"📦 Processando: {item} | Qtd: {quantidade:.3f}")
+            
+            valores = {'item': consulta, 'quantidade': str(quantidade).replace('.', ',')}
+            referencia = None
+            inicio_item = self._agora_ns()
+            for indice, passo in enumerate(self.plano):
+                if passo['ponto_seguro']:
+                    self._ponto_de_pausa()
+                if self.verificador and indice == self._barreira_verificacao:
+                    self.verificador.aguardar_captura(self._parar)
+                self._verificar_parada()
+                inicio = self._agora_ns()
+                if passo['referencia']:
+                    referencia = self._capturar_referencia(self.plano[indice + 1])
+                if indice == self._passo_confirmacao:
+                    # Daqui em diante o item pode já estar lançado: não se repete mais
+                    self._item_confirmado = True
+                self._executar_passo(passo, valores, referencia, item)
+                resposta = self._ultima_resposta if passo['acao'] == 'aguardar' else None
+                etapas.append((passo, self._agora_ns() - inicio, resposta))
+            etapas.append(({'etapa': 'item', 'acao': 'item'}, self._agora_ns() - inicio_item, None))
+            return etapas
+        except AutomacaoInterrompida:
+            log_callback(f"🛑 Item '{item}' interrompido no meio; confira no Raffinato.")
+            raise
+        except Exception as e:
+            log_callback(f"❌ ERRO ao processar '{item}': {e}")
+            raise
+    
+    def _no_historico(self, operacao: Callable[[], None], log_callback) -> bool:
+        """Roda uma operação do histórico; erro do SQLite vira aviso e nunca faz repetir um item."""
+        import sqlite3
+        try:
+            operacao()
+            return True
+        except (sqlite3.Error, OSError) as e:
+            log_callback(f"⚠️ Histórico não gravado ({e}); a execução continua.")
+            return False
+    
+    def _iniciar_historico(self, log_callback):
+        self.historico.iniciar(self._config('modo_espera'))
+        if self._config('espera_adaptativa'):
+            self._preparar_orcamentos(log_callback)
+    
+    def _registrar_historico(self, item: str, passo: Dict, duracao_ns: int, resposta: Optional[float]):
+        espera_padrao = None
+        if passo['acao'] == 'aguardar':
+            tempo = passo['tempo']
+            espera_padrao = float(tempo if isinstance(tempo, (int, float)) else self._config(tempo))
+        self.historico.registrar(item, passo['etapa'], duracao_ns / 1e9, resposta, espera_padrao)
+    
+    def _contabilizar_item(self, item: str, quantidade: float, etapas: List[Tuple[Dict, int, Optional[float]]],
+                           log_callback):
+        """Anota rastro, histórico e verificação de um item já lançado; erro aqui só vira aviso."""
+        try:
+            for passo, duracao_ns, resposta in etapas:
+                if passo['etapa'] == 'item':
+                    self.rastro.concluir_item(item, duracao_ns)
+                else:
+                    self.rastro.registrar(item, passo['etapa'], duracao_ns)
+                if self.historico:
+                    self._registrar_historico(item, passo, duracao_ns, resposta)
+            if self.verificador:
+                self.verificador.enfileirar(item, quantidade)
+        except Exception as e:
+            log_callback(f"⚠️ Registro do item '{item}' incompleto ({e}); o item NÃO será repetido.")
+        log_callback(f"✅ Item '{item}' processado com sucesso!")
+    
+    def _preparar_ancora(self, log_callback):
+        """Carrega a âncora da calibração e ajusta as posições se a janela mudou de lugar."""
+        dados = self.coordenadas['ancora']
+        inicio = time.perf_counter()
+        caminho = _caminho_local(dados['arquivo'])
+        try:
+            modelo = self.backend.carregar_imagem(caminho)
+        except OSError as e:
+            raise JanelaNaoEncontrada(f"imagem da âncora ilegível ou ausente ({caminho}: "
+                                      f"{getattr(e, 'strerror', None) or e}); recalibre") from e
+        self.ancora = AncoraJanela(
+            self.backend, modelo,
+            int(dados['x']), int(dados['y']), int(dados['largura']), int(dados['altura']),
+            margem=int(self._config('margem_busca_ancora')),
+            tolerancia=float(self._config('tolerancia_ancora'))
+        )
+        self._itens_sem_conferir_janela = 0
+        if not self.ancora.no_lugar():
+            self._relocalizar_janela(log_callback)
+        log_callback(f"🧭 Janela do Raffinato localizada em {(time.perf_counter() - inicio) * 1000:.0f} ms.")
+    
+    def _relocalizar_janela(self, log_callback):
+        deslocamento = self.ancora.relocalizar()
+        if deslocamento is None:
+            raise JanelaNaoEncontrada("âncora da calibração não encontrada na tela; recalibre")
+        dx, dy = deslocamento
+        if (dx, dy) == (0, 0):
+            return
+        self.coordenadas = deslocar_coordenadas(self.coordenadas, dx, dy)
+        if self.verificador:
+            x, y, largura, altura = self.verificador.regiao
+            self.verificador.regiao = (x + dx, y + dy, largura, altura)
+        log_callback(f"🧭 Janela do Raffinato deslocada ({dx:+d}, {dy:+d}) px; posições ajustadas.")
+    
+    def _conferir_janela(self, log_callback, forcar: bool = False):
+        """Detecta a janela movida no meio da execução (a cada N itens ou quando forçado)."""
+        self._itens_sem_conferir_janela += 1
+        if not forcar and self._itens_sem_conferir_janela < int(self._config('intervalo_conferencia_janela')):
+            return
+        self._itens_sem_conferir_janela = 0
+        if not self.ancora.no_lugar():
+            self._relocalizar_janela(log_callback)
+    
+    def _preparar_verificacao(self, log_callback):
+        """Sobe o verificador pós-item se ativado e com a região necessária calibrada."""
+        modo = self._config('modo_verificacao')
+        alvo = self.coordenadas.get('grade' if modo == 'grade' else 'busca')
+        if alvo is None:
+            log_callback("⚠️ Verificação desativada: calibre a posição da grade de saídas.")
+            return
+        largura, altura = (int(valor) for valor in self._config('tamanho_regiao_verificacao'))
+        regiao = (max(0, int(alvo['x']) - largura // 2), max(0, int(alvo['y']) - altura // 2), largura, altura)
+        self.verificador = VerificadorItens(
+            self.backend, regiao, modo,
+            atraso=float(self._config('atraso_verificacao')),
+            tolerancia=float(self._config('tolerancia_verificacao'))
+        )
+        if modo == 'busca':
+            # A referência é o campo de busca vazio
+            self.backend.click(alvo['x'], alvo['y'])
+            self.backend.hotkey('ctrl', 'a')
+            self.backend.press('delete')
+        self._barreira_verificacao = self._passo_barreira(modo)
+        self.verificador.iniciar()
+        log_callback(f"🔎 Verificação pós-item ativa (modo '{modo}').")
+    
+    def _passo_barreira(self, modo: str) -> int:
+        """Índice do primeiro passo do item que invalidaria a captura pendente do anterior."""
+        if modo == 'grade':
+            return len(self.plano) - 1
+        # Clicar e limpar o campo de busca já vazio não o altera; só a digitação do próximo item
+        for indice, passo in enumerate(self.plano):
+            if passo['acao'] in ('texto', 'sobrescrever') and passo['valor'] == 'item':
+                return indice
+        return 0
+    
+    def _concluir_verificacao(self, log_callback):
+        """Junta as divergências do verificador à lista de falhas da execução.
+        
+        Também roda quando a execução para no meio: as conferências ainda na fila
+        são feitas e entram nas falhas (e no arquivo de falhas de quem chamou).
+        """
+        verificador, self.verificador = self.verificador, None
+        divergencias = verificador.concluir()
+        log_callback(f"🔎 Verificação: {verificador.conferidos - len(divergencias)} item(ns) confirmados, "
+                     f"{len(divergencias)} divergência(s).")
+        for divergencia in divergencias:
+            log_callback(f"⚠️ '{divergencia['item']}': {divergencia['erro']}; confira no Raffinato.")
+            self.falhas.append(dict(divergencia, classe='verificacao', tentativas=1))
+    
+    def _preparar_orcamentos(self, log_callback):
+        """Carrega do histórico os orçamentos das esperas configuradas do plano."""
+        etapas = [passo['etapa'] for passo in self.plano
+                  if passo['acao'] == 'aguardar' and not isinstance(passo['tempo'], (int, float))]
+        self.orcamentos = self.historico.orcamentos(
+            etapas,
+            float(self._config('margem_espera_adaptativa')),
+            int(self._config('amostras_minimas_espera'))
+        )
+        if self._config('modo_espera') == 'tela':
+            return
+        for etapa in etapas:
+            orcamento = self.orcamentos.por_hora.get(etapa, self.orcamentos.por_etapa.get(etapa))
+            if orcamento is not None:
+                log_callback(f"🧠 {etapa}: espera aprendida {orcamento:.2f} s "
+                             f"({self.orcamentos.amostras[etapa]} amostras no histórico)")
+    
+    def run(self, itens: Dict[str, float], log_callback, progress_callback, stop_event, pause_event,
+            diario: Optional[DiarioExecucao] = None, historico: Optional[HistoricoExecucao] = None):
+        """Executa a automação."""
+        pasta = _caminho_local(self._config('pasta_rastros')) if self._config('registrar_rastro') else None
+        self.rastro = RastroExecucao(pasta, int(self._config('rastros_mantidos')))
+        self._parar, self._pausar = stop_event, pause_event
+        self.falhas = []
+        self.historico = historico
+        self.orcamentos = None
+        resultado = "Erro"
+        if self.pausa_legada > 0:
+            log_callback(f"⚠️ 'pyautogui_pause' ({self.pausa_legada:g} s) não é mais aplicado após cada ação: "
+                         "vale como pausa mínima dos passos do plano que pausam. Use 0 para só as pausas do plano.")
+        if diario:
+            diario.iniciar(itens)
+        if historico and not self._no_historico(lambda: self._iniciar_historico(log_callback), log_callback):
+            self.historico = None
+        self.verificador = None
+        self.ancora = None
+        try:
+            if 'ancora' in self.coordenadas:
+                try:
+                    self._preparar_ancora(log_callback)
+                except JanelaNaoEncontrada as e:
+                    log_callback(f"❌ {e}")
+                    resultado = "❌ Janela do Raffinato não encontrada na tela."
+                    return resultado
+            if self._config('verificar_itens'):
+                self._preparar_verificacao(log_callback)
+            try:
+                resultado = self._executar_itens(itens, log_callback, progress_callback, diario)
+            except AutomacaoInterrompida:
+                log_callback("⚠️ Automação interrompida pelo usuário.")
+                resultado = "Interrompido"
+            if diario and resultado != "Interrompido":
+                diario.finalizar()
+            return resultado
+        finally:
+            if self.verificador:
+                self._concluir_verificacao(log_callback)
+            if self.historico:
+                self._no_historico(lambda: self.historico.finalizar(resultado), log_callback)
+            if historico:
+                historico.fechar()
+            if diario:
+                diario.fechar()
+            self.rastro.fechar()
+            if self.rastro.itens_concluidos:
+                for linha in self.rastro.linhas_resumo():
+                    log_callback(linha)
+            for linha in self.linhas_resumo_falhas():
+                log_callback(linha)
+    
+    def linhas_resumo_falhas(self) -> List[str]:
+        if not self.falhas:
+            return []
+        por_classe: Dict[str, int] = {}
+        for falha in self.falhas:
+            por_classe[falha['classe']] = por_classe.get(falha['classe'], 0) + 1
+        contagem = ", ".join(f"{classe}: {n}" for classe, n in sorted(por_classe.items()))
+        linhas = [f"❌ {len(self.falhas)} item(ns) com falha ({contagem})"]
+        for falha in self.falhas:
+            linhas.append(f"   [{falha['classe']}] {falha['item']} — {falha['erro']}")
+        return linhas
+    
+    def _recuperar(self):
+        """Fecha diálogos abertos e limpa a busca antes de tentar o item de novo."""
+        self.backend.press('escape')
+        self.backend.press('escape')
+        self._esperar(0.2)
+        alvo = self.coordenadas['busca']
+        self.backend.click(alvo['x'], alvo['y'])
+        self.backend.hotkey('ctrl', 'a')
+        self.backend.press('delete')
+    
+    def _processar_com_tentativas(self, item: str, quantidade: float, log_callback) -> Optional[Dict]:
+        """Processa o item com novas tentativas; devolve a falha final ou None se deu certo."""
+        tentativas = max(1, int(self._config('tentativas_item')))
+        espera = float(self._config('espera_entre_tentativas'))
+        for tentativa in range(1, tentativas + 1):
+            try:
+                # Na nova tentativa a janela é conferida antes: a recuperação clica na busca
+                if self.ancora:
+                    self._conferir_janela(log_callback, forcar=tentativa > 1)
+                if tentativa > 1:
+                    self._recuperar()
+                etapas = self._processar_item(item, quantidade, log_callback)
+            except AutomacaoInterrompida:
+                raise
+            except Exception as e:
+                classe = classificar_falha(e)
+                erro = str(e) or type(e).__name__
+                if self._item_confirmado:
+                    # Repetir lançaria a saída duas vezes; fica como falha para conferência manual
+                    erro += " (após confirmar; confira no Raffinato)"
+                if classe in CLASSES_FALHA_FATAIS or self._item_confirmado or tentativa == tentativas:
+                    return {
+                        'item': item,
+                        'quantidade': quantidade,
+                        'classe': classe,
+                        'erro': erro,
+                        'tentativas': tentativa
+                    }
+                atraso = espera * 2 ** (tentativa - 1)
+                log_callback(f"🔁 Nova tentativa ({tentativa + 1}/{tentativas}) para '{item}' "
+                             f"em {atraso:.1f} s [{classe}]")
+                self._esperar(atraso)
+            else:
+                # Fora do try: o item já foi lançado e nada da contabilidade pode repeti-lo
+                self._contabilizar_item(item, quantidade, etapas, log_callback)
+                return None
+    
+    def _executar_itens(self, itens: Dict[str, float], log_callback, progress_callback,
+                        diario: Optional[DiarioExecucao]):
+        total_itens = len(itens)
+        for i, (item, quantidade) in enumerate(itens.items()):
+            self._ponto_de_pausa()
+            if diario:
+                diario.registrar_inicio(item)
+            falha = self._processar_com_tentativas(item, quantidade, log_callback)
+            if falha is None:
+                if diario:
+                    diario.registrar_conclusao(item)
+            else:
+                self.falhas.append(falha)
+                if diario:
+                    diario.registrar_falha(item)
+            # Só depois do item fechado no diário: o histórico é contabilidade e não decide tentativas
+            if self.historico:
+                self._no_historico(self.historico.gravar, log_callback)
+            if falha is not None:
+                if falha['classe'] == 'failsafe':
+                    log_callback("🛑 Failsafe acionado: mouse levado ao canto da tela.")
+                    return "Interrompido"
+                if falha['classe'] == 'janela':
+                    log_callback("🛑 Janela do Raffinato não encontrada; execução encerrada.")
+                    return "Interrompido"
+            progress_callback(i + 1, total_itens)
+        
+        if self.verificador:
+            self._concluir_verificacao(log_callback)
+        if self.falhas:
+            return f"⚠️ Processamento concluído com {len(self.falhas)} falha(s)."
+        return "✅ Processamento concluído com sucesso!"
+
+# Posições usadas pelo simulador e pela estimativa quando ainda não há calibração
+COORDENADAS_SIMULADAS = {'busca': {'x': 100, 'y': 100}, 'quantidade': {'x': 300, 'y': 200}}
+
+def executar_benchmark(config_manager: ConfigManager, limite: Optional[int] = None,
+                       latencia_pesquisa: float = 0.3, latencia_confirmacao: float = 0.1) -> Dict:
+    """Roda o catálogo inteiro contra o RaffinatoSimulado e mede a vazão."""
+    coordenadas, configs = config_manager.carregar_configuracoes()
+    if not coordenadas:
+        coordenadas = COORDENADAS_SIMULADAS
+    
+    catalogo_completo = config_manager.carregar_catalogo()
+    catalogo = catalogo_completo.itens
+    selecionados = catalogo[:limite] if limite else catalogo
+    itens = {item: float(i % 9 + 1) for i, item in enumerate(selecionados)}
+    
+    simulado = RaffinatoSimulado(
+        catalogo, coordenadas,
+        latencia_pesquisa=latencia_pesquisa,
+        latencia_confirmacao=latencia_confirmacao
+    )
+    backend = BackendCronometrado(simulado)
+    engine = AutomationEngine(coordenadas, dict(configs, registrar_rastro=False), backend, catalogo,
+                              catalogo_completo.aliases)
+    
+    parar, pausar = threading.Event(), threading.Event()
+    pausar.set()
+    engine.run(itens, lambda mensagem: None, lambda valor, total: None, parar, pausar)
+    
+    resumo = engine.rastro.resumo()
+    for acao, valores in backend.duracoes.items():
+        resumo['etapas'][acao] = {
+            'n': len(valores),
+            'p50': _percentil(valores, 0.5) * 1000,
+            'p95': _percentil(valores, 0.95) * 1000,
+            'max': max(valores) * 1000
+        }
+    resumo['registros'] = len(simulado.registros)
+    resumo['erros'] = simulado.erros
+    return resumo
+
+def _imprimir_benchmark(resultado: Dict):
+    print("=" * 64)
+    print(f"Itens processados : {resultado['itens']} ({resultado['registros']} registrados no simulador)")
+    print(f"Tempo total       : {resultado['tempo_total']:.2f} s")
+    print(f"Vazão             : {resultado['itens_por_minuto']:.1f} itens/min")
+    print("-" * 64)
+    print(f"{'ETAPA':<22}{'N':>6}{'P50 (ms)':>12}{'P95 (ms)':>12}{'MAX (ms)':>12}")
+    for nome, estat in resultado['etapas'].items():
+        print(f"{nome:<22}{estat['n']:>6}{estat['p50']:>12.1f}{estat['p95']:>12.1f}{estat['max']:>12.1f}")
+    if resultado['erros']:
+        print("-" * 64)
+        print(f"⚠️ {len(resultado['erros'])} erro(s) no simulador:")
+        for erro in resultado['erros'][:10]:
+            print(f"   {erro}")
+    print("=" * 64)
+
+def relatorio_historico(config_manager: ConfigManager, caminho: str, limite: int = 10) -> Optional[Dict]:
+    """Economia das últimas execuções e orçamentos aprendidos frente aos tempos configurados."""
+    if not os.path.exists(caminho):
+        return None
+    _, configs = config_manager.carregar_configuracoes()
+    configs = dict(DEFAULTS, **configs)
+    plano = compilar_plano(configs['plano_item'] or PLANO_ITEM_PADRAO)
+    esperas = {passo['etapa']: float(configs[passo['tempo']]) for passo in plano
+               if passo['acao'] == 'aguardar' and not isinstance(passo['tempo'], (int, float))}
+    
+    historico = HistoricoExecucao(caminho)
+    try:
+        relatorio = historico.relatorio(limite)
+        orcamentos = historico.orcamentos(list(esperas), float(configs['margem_espera_adaptativa']),
+                                          int(configs['amostras_minimas_espera']))
+    finally:
+        historico.fechar()
+    
+    relatorio['esperas'] = []
+    for etapa, padrao in esperas.items():
+        aprendido = orcamentos.por_hora.get(etapa, orcamentos.por_etapa.get(etapa))
+        relatorio['esperas'].append({
+            'etapa': etapa,
+            'amostras': orcamentos.amostras[etapa],
+            'itens_com_orcamento': sum(1 for _, e in orcamentos.por_item if e == etapa),
+            'padrao': padrao,
+            'aprendido': None if aprendido is None else min(padrao, aprendido)
+        })
+    return relatorio
+
+def _imprimir_relatorio_historico(relatorio: Dict):
+    print("=" * 64)
+    print(f"{'EXECUÇÃO':<18}{'MODO':<7}{'ITENS':>6}{'PADRÃO (s)':>12}{'REAL (s)':>10}{'ECONOMIA':>11}")
+    for execucao in relatorio['execucoes']:
+        inicio = time.strftime('%d/%m %H:%M', time.localtime(execucao['inicio']))
+        print(f"#{execucao['id']:<5}{inicio:<12}{execucao['modo_espera'] or '-':<7}{execucao['itens']:>6}"
+              f"{execucao['espera_padrao']:>12.1f}{execucao['espera_real']:>10.1f}{execucao['economia']:>10.1f}s")
+    total = sum(execucao['economia'] for execucao in relatorio['execucoes'])
+    print(f"Economia total nas esperas: {total:.1f} s")
+    print("-" * 64)
+    print(f"{'ESPERA':<22}{'AMOSTRAS':>9}{'POR ITEM':>10}{'PADRÃO':>9}{'APRENDIDO':>11}")
+    for espera in relatorio['esperas']:
+        aprendido = '-' if espera['aprendido'] is None else f"{espera['aprendido']:.2f} s"
+        print(f"{espera['etapa']:<22}{espera['amostras']:>9}{espera['itens_com_orcamento']:>10}"
+              f"{espera['padrao']:>7.2f} s{aprendido:>11}")
+    print("=" * 64)
+
+# --- ESTIMATIVA DE DURAÇÃO (SIMULAÇÃO) ---
+class BackendEstimativa(InputBackend):
+    """Backend que não toca em nada: cada ação só avança o relógio simulado."""
+    
+    # Custo aproximado de cada ação do pyautogui, além da pausa configurada
+    CUSTO_ACAO = {'click': 0.02, 'hotkey': 0.02, 'press': 0.01, 'screenshot': 0.03, 'copy': 0.005, 'paste': 0.005}
+    CUSTO_CARACTERE = 0.005
+    
+    def __init__(self, pausa: float):
+        self.pausa = pausa
+        self.relogio = 0.0
+        self._area_transferencia = ''
+    
+    def _gastar(self, acao: str, extra: float = 0.0):
+        self.relogio += self.pausa + self.CUSTO_ACAO.get(acao, 0.0) + extra
+    
+    def click(self, x: int, y: int):
+        self._gastar('click')
+    
+    def hotkey(self, *teclas: str):
+        self._gastar('hotkey')
+    
+    def press(self, tecla: str):
+        self._gastar('press')
+    
+    def write(self, texto: str):
+        self._gastar('write', self.CUSTO_CARACTERE * len(texto))
+    
+    def screenshot(self, region: Tuple[int, int, int, int]):
+        self._gastar('screenshot')
+        return CapturaSimulada(('estimativa',))
+    
+    def position(self) -> Tuple[int, int]:
+        return 0, 0
+    
+    def copy(self, texto: str):
+        self._gastar('copy')
+        self._area_transferencia = texto
+    
+    def paste(self) -> str:
+        self._gastar('paste')
+        return self._area_transferencia
+
+class EstimadorExecucao(AutomationEngine):
+    """Percorre o plano de cada item sem esperar de verdade, somando o tempo previsto.
+    
+    As esperas usam o histórico quando há amostras suficientes: no modo 'tela'
+    a mediana das respostas observadas e no modo 'fixo' o orçamento aprendido
+    (como a execução real). Sem histórico, vale o tempo configurado, o que
+    torna a estimativa do modo 'tela' pessimista.
+    """
+    
+    def __init__(self, coordenadas: Dict, configs: Dict, catalogo: Optional[List[str]] = None,
+                 aliases: Optional[Dict[str, str]] = None, historico: Optional[HistoricoExecucao] = None):
+        configs = dict(configs, registrar_rastro=False, verificar_itens=False)
+        coordenadas = {nome: ponto for nome, ponto in coordenadas.items() if nome != 'ancora'}
+        # Como no engine real, o 'pyautogui_pause' já está nas pausas do plano
+        super().__init__(coordenadas, configs, BackendEstimativa(0.0), catalogo, aliases)
+        self.respostas: Optional[OrcamentosEspera] = None
+        self.aprendidos: Optional[OrcamentosEspera] = None
+        if historico is not None:
+            etapas = [passo['etapa'] for passo in self.plano
+                      if passo['acao'] == 'aguardar' and not isinstance(passo['tempo'], (int, float))]
+            amostras_minimas = int(self._config('amostras_minimas_espera'))
+            self.respostas = historico.orcamentos(etapas, 0.0, amostras_minimas, percentil=0.5)
+            if self._config('espera_adaptativa'):
+                self.aprendidos = historico.orcamentos(
+                    etapas, float(self._config('margem_espera_adaptativa')), amostras_minimas)
+    
+    def _usa_historico(self) -> bool:
+        return bool(self.respostas and (self.respostas.por_item or self.respostas.por_hora
+                                        or self.respostas.por_etapa))
+    
+    def _orcamento_espera(self, passo: Dict, item: str) -> Optional[float]:
+        if self.aprendidos is None or isinstance(passo['tempo'], (int, float)):
+            return None
+        return self.aprendidos.para(item, passo['etapa'])
+    
+    def _agora_ns(self) -> int:
+        return int(self.backend.relogio * 1e9)
+    
+    def _esperar(self, segundos: float):
+        self._verificar_parada()
+        self.backend.relogio += max(0.0, segundos)
+    
+    def _capturar_referencia(self, espera: Dict) -> Optional[bytes]:
+        return None
+    
+    def _executar_passo(self, passo: Dict, valores: Dict[str, str], referencia: Optional[bytes],
+                        item: str = ''):
+        if passo['acao'] != 'aguardar':
+            super()._executar_passo(passo, valores, referencia, item)
+            return
+        tempo = passo['tempo']
+        teto = float(tempo if isinstance(tempo, (int, float)) else self._config(tempo))
+        resposta = self.respostas.para(item, passo['etapa']) if self.respostas else None
+        if self._config('modo_espera') == 'tela':
+            espera = teto if resposta is None else min(teto, resposta)
+        else:
+            orcamento = self._orcamento_espera(passo, item)
+            espera = teto if orcamento is None else max(min(teto, orcamento), min(teto, resposta or 0.0))
+        self._esperar(espera + passo['pausa'])
+    
+    def estimar(self, itens: Dict[str, float]) -> Dict:
+        """Estimativa da execução: duração total, por item e horário previsto de término."""
+        parar, pausar = threading.Event(), threading.Event()
+        pausar.set()
+        self.run(itens, lambda mensagem: None, lambda valor, total: None, parar, pausar)
+        duracoes = [duracao / 1e9 for duracao in self.rastro.duracoes_ns.get('item', [])]
+        por_item = list(zip(itens, duracoes))
+        total = sum(duracoes)
+        return {
+            'itens': len(por_item),
+            'duracao_total': total,
+            'termino': time.time() + total,
+            'mais_lentos': sorted(por_item, key=lambda par: par[1], reverse=True)[:5],
+            'por_item': dict(por_item),
+            'fonte': 'histórico' if self._usa_historico() else 'configuração'
+        }
+
+def formatar_duracao(segundos: float) -> str:
+    segundos = int(round(segundos))
+    if segundos < 60:
+        return f"{segundos} s"
+    minutos, segundos = divmod(segundos, 60)
+    if minutos < 60:
+        return f"{minutos} min {segundos:02d} s"
+    horas, minutos = divmod(minutos, 60)
+    return f"{horas} h {minutos:02d} min"
+
+def estimar_execucao(itens: Dict[str, float], coordenadas: Dict, configs: Dict,
+                     catalogo: Optional[List[str]] = None, aliases: Optional[Dict[str, str]] = None,
+                     caminho_historico: Optional[str] = None, atraso_inicial: float = 0.0) -> Dict:
+    """Simula a execução (sem mexer no mouse) e estima quanto ela vai levar."""
+    historico = None
+    if caminho_historico and os.path.exists(caminho_historico):
+        historico = HistoricoExecucao(caminho_historico)
+    try:
+        estimador = EstimadorExecucao(coordenadas, configs, catalogo, aliases, historico)
+    finally:
+        if historico:
+            historico.fechar()
+    resultado = estimador.estimar(itens)
+    resultado['termino'] += atraso_inicial
+    return resultado
+
+def linhas_estimativa(estimativa: Dict) -> List[str]:
+    linhas = [
+        f"⏱️ Estimativa ({estimativa['fonte']}): {estimativa['itens']} item(ns) em "
+        f"~{formatar_duracao(estimativa['duracao_total'])}, término previsto às "
+        f"{time.strftime('%H:%M', time.localtime(estimativa['termino']))}"
+    ]
+    if estimativa['itens'] > 1:
+        linhas.append("   Mais demorados: " + ", ".join(
+            f"{item} ({duracao:.1f} s)" for item, duracao in estimativa['mais_lentos'][:3]))
+    return linhas
+
+# --- EXPRESSÕES DE QUANTIDADE ---
+_TOKEN_EXPRESSAO = re.compile(r'\s*(?:(\d+(?:[.,]\d*)?|[.,]\d+)|(.))')
+
+class ErroExpressao(ValueError):
+    """Expressão de quantidade inválida, com a posição (base 0) do problema."""
+    
+    def __init__(self, motivo: str, expressao: str, posicao: int):
+        super().__init__(f"{motivo} na posição {posicao + 1}: {expressao!r}")
+        self.motivo = motivo
+        self.expressao = expressao
+        self.posicao = posicao
+    
+    def indicador(self) -> str:
+        """A expressão com um '^' embaixo do ponto do erro."""
+        return f"{self.expressao}\n{' ' * self.posicao}^"
+
+PROFUNDIDADE_MAXIMA_EXPRESSAO = 50
+
+class _ParserExpressao:
+    """Parser descendente recursivo para números, + - * / e parênteses.
+    
+    Gramática:  soma := termo (('+'|'-') termo)*
+                termo := fator (('*'|'/') fator)*
+                fator := ('+'|'-') fator | número | '(' soma ')'
+    Vírgula e ponto são aceitos como separador decimal. Somas e produtos são
+    avaliados em laço; só parênteses e sinais aninham, até
+    PROFUNDIDADE_MAXIMA_EXPRESSAO níveis, para nunca estourar a pilha.
+    """
+    
+    def __init__(self, expressao: str):
+        self.expressao = expressao
+        self.tokens: List[Tuple[str, str, int]] = []
+        for casamento in _TOKEN_EXPRESSAO.finditer(expressao):
+            numero, simbolo = casamento.groups()
+            if numero is None and simbolo is None:
+                continue
+            posicao = casamento.start(1) if numero is not None else casamento.start(2)
+            if numero is not None:
+                self.tokens.append(('numero', numero, posicao))
+            elif simbolo in '+-*/()':
+                self.tokens.append(('operador', simbolo, posicao))
+            else:
+                raise ErroExpressao(f"Caractere inválido '{simbolo}'", expressao, posicao)
+        self.tokens.append(('fim', '', len(expressao)))
+        self.atual = 0
+        self.profundidade = 0
+    
+    def _erro(self, motivo: str) -> ErroExpressao:
+        return ErroExpressao(motivo, self.expressao, self.tokens[self.atual][2])
+    
+    def _olhar(self) -> Tuple[str, str, int]:
+        return self.tokens[self.atual]
+    
+    def _consumir(self) -> Tuple[str, str, int]:
+        token = self.tokens[self.atual]
+        self.atual += 1
+        return token
+    
+    def compilar(self) -> Callable[[], float]:
+        if self._olhar()[0] == 'fim':
+            raise self._erro("Expressão vazia")
+        funcao = self._soma()
+        tipo, valor, _ = self._olhar()
+        if tipo != 'fim':
+            raise self._erro("Número inesperado" if tipo == 'numero' else f"Operador inesperado '{valor}'")
+        return funcao
+    
+    def _soma(self) -> Callable[[], float]:
+        primeira = self._termo()
+        parcelas: List[Tuple[str, Callable[[], float]]] = []
+        while self._olhar()[1] in ('+', '-') and self._olhar()[0] == 'operador':
+            operador = self._consumir()[1]
+            parcelas.append((operador, self._termo()))
+        if not parcelas:
+            return primeira
+        
+        def somar() -> float:
+            total = primeira()
+            for operador, parcela in parcelas:
+                total = total + parcela() if operador == '+' else total - parcela()
+            return total
+        return somar
+    
+    def _termo(self) -> Callable[[], float]:
+        primeiro = self._fator()
+        fatores: List[Tuple[str, Callable[[], float], int]] = []
+        while self._olhar()[1] in ('*', '/') and self._olhar()[0] == 'operador':
+            operador, posicao = self._consumir()[1:]
+            fatores.append((operador, self._fator(), posicao))
+        if not fatores:
+            return primeiro
+        expressao = self.expressao
+        
+        def multiplicar() -> float:
+            produto = primeiro()
+            for operador, fator, posicao in fatores:
+                if operador == '*':
+                    produto *= fator()
+                    continue
+                divisor = fator()
+                if divisor == 0:
+                    raise ErroExpressao("Divisão por zero", expressao, posicao)
+                produto /= divisor
+            return produto
+        return multiplicar
+    
+    def _aninhar(self) -> Callable[[], float]:
+        """Consome um '(' ou sinal e o que ele envolve, limitando a profundidade."""
+        if self.profundidade >= PROFUNDIDADE_MAXIMA_EXPRESSAO:
+            raise self._erro(f"Parênteses ou sinais aninhados demais (máximo {PROFUNDIDADE_MAXIMA_EXPRESSAO})")
+        self.profundidade += 1
+        try:
+            if self._consumir()[1] != '(':
+                return self._fator()
+            interno = self._soma()
+            if self._olhar()[1] != ')':
+                raise self._erro("Falta fechar o parêntese")
+            self._consumir()
+            return interno
+        finally:
+            self.profundidade -= 1
+    
+    def _fator(self) -> Callable[[], float]:
+        tipo, valor, _ = self._olhar()
+        if tipo == 'operador' and valor in ('+', '-'):
+            operando = self._aninhar()
+            return operando if valor == '+' else (lambda: -operando())
+        if tipo == 'numero':
+            self._consumir()
+            numero = float(valor.replace(',', '.'))
+            return lambda: numero
+        if tipo == 'operador' and valor == '(':
+            return self._aninhar()
+        if tipo == 'fim':
+            raise self._erro("Expressão incompleta")
+        raise self._erro(f"Operador inesperado '{valor}'")
+
+@functools.lru_cache(maxsize=4096)
+def compilar_expressao(expressao: str) -> Callable[[], float]:
+    """Compila (com cache) uma expressão de quantidade; levanta ErroExpressao se inválida."""
+    return _ParserExpressao(expressao).compilar()
+
+def avaliar_expressao(expressao: str) -> float:
+    """Valor de uma expressão como '25,5+12,6' ou '(3 * 1,2) - 0,5'."""
+    # Arredonda o ruído de ponto flutuante (3.0999999999999996) antes de digitar no Raffinato
+    return round(float(compilar_expressao(expressao.strip())()), 6)
+
+def validar_expressoes(expressoes: Dict[str, str]) -> Tuple[Dict[str, float], Dict[str, ErroExpressao]]:
+    """Avalia uma planilha inteira de uma vez, separando valores e erros por chave."""
+    valores: Dict[str, float] = {}
+    erros: Dict[str, ErroExpressao] = {}
+    for chave, expressao in expressoes.items():
+        try:
+            valores[chave] = avaliar_expressao(expressao)
+        except ErroExpressao as e:
+            erros[chave] = e
+    return valores, erros
+
+# --- FILA DE CATEGORIAS ---
+class FilaExecucao:
+    """Junta as quantidades de várias categorias em uma única execução.
+    
+    As categorias seguem a ordem pedida (as que não foram citadas vão ao
+    final) e cada uma fica contígua na fila. Um item presente em mais de uma
+    categoria é lançado uma só vez, com as quantidades somadas, para não abrir
+    o diálogo de quantidade duas vezes.
+    """
+    
+    def __init__(self, quantidades: Dict[str, Dict[str, float]], ordem: Optional[List[str]] = None):
+        ordem = [categoria for categoria in (ordem or []) if categoria in quantidades]
+        ordem += [categoria for categoria in quantidades if categoria not in ordem]
+        
+        self.itens: Dict[str, float] = {}
+        self.categorias: List[str] = []
+        self.mesclados: List[str] = []
+        for categoria in ordem:
+            for item, quantidade in quantidades[categoria].items():
+                if quantidade <= 0:
+                    continue
+                if item in self.itens:
+                    self.itens[item] = round(self.itens[item] + quantidade, 6)
+                    self.mesclados.append(item)
+                else:
+                    self.itens[item] = quantidade
+                    self.categorias.append(categoria)
+    
+    def __len__(self) -> int:
+        return len(self.itens)
+    
+    def trechos(self) -> List[Tuple[str, int]]:
+        """Categorias na ordem da fila, com a quantidade de itens de cada uma."""
+        trechos: List[Tuple[str, int]] = []
+        for categoria in self.categorias:
+            if trechos and trechos[-1][0] == categoria:
+                trechos[-1] = (categoria, trechos[-1][1] + 1)
+            else:
+                trechos.append((categoria, 1))
+        return trechos
+    
+    def posicao_na_categoria(self, concluidos: int) -> Tuple[str, int, int]:
+        """(categoria, concluídos nela, total dela) depois de `concluidos` itens da fila."""
+        if not self.categorias:
+            return '', 0, 0
+        # A categoria "atual" é a do último item concluído (ou a primeira, antes de começar)
+        indice = max(0, min(concluidos, len(self.categorias)) - 1)
+        categoria = self.categorias[indice]
+        inicio = self.categorias.index(categoria)
+        total = self.categorias.count(categoria)
+        return categoria, min(concluidos - inicio, total), total
+    
+    def descricao(self) -> str:
+        return " → ".join(f"{categoria} ({quantidade})" for categoria, quantidade in self.trechos())
+
+# --- VÁRIAS TELAS EM PARALELO ---
+# Cada tela (um DISPLAY com sua própria sessão do Raffinato) roda em um processo
+# novo: o pyautogui fixa o display na importação e não pode ser reaproveitado.
+INTERVALO_ESPELHO_EVENTOS = 0.05
+
+def caminho_diario_tela(pasta: str, nome: str) -> str:
+    raiz, extensao = os.path.splitext(ARQUIVO_DIARIO)
+    return os.path.join(pasta, f"{raiz}.{nome}{extensao}")
+
+def dividir_itens(itens: Dict[str, float], duracoes: Dict[str, float], partes: int) -> List[Dict[str, float]]:
+    """Reparte os itens entre as telas equilibrando a duração estimada.
+    
+    O item mais demorado vai para a tela menos carregada; dentro de cada
+    tela os itens mantêm a ordem do pedido.
+    """
+    cargas = [0.0] * partes
+    destino: Dict[str, int] = {}
+    for item in sorted(itens, key=lambda item: duracoes.get(item, 1.0), reverse=True):
+        tela = cargas.index(min(cargas))
+        destino[item] = tela
+        cargas[tela] += duracoes.get(item, 1.0)
+    divisao: List[Dict[str, float]] = [{} for _ in range(partes)]
+    for item, quantidade in itens.items():
+        divisao[destino[item]][item] = quantidade
+    return divisao
+
+def mesclar_diarios(diarios: Dict[str, str]) -> Optional[Dict]:
+    """Junta as pendências dos diários de cada tela; None se nenhuma tem o que retomar.
+    
+    Retorna {'itens', 'concluidos', 'em_andamento': [itens], 'por_tela': {tela: pendências}}.
+    """
+    por_tela = {}
+    for nome, caminho in diarios.items():
+        pendencias = DiarioExecucao.ler_pendencias(caminho)
+        if pendencias:
+            por_tela[nome] = pendencias
+    if not por_tela:
+        return None
+    itens: Dict[str, float] = {}
+    for pendencias in por_tela.values():
+        itens.update(pendencias['itens'])
+    return {
+        'itens': itens,
+        'concluidos': sum(pendencias['concluidos'] for pendencias in por_tela.values()),
+        'em_andamento': [p['em_andamento'] for p in por_tela.values() if p['em_andamento']],
+        'por_tela': por_tela
+    }
+
+def _executar_tela(tarefa: Dict, eventos, parar, pausar) -> Dict:
+    """Processo de uma tela: aponta o DISPLAY antes de criar o backend e repassa log e progresso."""
+    nome = tarefa['nome']
+    if tarefa.get('display'):
+        os.environ['DISPLAY'] = tarefa['display']
+    parar_local, pausar_local, encerrado = threading.Event(), threading.Event(), threading.Event()
+    pausar_local.set()
+    
+    def espelhar():
+        # Os eventos do coordenador são proxies entre processos; o engine consulta as cópias locais
+        while not encerrado.wait(INTERVALO_ESPELHO_EVENTOS):
+            try:
+                if parar.is_set():
+                    parar_local.set()
+                if pausar.is_set():
+                    pausar_local.set()
+                else:
+                    pausar_local.clear()
+            except (OSError, EOFError):
+                parar_local.set()
+                return
+    
+    threading.Thread(target=espelhar, daemon=True).start()
+    backend = None
+    if tarefa.get('simulado') is not None:
+        backend = RaffinatoSimulado(tarefa['catalogo'] or list(tarefa['itens']), tarefa['coordenadas'],
+                                    **tarefa['simulado'])
+    resultado = "Erro"
+    falhas: List[Dict] = []
+    try:
+        engine = AutomationEngine(tarefa['coordenadas'], tarefa['configs'], backend,
+                                  catalogo=tarefa['catalogo'], aliases=tarefa['aliases'])
+        historico = HistoricoExecucao(tarefa['historico']) if tarefa.get('historico') else None
+        resultado = engine.run(
+            tarefa['itens'],
+            lambda mensagem: eventos.put((nome, 'log', mensagem)),
+            lambda valor, total: eventos.put((nome, 'progresso', valor)),
+            parar_local,
+            pausar_local,
+            DiarioExecucao(tarefa['diario']),
+            historico
+        )
+        falhas = [dict(falha, tela=nome) for falha in engine.falhas]
+    except Exception as e:
+        eventos.put((nome, 'log', f"❌ ERRO CRÍTICO: {e}"))
+    finally:
+        encerrado.set()
+    return {
+        'nome': nome,
+        'display': os.environ.get('DISPLAY'),
+        'pid': os.getpid(),
+        'resultado': resultado,
+        'falhas': falhas,
+        'registros': list(backend.registros) if backend is not None else []
+    }
+
+class CoordenadorTelas:
+    """Reparte um pedido entre várias sessões do Raffinato, uma por tela, num pool de processos.
+    
+    Cada tela é {'nome', 'display', 'coordenadas', 'configs'} (a calibração
+    daquela sessão) e grava seu próprio diário; log e progresso dos processos
+    chegam por uma fila e são mesclados numa visão só. `simulado`, quando
+    informado, troca o pyautogui pelo RaffinatoSimulado com essas latências.
+    """
+    
+    def __init__(self, telas: List[Dict], catalogo: Optional[List[str]] = None,
+                 aliases: Optional[Dict[str, str]] = None, pasta_diarios: str = SCRIPT_DIR,
+                 simulado: Optional[Dict] = None):
+        if not telas:
+            raise ValueError("Informe pelo menos uma tela.")
+        self.telas = telas
+        self.catalogo = catalogo
+        self.aliases = aliases
+        self.pasta_diarios = pasta_diarios
+        self.simulado = simulado
+        self.falhas: List[Dict] = []
+        self.resultados: Dict[str, Dict] = {}
+    
+    def diarios(self) -> Dict[str, str]:
+        return {tela['nome']: caminho_diario_tela(self.pasta_diarios, tela['nome']) for tela in self.telas}
+    
+    def dividir(self, itens: Dict[str, float]) -> List[Dict[str, float]]:
+        """Divide pelo tempo estimado de cada item (simulação com a calibração da primeira tela)."""
+        tela = self.telas[0]
+        estimativa = estimar_execucao(itens, tela['coordenadas'], tela['configs'], self.catalogo, self.aliases,
+                                      os.path.join(SCRIPT_DIR, ARQUIVO_HISTORICO))
+        return dividir_itens(itens, estimativa['por_item'], len(self.telas))
+    
+    def _tarefas(self, itens: Dict[str, float]) -> List[Dict]:
+        diarios = self.diarios()
+        tarefas = []
+        for tela, parte in zip(self.telas, self.dividir(itens)):
+            if not parte:
+                continue
+            configs = dict(tela['configs'])
+            # Rastros separados por tela: dois processos no mesmo segundo gravariam o mesmo arquivo
+            pasta_rastros = configs.get('pasta_rastros', DEFAULTS['pasta_rastros'])
+            configs['pasta_rastros'] = os.path.join(_caminho_local(pasta_rastros), tela['nome'])
+            historico = None
+            if configs.get('registrar_historico', DEFAULTS['registrar_historico']):
+                historico = os.path.join(SCRIPT_DIR, ARQUIVO_HISTORICO)
+            tarefas.append({
+                'nome': tela['nome'],
+                'display': tela.get('display'),
+                'coordenadas': tela['coordenadas'],
+                'configs': configs,
+                'itens': parte,
+                'catalogo': self.catalogo,
+                'aliases': self.aliases,
+                'diario': diarios[tela['nome']],
+                'historico': historico,
+                'simulado': self.simulado
+            })
+        return tarefas
+    
+    def _encerrar_diarios_sem_itens(self, tarefas: List[Dict]):
+        """Finaliza o diário antigo das telas sem itens nesta execução.
+        
+        Sem isso, as pendências de uma execução anterior daquela tela voltariam
+        na próxima retomada e seriam lançadas de novo.
+        """
+        com_itens = {tarefa['nome'] for tarefa in tarefas}
+        for nome, caminho in self.diarios().items():
+            if nome not in com_itens and os.path.exists(caminho):
+                diario = DiarioExecucao(caminho)
+                diario.iniciar({})
+                diario.finalizar()
+    
+    def run(self, itens: Dict[str, float], log_callback, progress_callback, stop_event,
+            pause_event: Optional[threading.Event] = None) -> str:
+        """Executa o pedido nas telas em paralelo; devolve o resultado mesclado."""
+        self.falhas = []
+        self.resultados = {}
+        tarefas = self._tarefas(itens)
+        self._encerrar_diarios_sem_itens(tarefas)
+        if not tarefas:
+            return "✅ Processamento concluído com sucesso!"
+        total = sum(len(tarefa['itens']) for tarefa in tarefas)
+        for tarefa in tarefas:
+            log_callback(f"🖥️ {tarefa['nome']} ({tarefa['display'] or 'display atual'}): "
+                         f"{len(tarefa['itens'])} item(ns)")
+        progresso = {tarefa['nome']: 0 for tarefa in tarefas}
+        
+        def tratar(evento: Tuple):
+            nome, tipo, dado = evento
+            if tipo == 'log':
+                log_callback(f"[{nome}] {dado}")
+            elif tipo == 'progresso':
+                progresso[nome] = dado
+                progress_callback(sum(progresso.values()), total)
+        
+        contexto = multiprocessing.get_context('spawn')
+        with contexto.Manager() as gerente:
+            eventos, parar, pausar = gerente.Queue(), gerente.Event(), gerente.Event()
+            pausar.set()
+            # maxtasksperchild=1: cada tela ganha um processo novo, com o seu DISPLAY
+            with contexto.Pool(len(tarefas), maxtasksperchild=1) as pool:
+                execucoes = [pool.apply_async(_executar_tela, (tarefa, eventos, parar, pausar))
+                             for tarefa in tarefas]
+                while not all(execucao.ready() for execucao in execucoes):
+                    if stop_event.is_set() and not parar.is_set():
+                        parar.set()
+                    if pause_event is not None and pause_event.is_set() != pausar.is_set():
+                        if pause_event.is_set():
+                            pausar.set()
+                        else:
+                            pausar.clear()
+                    try:
+                        tratar(eventos.get(timeout=0.1))
+                    except queue.Empty:
+                        pass
+                while not eventos.empty():
+                    tratar(eventos.get())
+                for tarefa, execucao in zip(tarefas, execucoes):
+                    try:
+                        self.resultados[tarefa['nome']] = execucao.get()
+                    except Exception as e:
+                        log_callback(f"[{tarefa['nome']}] ❌ Processo da tela falhou: {e}")
+                        self.resultados[tarefa['nome']] = {'nome': tarefa['nome'], 'resultado': "Erro", 'falhas': []}
+        
+        for resultado in self.resultados.values():
+            self.falhas.extend(resultado['falhas'])
+        incompletas = [nome for nome, resultado in self.resultados.items()
+                       if not resultado['resultado'].startswith(("✅", "⚠️"))]
+        if incompletas:
+            return (f"⚠️ {len(incompletas)} tela(s) não terminaram ({', '.join(incompletas)}); "
+                    "o restante fica nos diários de cada tela.")
+        if self.falhas:
+            return f"⚠️ Processamento concluído com {len(self.falhas)} falha(s) em {len(tarefas)} tela(s)."
+        return f"✅ Processamento concluído com sucesso em {len(tarefas)} tela(s)!"
+
+# --- LOG EM ARQUIVO ---
+_NIVEL_POR_ICONE = {'❌': 'ERROR', '🛑': 'ERROR', '⚠️': 'WARNING'}
+
+class _FormatoJSON(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        return json.dumps({
+            'ts': time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(record.created)),
+            'nivel': record.levelname,
+            'origem': getattr(record, 'origem', ''),
+            'mensagem': record.getMessage()
+        }, ensure_ascii=False)
+
+def caminho_log_origem(caminho: str, origem: str) -> str:
+    """Arquivo de log de uma origem (ex.: logs/robo.log -> logs/robo.gui.log)."""
+    if not origem:
+        return caminho
+    base, extensao = os.path.splitext(caminho)
+    return f"{base}.{origem}{extensao}"
+
+class LogArquivo:
+    """Grava o log de execução em JSONL com rotação por tamanho, numa thread própria.
+    
+    `registrar` só enfileira o registro: quem loga (a thread da automação ou
+    a do Tk) nunca espera pelo disco. Cada origem (gui, cli, servidor...)
+    escreve no seu próprio arquivo, pois a rotação de um arquivo aberto por
+    dois processos falha no Windows; `buscar_log` junta todos na consulta.
+    """
+    
+    def __init__(self, caminho: str, tamanho_max_mb: float = 5, copias: int = 5, origem: str = ''):
+        pasta = os.path.dirname(caminho)
+        if pasta:
+            os.makedirs(pasta, exist_ok=True)
+        self.caminho = caminho_log_origem(caminho, origem)
+        self.origem = origem
+        self._arquivo = logging.handlers.RotatingFileHandler(
+            self.caminho, maxBytes=int(tamanho_max_mb * 1024 * 1024), backupCount=copias, encoding='utf-8')
+        self._arquivo.setFormatter(_FormatoJSON())
+        fila: queue.SimpleQueue = queue.SimpleQueue()
+        self._ouvinte = logging.handlers.QueueListener(fila, self._arquivo)
+        self._logger = logging.Logger(f'robo.{id(self)}')
+        self._logger.addHandler(logging.handlers.QueueHandler(fila))
+        self._ouvinte.start()
+    
+    def registrar(self, mensagem: str):
+        nivel = next((valor for icone, valor in _NIVEL_POR_ICONE.items() if mensagem.startswith(icone)), 'INFO')
+        self._logger.log(logging.getLevelName(nivel), mensagem, extra={'origem': self.origem})
+    
+    def fechar(self):
+        """Grava o que ainda está na fila e fecha o arquivo."""
+        self._ouvinte.stop()
+        self._arquivo.close()
+
+def buscar_log(caminho: str, termo: str, limite: int = 500) -> List[Dict]:
+    """Registros do log de todas as origens que contêm o termo, dos mais recentes aos antigos.
+    
+    A comparação ignora acentos e maiúsculas; termo vazio traz os últimos registros.
+    """
+    base, extensao = os.path.splitext(caminho)
+    arquivos = [caminho] + sorted(glob.glob(f"{glob.escape(base)}.*{glob.escape(extensao)}"))
+    encontrados: List[Dict] = []
+    for arquivo in arquivos:
+        encontrados.extend(_buscar_arquivo_log(arquivo, termo, limite))
+    # Ordenação estável: registros do mesmo segundo mantêm a ordem do arquivo
+    encontrados.sort(key=lambda registro: registro.get('ts', ''), reverse=True)
+    return encontrados[:limite]
+
+def _buscar_arquivo_log(caminho: str, termo: str, limite: int) -> List[Dict]:
+    """Registros de um arquivo de log e das suas cópias rotacionadas, dos mais recentes aos antigos."""
+    termo = normalizar_texto(termo.strip())
+    encontrados: List[Dict] = []
+    indice = 0
+    arquivo = caminho
+    while os.path.exists(arquivo) and len(encontrados) < limite:
+        with open(arquivo, 'r', encoding='utf-8', errors='replace') as f:
+            linhas = f.readlines()
+        for linha in reversed(linhas):
+            if termo and termo not in normalizar_texto(linha):
+                continue
+            try:
+                registro = json.loads(linha)
+            except ValueError:
+                continue
+            if termo and termo not in normalizar_texto(registro.get('mensagem', '')):
+                continue
+            encontrados.append(registro)
+            if len(encontrados) >= limite:
+                break
+        indice += 1
+        arquivo = f"{caminho}.{indice}"
+    return encontrados
+
+# --- PEDIDOS (LINHA DE COMANDO) ---
+_CABECALHOS_QUANTIDADE = ('quantidade', 'qtd', 'qtde')
+
+def ler_pedido(caminho: str) -> List[Tuple[str, str]]:
+    """Lê um pedido em JSON ({item: qtd} ou [{item, quantidade}]) ou CSV (item;quantidade)."""
+    if caminho.lower().endswith('.json'):
+        with open(caminho, 'r', encoding='utf-8') as f:
+            dados = json.load(f)
+        if isinstance(dados, dict):
+            dados = dados.get('itens', dados)
+        if isinstance(dados, dict):
+            return [(str(item), str(qtd)) for item, qtd in dados.items()]
+        if isinstance(dados, list):
+            linhas = []
+            for posicao, registro in enumerate(dados, start=1):
+                if not isinstance(registro, dict) or 'item' not in registro or 'quantidade' not in registro:
+                    raise ValueError(f"{caminho}: registro {posicao} precisa de 'item' e 'quantidade'")
+                linhas.append((str(registro['item']), str(registro['quantidade'])))
+            return linhas
+        raise ValueError(f"{caminho}: formato JSON não reconhecido")
+    
+    with open(caminho, 'r', encoding='utf-8-sig', newline='') as f:
+        conteudo = f.read()
+    try:
+        separador = csv.Sniffer().sniff(conteudo[:4096], delimiters=';\t,').delimiter
+    except csv.Error:
+        separador = ';'
+    linhas = []
+    for numero, colunas in enumerate(csv.reader(conteudo.splitlines(), delimiter=separador), start=1):
+        colunas = [coluna.strip() for coluna in colunas]
+        if not any(colunas):
+            continue
+        if len(colunas) != 2:
+            raise ValueError(f"{caminho}:{numero}: esperado 'item{separador}quantidade', lido {colunas}")
+        if not linhas and colunas[1].lower() in _CABECALHOS_QUANTIDADE:
+            continue
+        linhas.append((colunas[0], colunas[1]))
+    return linhas
+
+def validar_pedido(linhas: List[Tuple[str, str]], catalogo: Dict[str, List[str]],
+                   codigos: Optional[Dict[str, str]] = None) -> Tuple[Dict[str, float], List[str]]:
+    """Confere os itens contra o catálogo e calcula as quantidades.
+    
+    Os nomes são comparados sem acentos e sem maiúsculas e trocados pelo nome do
+    catálogo; um código do catálogo também identifica o item. Devolve os itens
+    com quantidade > 0 e a lista de erros encontrados.
+    """
+    por_nome = {normalizar_texto(item): item for itens in catalogo.values() for item in itens}
+    codigos = codigos or {}
+    itens: Dict[str, float] = {}
+    erros: List[str] = []
+    
+    for posicao, (nome, valor) in enumerate(linhas, start=1):
+        item = codigos.get(nome.strip()) or por_nome.get(normalizar_texto(nome.strip()))
+        if item is None:
+            sugestoes = difflib.get_close_matches(normalizar_texto(nome), list(por_nome), n=1)
+            dica = f" (você quis dizer '{por_nome[sugestoes[0]]}'?)" if sugestoes else ""
+            erros.append(f"Linha {posicao}: item fora do catálogo: '{nome}'{dica}")
+            continue
+        if item in itens:
+            erros.append(f"Linha {posicao}: item repetido: '{item}'")
+            continue
+        try:
+            quantidade = avaliar_expressao(str(valor))
+        except ErroExpressao as e:
+            erros.append(f"Linha {posicao}: {item}: {e}")
+            continue
+        if quantidade < 0:
+            erros.append(f"Linha {posicao}: {item}: quantidade negativa ({valor})")
+        elif quantidade > 0:
+            itens[item] = quantidade
+    
+    return itens, erros
+
+def _log_console(mensagem: str):
+    print(f"[{time.strftime('%H:%M:%S')}] {mensagem}", flush=True)
+
+@contextlib.contextmanager
+def _log_comando(configs: Dict, origem: str):
+    """Log de um comando de terminal: console + arquivo da origem, fechado ao sair."""
+    log_arquivo = LogArquivo(
+        _caminho_local(configs.get('arquivo_log', DEFAULTS['arquivo_log'])),
+        float(configs.get('tamanho_max_log_mb', DEFAULTS['tamanho_max_log_mb'])),
+        int(configs.get('copias_log', DEFAULTS['copias_log'])),
+        origem=origem
+    )
+    
+    def log(mensagem: str):
+        _log_console(mensagem)
+        log_arquivo.registrar(mensagem)
+    
+    try:
+        yield log
+    finally:
+        log_arquivo.fechar()
+
+def _diario_inacabado(pendencias: Optional[Dict], dica: str, log: Callable[[str], None]) -> bool:
+    """True (com o aviso no log) se há uma execução inacabada que um novo pedido apagaria."""
+    if not pendencias:
+        return False
+    log(f"❌ O diário tem uma execução inacabada: {pendencias['concluidos']} item(ns) já lançado(s), "
+        f"{len(pendencias['itens'])} pendente(s). Começar outro pedido apagaria esse registro.")
+    log(f"   {dica}")
+    return True
+
+def _rodar_ate_o_fim(executar: Callable[[], None], parar: threading.Event, log: Callable[[str], None]):
+    """Roda `executar` numa thread e espera ela acabar; Ctrl+C aciona `parar` em vez de abandoná-la.
+    
+    A espera é por um Event, não por `Thread.join`: um join interrompido pelo
+    Ctrl+C pode dar a thread por encerrada antes da hora (Python < 3.13).
+    """
+    terminou = threading.Event()
+    
+    def rodar():
+        try:
+            executar()
+        finally:
+            terminou.set()
+    
+    threading.Thread(target=rodar, daemon=True).start()
+    while not terminou.is_set():
+        try:
+            terminou.wait(0.2)
+        except KeyboardInterrupt:
+            log("🛑 Parada solicitada (Ctrl+C)...")
+            parar.set()
+
+def _ler_pedido_validado(caminho: Optional[str], catalogo: Catalogo,
+                         log: Callable[[str], None]) -> Optional[Dict[str, float]]:
+    """Lê e valida o pedido; None (com os erros já no log) se ele não pode ser executado."""
+    if not caminho:
+        log("❌ Informe o arquivo do pedido (ou use --retomar).")
+        return None
+    try:
+        itens, erros = validar_pedido(ler_pedido(caminho), catalogo.categorias, catalogo.codigos)
+    except (OSError, ValueError) as e:
+        log(f"❌ Não foi possível ler o pedido: {e}")
+        return None
+    if erros:
+        for erro in erros:
+            log(f"❌ {erro}")
+        log(f"Pedido com {len(erros)} erro(s); nada foi executado.")
+        return None
+    return itens
+
+def executar_pedido_cli(args) -> int:
+    """Roda um pedido sem interface gráfica; devolve o código de saída do processo."""
+    config_manager = ConfigManager(args.itens, args.config)
+    try:
+        catalogo = config_manager.carregar_catalogo()
+        coordenadas, configs = config_manager.carregar_configuracoes()
+    except (ErroCatalogo, ErroConfiguracao) as e:
+        _log_console(f"❌ {e}")
+        return 1
+    with _log_comando(configs, 'cli') as log:
+        return _executar_pedido(args, catalogo, coordenadas, configs, log)
+
+def _executar_pedido(args, catalogo: Catalogo, coordenadas: Optional[Dict], configs: Dict,
+                     log: Callable[[str], None]) -> int:
+    caminho_diario = os.path.join(SCRIPT_DIR, ARQUIVO_DIARIO)
+    
+    if args.retomar:
+        pendencias = DiarioExecucao.ler_pendencias(caminho_diario)
+        if not pendencias:
+            log("Nenhuma execução pendente para retomar.")
+            return 0
+        if pendencias['em_andamento']:
+            log(f"⚠️ '{pendencias['em_andamento']}' estava em processamento e NÃO será repetido; "
+                "confira no Raffinato.")
+        itens = pendencias['itens']
+    else:
+        if (not (args.descartar or args.validar or args.simular) and _diario_inacabado(
+                DiarioExecucao.ler_pendencias(caminho_diario),
+                "Use --retomar para continuar de onde parou ou --descartar para rodar este pedido mesmo assim.", log)):
+            return 1
+        itens = _ler_pedido_validado(args.pedido, catalogo, log)
+        if itens is None:
+            return 1
+    
+    if not itens:
+        log("⚠️ Nenhum item com quantidade no pedido.")
+        return 0
+    log(f"📋 {len(itens)} item(ns) validado(s).")
+    if args.validar:
+        return 0
+    if not coordenadas and not args.simular:
+        log("❌ Sem calibração: abra a interface uma vez para calibrar as posições.")
+        return 1
+    estimativa = estimar_execucao(itens, coordenadas or COORDENADAS_SIMULADAS, configs, catalogo.itens, catalogo.aliases,
+                                  os.path.join(SCRIPT_DIR, ARQUIVO_HISTORICO), atraso_inicial=args.atraso)
+    for linha in linhas_estimativa(estimativa):
+        log(linha)
+    if args.simular:
+        return 0
+    
+    parar, pausar = threading.Event(), threading.Event()
+    pausar.set()
+    resultado = {}
+    
+    def executar():
+        if args.atraso > 0:
+            log(f"⏳ Aguardando {args.atraso:g} s para você posicionar a janela do Raffinato...")
+            if parar.wait(args.atraso):
+                resultado['status'] = "Interrompido"
+                return
+        try:
+            engine = AutomationEngine(coordenadas, configs, catalogo=catalogo.itens, aliases=catalogo.aliases)
+            historico = None
+            if configs.get('registrar_historico', DEFAULTS['registrar_historico']):
+                historico = HistoricoExecucao(os.path.join(SCRIPT_DIR, ARQUIVO_HISTORICO))
+            resultado['status'] = engine.run(
+                itens,
+                log,
+                lambda valor, total: _log_console(f"   {valor}/{total}"),
+                parar,
+                pausar,
+                DiarioExecucao(caminho_diario),
+                historico
+            )
+            if engine.falhas:
+                caminho_falhas = os.path.join(SCRIPT_DIR, ARQUIVO_FALHAS)
+                if salvar_falhas(caminho_falhas, engine.falhas):
+                    log(f"📄 Falhas salvas em {caminho_falhas} "
+                        f"(reprocesse com: executar {ARQUIVO_FALHAS})")
+        except Exception as e:
+            log(f"❌ ERRO CRÍTICO: {e}")
+            resultado['status'] = "Erro"
+    
+    _rodar_ate_o_fim(executar, parar, log)
+    
+    status = resultado.get('status', "Erro")
+    log(status)
+    return 0 if status.startswith("✅") else 2
+
+# --- SERVIDOR DE PEDIDOS ---
+# Só escuta na própria máquina: os operadores enviam pedidos ao robô pelo comando 'fila'.
+HOST_SERVIDOR = '127.0.0.1'
+PORTA_SERVIDOR = 8765
+TAMANHO_MAX_MENSAGEM = 1024 * 1024
+PEDIDOS_ENCERRADOS_NO_STATUS = 20
+
+class FilaPedidos:
+    """Pedidos aguardando o robô: maior prioridade primeiro, empate pela ordem de chegada."""
+    
+    def __init__(self):
+        self._heap: List[Tuple[int, int, Dict]] = []
+        self._condicao = threading.Condition()
+        self.pausada = False
+    
+    def adicionar(self, pedido: Dict, topo: bool = False) -> int:
+        """Enfileira o pedido e devolve sua posição (1 = o próximo a rodar).
+        
+        `topo` passa o pedido à frente de qualquer prioridade (restante de um pedido interrompido).
+        """
+        with self._condicao:
+            chave = -math.inf if topo else -pedido['prioridade']
+            heapq.heappush(self._heap, (chave, pedido['id'], pedido))
+            self._condicao.notify_all()
+            return [p['id'] for p in self.pendentes()].index(pedido['id']) + 1
+    
+    def proximo(self, parar: threading.Event) -> Optional[Dict]:
+        """Bloqueia até haver pedido (e a fila não estar pausada); None se `parar` for acionado."""
+        with self._condicao:
+            while not parar.is_set():
+                if self._heap and not self.pausada:
+                    return heapq.heappop(self._heap)[2]
+                self._condicao.wait(0.5)
+        return None
+    
+    def remover(self, id_pedido: int) -> Optional[Dict]:
+        with self._condicao:
+            for posicao, (_, id_atual, pedido) in enumerate(self._heap):
+                if id_atual == id_pedido:
+                    self._heap.pop(posicao)
+                    heapq.heapify(self._heap)
+                    return pedido
+        return None
+    
+    def pausar(self):
+        with self._condicao:
+            self.pausada = True
+    
+    def retomar(self):
+        with self._condicao:
+            self.pausada = False
+            self._condicao.notify_all()
+    
+    def acordar(self):
+        with self._condicao:
+            self._condicao.notify_all()
+    
+    def pendentes(self) -> List[Dict]:
+        with self._condicao:
+            return [pedido for _, _, pedido in sorted(self._heap, key=lambda entrada: entrada[:2])]
+
+def _resumo_pedido(pedido: Dict) -> Dict:
+    """O que o status mostra de um pedido (sem a lista de itens)."""
+    resumo = {chave: valor for chave, valor in pedido.items() if chave != 'itens'}
+    resumo['total_itens'] = len(pedido['itens'])
+    return resumo
+
+class _ConexaoPedidos(socketserver.StreamRequestHandler):
+    """Uma mensagem JSON por linha; cada uma recebe uma resposta JSON por linha."""
+    
+    def handle(self):
+        while True:
+            linha = self.rfile.readline(TAMANHO_MAX_MENSAGEM + 1)
+            if not linha:
+                return
+            if len(linha) > TAMANHO_MAX_MENSAGEM:
+                self._responder({'ok': False, 'erro': "Mensagem grande demais."})
+                return
+            try:
+                mensagem = json.loads(linha.decode('utf-8'))
+            except ValueError:
+                resposta = {'ok': False, 'erro': "Mensagem não é JSON válido."}
+            else:
+                resposta = self.server.robo.tratar(mensagem)
+            self._responder(resposta)
+    
+    def _responder(self, resposta: Dict):
+        self.wfile.write((json.dumps(resposta, ensure_ascii=False) + '\n').encode('utf-8'))
+
+class _ServidorTCP(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+    
+    def verify_request(self, request, client_address) -> bool:
+        return client_address[0] == HOST_SERVIDOR
+
+class ServidorPedidos:
+    """Recebe pedidos de vários operadores e os entrega, um após o outro, ao AutomationEngine.
+    
+    Os pedidos são validados contra o catálogo na chegada (o catálogo é
+    recarregado se o arquivo mudar). Uma execução interrompida (PARAR,
+    failsafe, janela perdida) pausa a fila e devolve o restante do pedido ao
+    topo; a fila só volta a andar com 'retomar'. Diário, falhas e histórico
+    ficam em `pasta`.
+    """
+    
+    def __init__(self, config_manager: ConfigManager, porta: int = PORTA_SERVIDOR,
+                 atraso_inicial: float = 5.0, log: Callable[[str], None] = _log_console,
+                 backend: Optional[InputBackend] = None, pasta: str = SCRIPT_DIR):
+        self.config_manager = config_manager
+        self.pasta = pasta
+        self.coordenadas, self.configs = config_manager.carregar_configuracoes()
+        self.porta = porta
+        self.atraso_inicial = atraso_inicial
+        self.log = log
+        self.backend = backend
+        self.fila = FilaPedidos()
+        self.atual: Optional[Dict] = None
+        self.encerrados: List[Dict] = []
+        self._trava = threading.Lock()
+        self._proximo_id = 1
+        self._parar_servidor = threading.Event()
+        self._parar_atual = threading.Event()
+        self._posicionar = True
+        self._tcp: Optional[_ServidorTCP] = None
+        self._executor: Optional[threading.Thread] = None
+    
+    # -- Mensagens dos clientes --
+    def tratar(self, mensagem: Dict) -> Dict:
+        acoes = {
+            'enviar': self.enviar,
+            'status': lambda m: self.status(),
+            'cancelar': self.cancelar,
+            'parar': lambda m: self.parar_atual(),
+            'retomar': lambda m: self.retomar()
+        }
+        acao = mensagem.get('acao') if isinstance(mensagem, dict) else None
+        if acao not in acoes:
+            return {'ok': False, 'erro': f"Ação desconhecida: {acao!r}"}
+        try:
+            return acoes[acao](mensagem)
+        except (KeyError, TypeError, ValueError) as e:
+            return {'ok': False, 'erro': f"Mensagem inválida para '{acao}': {e}"}
+    
+    def enviar(self, mensagem: Dict) -> Dict:
+        linhas = [(str(nome), str(valor)) for nome, valor in mensagem['linhas']]
+        try:
+            catalogo = self.config_manager.carregar_catalogo()
+        except ErroCatalogo as e:
+            return {'ok': False, 'erros': [str(e)]}
+        itens, erros = validar_pedido(linhas, catalogo.categorias, catalogo.codigos)
+        if erros:
+            return {'ok': False, 'erros': erros}
+        if not itens:
+            return {'ok': False, 'erros': ["Nenhum item com quantidade no pedido."]}
+        
+        try:
+            estimativa = estimar_execucao(itens, self.coordenadas or COORDENADAS_SIMULADAS, self.configs,
+                                          catalogo.itens, catalogo.aliases,
+                                          os.path.join(self.pasta, ARQUIVO_HISTORICO))
+        except Exception as e:
+            # A simulação roda o engine inteiro; uma falha dela não pode derrubar a conexão
+            self.log(f"❌ Estimativa do pedido falhou: {e}")
+            return {'ok': False, 'erros': [f"Não foi possível estimar o pedido: {e}"]}
+        with self._trava:
+            pedido = {
+                'id': self._proximo_id,
+                'nome': str(mensagem.get('nome') or f"pedido {self._proximo_id}"),
+                'operador': str(mensagem.get('operador') or '?'),
+                'prioridade': int(mensagem.get('prioridade', 0)),
+                'itens': itens,
+                'estado': 'na_fila',
+                'recebido': time.time(),
+                'duracao_estimada': estimativa['duracao_total'],
+                'progresso': [0, len(itens)],
+                'falhas': []
+            }
+            self._proximo_id += 1
+        posicao = self.fila.adicionar(pedido)
+        self.log(f"📥 Pedido #{pedido['id']} '{pedido['nome']}' de {pedido['operador']}: "
+                 f"{len(itens)} item(ns), prioridade {pedido['prioridade']}, posição {posicao} na fila")
+        return {'ok': True, 'id': pedido['id'], 'posicao': posicao, 'duracao_estimada': pedido['duracao_estimada']}
+    
+    def status(self) -> Dict:
+        with self._trava:
+            atual = _resumo_pedido(self.atual) if self.atual else None
+            encerrados = [_resumo_pedido(pedido) for pedido in self.encerrados[-PEDIDOS_ENCERRADOS_NO_STATUS:]]
+        fila = []
+        espera = 0.0
+        if atual:
+            feitos, total = atual['progresso']
+            espera = atual['duracao_estimada'] * (total - feitos) / max(total, 1)
+        for pedido in self.fila.pendentes():
+            resumo = _resumo_pedido(pedido)
+            resumo['inicio_previsto'] = None if self.fila.pausada else time.time() + espera
+            espera += pedido['duracao_estimada']
+            fila.append(resumo)
+        return {'ok': True, 'pausada': self.fila.pausada, 'atual': atual, 'fila': fila, 'encerrados': encerrados}
+    
+    def cancelar(self, mensagem: Dict) -> Dict:
+        id_pedido = int(mensagem['id'])
+        with self._trava:
+            if self.atual and self.atual['id'] == id_pedido:
+                return {'ok': False, 'erro': f"Pedido #{id_pedido} já está rodando; use 'parar'."}
+            pedido = self.fila.remover(id_pedido)
+            if pedido is None:
+                return {'ok': False, 'erro': f"Pedido #{id_pedido} não está na fila."}
+            self._encerrar(pedido, 'cancelado', "Cancelado antes de rodar")
+        self.log(f"🗑️ Pedido #{id_pedido} cancelado.")
+        return {'ok': True, 'id': id_pedido}
+    
+    def parar_atual(self) -> Dict:
+        with self._trava:
+            if self.atual is None:
+                return {'ok': False, 'erro': "Nenhum pedido rodando."}
+            id_pedido = self.atual['id']
+        self._parar_atual.set()
+        return {'ok': True, 'id': id_pedido}
+    
+    def retomar(self) -> Dict:
+        if not self.fila.pausada:
+            return {'ok': False, 'erro': "A fila não está pausada."}
+        self._posicionar = True
+        self.fila.retomar()
+        self.log("▶️ Fila retomada.")
+        return {'ok': True}
+    
+    # -- Execução --
+    def _encerrar(self, pedido: Dict, estado: str, resultado: str):
+        pedido['estado'] = estado
+        pedido['resultado'] = resultado
+        pedido['fim'] = time.time()
+        self.encerrados.append(pedido)
+        del self.encerrados[:-PEDIDOS_ENCERRADOS_NO_STATUS]
+    
+    def _executar_fila(self):
+        while True:
+            pedido = self.fila.proximo(self._parar_servidor)
+            if pedido is None:
+                return
+            if self._posicionar and self.atraso_inicial > 0:
+                self.log(f"⏳ Aguardando {self.atraso_inicial:g} s para você posicionar a janela do Raffinato...")
+                if self._parar_servidor.wait(self.atraso_inicial):
+                    self.fila.adicionar(pedido, topo=True)
+                    return
+            self._posicionar = False
+            self._executar(pedido)
+    
+    def _executar(self, pedido: Dict):
+        prefixo = f"[#{pedido['id']}] "
+        
+        def log(mensagem: str):
+            self.log(prefixo + mensagem)
+        
+        def progresso(valor: int, total: int):
+            pedido['progresso'] = [valor, total]
+        
+        with self._trava:
+            self.atual = pedido
+            pedido['estado'] = 'executando'
+            pedido['inicio'] = time.time()
+        self._parar_atual.clear()
+        pausar = threading.Event()
+        pausar.set()
+        caminho_diario = os.path.join(self.pasta, ARQUIVO_DIARIO)
+        log(f"🚀 '{pedido['nome']}' de {pedido['operador']}: {len(pedido['itens'])} item(ns)")
+        try:
+            catalogo = self.config_manager.carregar_catalogo()
+            engine = AutomationEngine(self.coordenadas, self.configs, self.backend,
+                                      catalogo=catalogo.itens, aliases=catalogo.aliases)
+            historico = None
+            if self.configs.get('registrar_historico', DEFAULTS['registrar_historico']):
+                historico = HistoricoExecucao(os.path.join(self.pasta, ARQUIVO_HISTORICO))
+            resultado = engine.run(pedido['itens'], log, progresso, self._parar_atual, pausar,
+                                   DiarioExecucao(caminho_diario), historico)
+            pedido['falhas'] += [falha['item'] for falha in engine.falhas]
+            if engine.falhas and salvar_falhas(os.path.join(self.pasta, ARQUIVO_FALHAS), engine.falhas):
+                log(f"📄 Falhas salvas em {ARQUIVO_FALHAS}")
+        except Exception as e:
+            log(f"❌ ERRO CRÍTICO: {e}")
+            resultado = "Erro"
+        log(resultado)
+        
+        with self._trava:
+            self.atual = None
+            if resultado.startswith(("✅", "⚠️")):
+                self._encerrar(pedido, 'concluido', resultado)
+                return
+            pendencias = DiarioExecucao.ler_pendencias(caminho_diario)
+            self.fila.pausar()
+            if pendencias and pendencias['itens']:
+                if pendencias['em_andamento']:
+                    log(f"⚠️ '{pendencias['em_andamento']}' estava em processamento e NÃO será repetido; "
+                        "confira no Raffinato.")
+                pedido['itens'] = pendencias['itens']
+                pedido['progresso'] = [0, len(pedido['itens'])]
+                pedido['estado'] = 'na_fila'
+                pedido['resultado'] = resultado
+                self.fila.adicionar(pedido, topo=True)
+            else:
+                self._encerrar(pedido, 'interrompido', resultado)
+        log("⏸️ Fila pausada; confira o Raffinato e envie 'retomar' para continuar.")
+    
+    # -- Ciclo de vida --
+    def iniciar(self) -> int:
+        """Abre o socket e a thread que executa os pedidos; devolve a porta em uso."""
+        self._tcp = _ServidorTCP((HOST_SERVIDOR, self.porta), _ConexaoPedidos)
+        self._tcp.robo = self
+        self.porta = self._tcp.server_address[1]
+        threading.Thread(target=self._tcp.serve_forever, kwargs={'poll_interval': 0.2}, daemon=True).start()
+        self._executor = threading.Thread(target=self._executar_fila, daemon=True)
+        self._executor.start()
+        return self.porta
+    
+    def encerrar(self):
+        """Para de aceitar pedidos, interrompe o pedido em curso e espera o robô soltar o mouse."""
+        self._parar_servidor.set()
+        self._parar_atual.set()
+        self.fila.acordar()
+        if self._tcp:
+            self._tcp.shutdown()
+            self._tcp.server_close()
+        if self._executor:
+            self._executor.join()
+
+def enviar_ao_servidor(mensagem: Dict, porta: int = PORTA_SERVIDOR, timeout: float = 10.0) -> Dict:
+    """Manda uma mensagem ao servidor de pedidos e devolve a resposta (OSError se ele não responde)."""
+    with socket.create_connection((HOST_SERVIDOR, porta), timeout=timeout) as conexao:
+        conexao.sendall((json.dumps(mensagem, ensure_ascii=False) + '\n').encode('utf-8'))
+        with conexao.makefile('rb') as arquivo:
+            linha = arquivo.readline(TAMANHO_MAX_MENSAGEM + 1)
+    if not linha:
+        raise OSError("O servidor fechou a conexão sem responder.")
+    return json.loads(linha.decode('utf-8'))
+
+def linhas_status_fila(status: Dict) -> List[str]:
+    linhas = []
+    atual = status['atual']
+    if atual:
+        feitos, total = atual['progresso']
+        linhas.append(f"▶️ #{atual['id']} '{atual['nome']}' ({atual['operador']}): {feitos}/{total}")
+    else:
+        linhas.append("⏸️ Fila pausada; use 'fila retomar'." if status['pausada'] else "💤 Robô ocioso.")
+    for pedido in status['fila']:
+        previsao = ""
+        if pedido['inicio_previsto']:
+            previsao = f", começa ~{time.strftime('%H:%M', time.localtime(pedido['inicio_previsto']))}"
+        linhas.append(f"   #{pedido['id']} '{pedido['nome']}' ({pedido['operador']}) prioridade "
+                      f"{pedido['prioridade']}: {pedido['total_itens']} item(ns), "
+                      f"~{formatar_duracao(pedido['duracao_estimada'])}{previsao}")
+    for pedido in reversed(status['encerrados'][-5:]):
+        falhas = f", {len(pedido['falhas'])} falha(s)" if pedido['falhas'] else ""
+        linhas.append(f"   ✔ #{pedido['id']} '{pedido['nome']}' ({pedido['operador']}): {pedido['estado']}{falhas}")
+    return linhas
+
+def servidor_cli(args) -> int:
+    """Sobe o servidor de pedidos e fica no ar até Ctrl+C."""
+    config_manager = ConfigManager(args.itens, args.config)
+    try:
+        config_manager.carregar_catalogo()
+        coordenadas, configs = config_manager.carregar_configuracoes()
+    except (ErroCatalogo, ErroConfiguracao) as e:
+        _log_console(f"❌ {e}")
+        return 1
+    if not coordenadas:
+        _log_console("❌ Sem calibração: abra a interface uma vez para calibrar as posições.")
+        return 1
+    with _log_comando(configs, 'servidor') as log:
+        # O servidor grava no mesmo diário do 'executar'
+        if not args.descartar and _diario_inacabado(
+                DiarioExecucao.ler_pendencias(os.path.join(SCRIPT_DIR, ARQUIVO_DIARIO)),
+                "Termine-a com 'executar --retomar' ou suba o servidor com --descartar.", log):
+            return 1
+        servidor = ServidorPedidos(config_manager, args.porta, args.atraso, log)
+        try:
+            porta = servidor.iniciar()
+        except OSError as e:
+            log(f"❌ Não foi possível abrir a porta {args.porta}: {e}")
+            return 1
+        log(f"📡 Servidor de pedidos em {HOST_SERVIDOR}:{porta} (Ctrl+C para sair)")
+        try:
+            while True:
+                time.sleep(0.5)
+        except KeyboardInterrupt:
+            log("🛑 Encerrando o servidor...")
+        finally:
+            servidor.encerrar()
+    return 0
+
+def fila_cli(args) -> int:
+    """Cliente do servidor de pedidos: envia, consulta, cancela, para e retoma."""
+    if args.acao == 'enviar':
+        if not args.alvo:
+            _log_console("❌ Informe o arquivo do pedido.")
+            return 1
+        try:
+            linhas = ler_pedido(args.alvo)
+        except (OSError, ValueError) as e:
+            _log_console(f"❌ Não foi possível ler o pedido: {e}")
+            return 1
+        mensagem = {
+            'acao': 'enviar',
+            'linhas': linhas,
+            'nome': args.nome or os.path.basename(args.alvo),
+            'operador': args.operador,
+            'prioridade': args.prioridade
+        }
+    elif args.acao == 'cancelar':
+        if not args.alvo or not args.alvo.isdigit():
+            _log_console("❌ Informe o número do pedido a cancelar.")
+            return 1
+        mensagem = {'acao': 'cancelar', 'id': int(args.alvo)}
+    else:
+        mensagem = {'acao': args.acao}
+    
+    try:
+        resposta = enviar_ao_servidor(mensagem, args.porta)
+    except (OSError, ValueError) as e:
+        _log_console(f"❌ Servidor de pedidos indisponível na porta {args.porta}: {e}")
+        return 1
+    if not resposta.get('ok'):
+        for erro in resposta.get('erros') or [resposta.get('erro', "Erro desconhecido")]:
+            _log_console(f"❌ {erro}")
+        return 1
+    
+    if args.acao == 'enviar':
+        _log_console(f"📥 Pedido #{resposta['id']} na fila (posição {resposta['posicao']}, "
+                     f"~{formatar_duracao(resposta['duracao_estimada'])} de execução).")
+    elif args.acao == 'status':
+        for linha in linhas_status_fila(resposta):
+            print(linha)
+    else:
+        _log_console(f"✅ '{args.acao}' aceito.")
+    return 0
+
+def _ler_telas(especificacoes: List[str], caminho_itens: str) -> List[Dict]:
+    """Interpreta '--tela DISPLAY=CONFIG': cada tela com a calibração do seu arquivo."""
+    telas = []
+    for posicao, especificacao in enumerate(especificacoes, start=1):
+        display, separador, caminho = especificacao.rpartition('=')
+        if not separador or not caminho:
+            raise ErroConfiguracao(f"--tela '{especificacao}': use DISPLAY=ARQUIVO_DE_CALIBRACAO")
+        coordenadas, configs = ConfigManager(caminho_itens, _caminho_local(caminho)).carregar_configuracoes()
+        if not coordenadas:
+            raise ErroConfiguracao(f"--tela '{especificacao}': {caminho} não tem calibração")
+        telas.append({'nome': f"tela{posicao}", 'display': display or None,
+                      'coordenadas': coordenadas, 'configs': configs})
+    return telas
+
+def paralelo_cli(args) -> int:
+    """Executa um pedido repartido entre várias telas (uma sessão do Raffinato em cada)."""
+    config_manager = ConfigManager(args.itens, args.config)
+    try:
+        catalogo = config_manager.carregar_catalogo()
+        _, configs = config_manager.carregar_configuracoes()
+        telas = _ler_telas(args.tela, args.itens)
+    except (ErroCatalogo, ErroConfiguracao) as e:
+        _log_console(f"❌ {e}")
+        return 1
+    with _log_comando(configs, 'paralelo') as log:
+        coordenador = CoordenadorTelas(telas, catalogo.itens, catalogo.aliases)
+        if args.retomar:
+            pendencias = mesclar_diarios(coordenador.diarios())
+            if not pendencias:
+                log("Nenhuma execução pendente para retomar.")
+                return 0
+            for item in pendencias['em_andamento']:
+                log(f"⚠️ '{item}' estava em processamento e NÃO será repetido; confira no Raffinato.")
+            itens = pendencias['itens']
+        else:
+            if not args.descartar and _diario_inacabado(
+                    mesclar_diarios(coordenador.diarios()),
+                    "Use --retomar para continuar de onde parou ou --descartar para rodar este pedido mesmo assim.",
+                    log):
+                return 1
+            itens = _ler_pedido_validado(args.pedido, catalogo, log)
+            if itens is None:
+                return 1
+        if not itens:
+            log("⚠️ Nenhum item com quantidade no pedido.")
+            return 0
+        log(f"📋 {len(itens)} item(ns) em {len(telas)} tela(s).")
+        
+        parar = threading.Event()
+        resultado = {}
+        
+        def executar():
+            # A espera fica na thread: Ctrl+C na principal aciona `parar` e a encerra na hora
+            if args.atraso > 0:
+                log(f"⏳ Aguardando {args.atraso:g} s para você posicionar as janelas do Raffinato...")
+                if parar.wait(args.atraso):
+                    resultado['status'] = "Interrompido"
+                    return
+            resultado['status'] = coordenador.run(
+                itens, log, lambda valor, total: _log_console(f"   {valor}/{total}"), parar
+            )
+        
+        _rodar_ate_o_fim(executar, parar, log)
+        if coordenador.falhas:
+            caminho_falhas = os.path.join(SCRIPT_DIR, ARQUIVO_FALHAS)
+            if salvar_falhas(caminho_falhas, coordenador.falhas):
+                log(f"📄 Falhas salvas em {caminho_falhas}")
+        status = resultado.get('status', "Erro")
+        log(status)
+        return 0 if status.startswith("✅") else 2
+
+def _criar_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Robô de Saídas - automação do Raffinato")
+    subparsers = parser.add_subparsers(dest='comando')
+    
+    bench = subparsers.add_parser('benchmark', help="Mede a vazão contra o Raffinato simulado")
+    bench.add_argument('--itens', default=caminho_catalogo_padrao())
+    bench.add_argument('--config', default=os.path.join(SCRIPT_DIR, ARQUIVO_COORDENADAS))
+    bench.add_argument('--limite', type=int, default=None, help="Processa só os N primeiros itens")
+    bench.add_argument('--latencia-pesquisa', type=float, default=0.3)
+    bench.add_argument('--latencia-confirmacao', type=float, default=0.1)
+    
+    executar = subparsers.add_parser('executar', help="Roda um pedido (CSV ou JSON) sem abrir a interface")
+    executar.add_argument('pedido', nargs='?', help="Arquivo item;quantidade (CSV) ou {item: quantidade} (JSON)")
+    executar.add_argument('--itens', default=caminho_catalogo_padrao())
+    executar.add_argument('--config', default=os.path.join(SCRIPT_DIR, ARQUIVO_COORDENADAS))
+    executar.add_argument('--atraso', type=float, default=5.0, help="Segundos antes de começar")
+    executar.add_argument('--validar', action='store_true', help="Só valida o pedido, sem executar")
+    executar.add_argument('--simular', action='store_true',
+                          help="Estima a duração simulando a execução, sem mexer no mouse")
+    executar.add_argument('--retomar', action='store_true', help="Retoma os itens pendentes do diário")
+    executar.add_argument('--descartar', action='store_true',
+                          help="Roda o pedido mesmo com uma execução inacabada no diário (ela é esquecida)")
+    
+    historico = subparsers.add_parser('historico', help="Mostra o tempo economizado pelas esperas aprendidas")
+    historico.add_argument('--itens', default=caminho_catalogo_padrao())
+    historico.add_argument('--config', default=os.path.join(SCRIPT_DIR, ARQUIVO_COORDENADAS))
+    historico.add_argument('--banco', default=os.path.join(SCRIPT_DIR, ARQUIVO_HISTORICO))
+    historico.add_argument('--limite', type=int, default=10, help="Quantas execuções recentes mostrar")
+    
+    paralelo = subparsers.add_parser('paralelo', help="Reparte um pedido entre várias telas do Raffinato")
+    paralelo.add_argument('pedido', nargs='?', help="Arquivo item;quantidade (CSV) ou {item: quantidade} (JSON)")
+    paralelo.add_argument('--tela', action='append', required=True, metavar='DISPLAY=CONFIG',
+                          help="Uma por sessão, ex.: --tela :1=coordenadas_t1.json (DISPLAY vazio = o atual)")
+    paralelo.add_argument('--itens', default=caminho_catalogo_padrao())
+    paralelo.add_argument('--config', default=os.path.join(SCRIPT_DIR, ARQUIVO_COORDENADAS))
+    paralelo.add_argument('--atraso', type=float, default=5.0, help="Segundos antes de começar")
+    paralelo.add_argument('--retomar', action='store_true', help="Retoma as pendências dos diários das telas")
+    paralelo.add_argument('--descartar', action='store_true',
+                          help="Roda o pedido mesmo com execuções inacabadas nos diários (elas são esquecidas)")
+    
+    servidor = subparsers.add_parser('servidor', help="Recebe pedidos de vários operadores e os executa em fila")
+    servidor.add_argument('--itens', default=caminho_catalogo_padrao())
+    servidor.add_argument('--config', default=os.path.join(SCRIPT_DIR, ARQUIVO_COORDENADAS))
+    servidor.add_argument('--porta', type=int, default=PORTA_SERVIDOR)
+    servidor.add_argument('--atraso', type=float, default=5.0, help="Segundos antes do primeiro pedido")
+    servidor.add_argument('--descartar', action='store_true',
+                          help="Sobe mesmo com uma execução inacabada no diário (ela é esquecida)")
+    
+    fila = subparsers.add_parser('fila', help="Envia pedidos ao servidor e consulta a fila")
+    fila.add_argument('acao', choices=['enviar', 'status', 'cancelar', 'parar', 'retomar'])
+    fila.add_argument('alvo', nargs='?', help="Arquivo do pedido (enviar) ou número do pedido (cancelar)")
+    fila.add_argument('--prioridade', type=int, default=0, help="Maior roda antes")
+    fila.add_argument('--nome', default=None, help="Nome do pedido (padrão: nome do arquivo)")
+    fila.add_argument('--operador', default=getpass.getuser())
+    fila.add_argument('--porta', type=int, default=PORTA_SERVIDOR)
+    return parser
+
+def main(argv: Optional[List[str]] = None):
+    """Função principal da aplicação."""
+    args = _criar_parser().parse_args(argv)
+    
+    if args.comando == 'benchmark':
+        try:
+            resultado = executar_benchmark(
+                ConfigManager(args.itens, args.config),
+                limite=args.limite,
+                latencia_pesquisa=args.latencia_pesquisa,
+                latencia_confirmacao=args.latencia_confirmacao
+            )
+        except (ErroCatalogo, ErroConfiguracao) as e:
+            print(f"❌ {e}")
+            sys.exit(1)
+        _imprimir_benchmark(resultado)
+        return
+    if args.comando == 'executar':
+        sys.exit(executar_pedido_cli(args))
+    if args.comando == 'paralelo':
+        sys.exit(paralelo_cli(args))
+    if args.comando == 'servidor':
+        sys.exit(servidor_cli(args))
+    if args.comando == 'fila':
+        sys.exit(fila_cli(args))
+    if args.comando == 'historico':
+        try:
+            relatorio = relatorio_historico(ConfigManager(args.itens, args.config), args.banco, args.limite)
+        except ErroConfiguracao as e:
+            print(f"❌ {e}")
+            sys.exit(1)
+        if relatorio is None:
+            print(f"Nenhum histórico em {args.banco}.")
+            return
+        _imprimir_relatorio_historico(relatorio)
+        return
+    
+    # A interface só é importada aqui: os comandos de linha não carregam Tk nem ttkbootstrap
+    from robo_gui import executar_gui
+    executar_gui()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,1027 @@
+# --------------------------------------------------------------------------- #
+#                    ROBÔ DE SAÍDA  v3.0 PRO  -  INTERFACE                     #
+#                          By-Rubemxz | Enhanced                              #
+# --------------------------------------------------------------------------- #
+
+import tkinter as tk
+from tkinter import messagebox, scrolledtext
+from tkinter import ttk
+from ttkbootstrap import Style
+import time
+import os
+import threading
+import queue
+from typing import Dict, List, Tuple, Optional
+
+from robo import (
+    ARQUIVO_ANCORA,
+    ARQUIVO_COORDENADAS,
+    ARQUIVO_DIARIO,
+    ARQUIVO_FALHAS,
+    ARQUIVO_HISTORICO,
+    COORDENADAS_SIMULADAS,
+    DEFAULTS,
+    SCRIPT_DIR,
+    AutomationEngine,
+    ConfigManager,
+    DiarioExecucao,
+    ErroCatalogo,
+    ErroConfiguracao,
+    FilaExecucao,
+    HistoricoExecucao,
+    IndiceBusca,
+    LogArquivo,
+    PyAutoGUIBackend,
+    assinatura_catalogo,
+    buscar_log,
+    caminho_catalogo_padrao,
+    estimar_execucao,
+    formatar_duracao,
+    linhas_estimativa,
+    salvar_falhas,
+    validar_expressoes
+)
+
+# --- INTERFACE ---
+ATRASO_FILTRO_MS = 150
+INTERVALO_EVENTOS_MS = 100
+INTERVALO_CATALOGO_MS = 2000
+LIMITE_BUSCA_LOG = 500
+# Ícone e estilo dos botões de categoria; as demais usam o padrão
+ESTILOS_CATEGORIA = {
+    'COZINHA': ("🍳", "info"),
+    'CARNES': ("🥩", "danger"),
+}
+ESTILO_CATEGORIA_PADRAO = ("📦", "secondary")
+
+# --- COMUNICAÇÃO COM A INTERFACE ---
+class CanalEventos:
+    """Fila de eventos da thread de automação para a thread do Tk.
+    
+    Qualquer thread publica sem bloquear; a interface drena a fila em lotes
+    pelo `root.after`, juntando as linhas de log e usando só o último progresso.
+    """
+    
+    def __init__(self):
+        self._fila: queue.SimpleQueue = queue.SimpleQueue()
+    
+    def log(self, mensagem: str):
+        self._fila.put(('log', f"[{time.strftime('%H:%M:%S')}] {mensagem}\n"))
+    
+    def progresso(self, valor: int, total: int):
+        self._fila.put(('progresso', (valor, total)))
+    
+    def chamar(self, funcao, *args):
+        """Agenda uma chamada (messagebox, estado de botões...) na thread do Tk."""
+        self._fila.put(('chamar', (funcao, args)))
+    
+    def drenar(self, limite: int = 1000) -> List[Tuple[str, object]]:
+        eventos = []
+        while len(eventos) < limite:
+            try:
+                eventos.append(self._fila.get_nowait())
+            except queue.Empty:
+                break
+        return eventos
+
+class RaffinatoGUI:
+    """Interface gráfica principal."""
+    
+    def __init__(self, root: tk.Tk):
+        self.root = root
+        self._configurar_janela()
+        self._inicializar_managers_e_eventos()
+        self._construir_interface()
+        self._atualizar_estado_botoes("ocioso")
+        self.root.after(INTERVALO_EVENTOS_MS, self._processar_eventos)
+        self.root.after(300, self._oferecer_retomada)
+        self.root.after(INTERVALO_CATALOGO_MS, self._vigiar_catalogo)
+        self.root.protocol("WM_DELETE_WINDOW", self._fechar)
+    
+    def _configurar_janela(self):
+        self.root.title("🚀 Robô de Saídas v3.0 PRO - By-Rubemxz")
+        self.root.geometry("1100x800")
+        self.root.minsize(1000, 700)
+    
+    def _inicializar_managers_e_eventos(self):
+        self.config_manager = ConfigManager(
+            caminho_catalogo_padrao(),
+            os.path.join(SCRIPT_DIR, ARQUIVO_COORDENADAS)
+        )
+        try:
+            self.coordenadas, self.configs = self.config_manager.carregar_configuracoes()
+        except ErroConfiguracao as e:
+            # Seguir com os padrões faria a próxima calibração apagar o arquivo do usuário
+            messagebox.showerror("❌ Configuração Inválida", f"{e}\n\nCorrija o arquivo e abra o robô novamente.")
+            raise SystemExit(1)
+        caminho_log = self.configs.get('arquivo_log', DEFAULTS['arquivo_log'])
+        self.caminho_log = caminho_log if os.path.isabs(caminho_log) else os.path.join(SCRIPT_DIR, caminho_log)
+        self.log_arquivo = LogArquivo(
+            self.caminho_log,
+            float(self.configs.get('tamanho_max_log_mb', DEFAULTS['tamanho_max_log_mb'])),
+            int(self.configs.get('copias_log', DEFAULTS['copias_log'])),
+            origem='gui'
+        )
+        self.linhas_log_tela = int(self.configs.get('linhas_log_tela', DEFAULTS['linhas_log_tela']))
+        self.caminho_diario = os.path.join(SCRIPT_DIR, ARQUIVO_DIARIO)
+        self.quantidades: Dict[str, Dict[str, str]] = {}
+        self.listas: Dict[str, Dict] = {}
+        self.assinatura_com_erro: Optional[List[List]] = None
+        self.editor_quantidade: Optional[ttk.Entry] = None
+        self.edicao_atual: Optional[Tuple[Dict, str]] = None
+        self.filtro_agendado: Optional[str] = None
+        self.canal = CanalEventos()
+        self.stop_event = threading.Event()
+        self.pause_event = threading.Event()
+        self.pause_event.set()
+        self.categoria_selecionada = tk.StringVar()
+        self.itens_por_categoria: Dict[str, List[str]] = {}
+        self.unidades: Dict[str, str] = {}
+        self.aliases: Dict[str, str] = {}
+        self.estado = "ocioso"
+        self.fila_todas_categorias = tk.BooleanVar(value=False)
+        self.ordem_categorias = tk.StringVar()
+        self.fila_atual: Optional[FilaExecucao] = None
+        self.estimativa: Optional[Dict] = None
+        self.inicio_itens: Optional[float] = None
+    
+    def _construir_interface(self):
+        self.main_frame = ttk.Frame(self.root, padding="15")
+        self.main_frame.pack(fill="both", expand=True)
+        
+        self._criar_header()
+        self._criar_seletor_categoria()
+        self._criar_barra_pesquisa()
+        self._criar_lista_itens()
+        self._criar_area_log()
+        self._criar_area_progresso()
+        self._criar_botoes_controle()
+    
+    def _criar_header(self):
+        header_frame = ttk.Frame(self.main_frame)
+        header_frame.pack(fill="x", pady=(0, 15))
+        
+        titulo = ttk.Label(
+            header_frame,
+            text="🚀 Robô de Saídas v3.0 PRO",
+            font=("Segoe UI", 22, "bold"),
+            bootstyle="primary"
+        )
+        titulo.pack()
+        
+        subtitulo = ttk.Label(
+            header_frame,
+            text="Sistema Inteligente de Automação de Saídas",
+            font=("Segoe UI", 10),
+            bootstyle="secondary"
+        )
+        subtitulo.pack()
+    
+    def _criar_seletor_categoria(self):
+        cat_frame = ttk.Labelframe(
+            self.main_frame,
+            text=" 📂 Selecione a Categoria ",
+            padding="15",
+            bootstyle="info"
+        )
+        cat_frame.pack(fill="x", pady=(0, 10))
+        
+        self.frame_botoes_categoria = ttk.Frame(cat_frame)
+        self.frame_botoes_categoria.pack()
+        
+        fila_frame = ttk.Frame(cat_frame)
+        fila_frame.pack(fill="x", pady=(10, 0))
+        
+        ttk.Checkbutton(
+            fila_frame,
+            text="📚 Executar todas as categorias em uma fila",
+            variable=self.fila_todas_categorias,
+            bootstyle="info-round-toggle"
+        ).pack(side="left")
+        
+        ttk.Entry(fila_frame, textvariable=self.ordem_categorias, width=40).pack(side="right")
+        ttk.Label(fila_frame, text="Ordem da fila:").pack(side="right", padx=(0, 8))
+    
+    def _criar_barra_pesquisa(self):
+        frame_pesquisa = ttk.Frame(self.main_frame)
+        frame_pesquisa.pack(fill="x", pady=(0, 10))
+        
+        ttk.Label(
+            frame_pesquisa,
+            text="🔍 Pesquisar Item:",
+            font=("Segoe UI", 11, "bold")
+        ).pack(side="left", padx=(0, 10))
+        
+        self.search_var = tk.StringVar()
+        self.search_var.trace_add("write", self._filtrar_itens)
+        search_entry = ttk.Entry(frame_pesquisa, textvariable=self.search_var, font=("Segoe UI", 10))
+        search_entry.pack(side="left", fill="x", expand=True)
+    
+    def _criar_lista_itens(self):
+        self.container_itens = ttk.Labelframe(
+            self.main_frame,
+            text=" 📋 Itens para Saída ",
+            padding="10",
+            bootstyle="primary"
+        )
+        self.container_itens.pack(fill="both", expand=True, pady=(0, 10))
+        
+        self.aviso_lista_vazia = ttk.Label(
+            self.container_itens,
+            bootstyle="warning",
+            font=("Segoe UI", 11)
+        )
+        
+        self._carregar_itens_na_interface()
+    
+    def _criar_botoes_categoria(self):
+        """Um botão por categoria do catálogo (recriados quando o catálogo muda)."""
+        for botao in self.frame_botoes_categoria.winfo_children():
+            botao.destroy()
+        for categoria in self.itens_por_categoria:
+            icone, estilo = ESTILOS_CATEGORIA.get(categoria, ESTILO_CATEGORIA_PADRAO)
+            ttk.Radiobutton(
+                self.frame_botoes_categoria,
+                text=f"{icone} {categoria}",
+                variable=self.categoria_selecionada,
+                value=categoria,
+                command=self._trocar_categoria,
+                bootstyle=f"{estilo}-toolbutton",
+                width=20
+            ).pack(side="left", padx=5)
+    
+    def _carregar_itens_na_interface(self, recriar_listas: bool = False) -> bool:
+        """Lê o catálogo e monta botões e listas; mantém as quantidades já digitadas.
+        
+        Com catálogo inválido as listas atuais continuam na tela e a versão com
+        erro é lembrada, para o aviso não se repetir até o arquivo mudar de novo.
+        """
+        assinatura = assinatura_catalogo(self.config_manager.caminho_itens)
+        try:
+            catalogo = self.config_manager.carregar_catalogo()
+        except ErroCatalogo as e:
+            self.assinatura_com_erro = assinatura
+            for erro in e.erros:
+                self._adicionar_log(f"❌ Catálogo: {erro}")
+            messagebox.showerror(
+                "❌ Catálogo Inválido",
+                f"{len(e.erros)} problema(s) no catálogo:\n\n" + "\n".join(e.erros[:10])
+                + "\n\nCorrija os arquivos; o robô recarrega sozinho ao salvar."
+            )
+            if not self.itens_por_categoria:
+                self._atualizar_lista_categoria()
+            return False
+        
+        self.assinatura_com_erro = None
+        if recriar_listas:
+            self._confirmar_edicao()
+            for lista in self.listas.values():
+                lista['frame'].destroy()
+            self.listas = {}
+        self.itens_por_categoria = catalogo.categorias
+        self.unidades = {item: dados['unidade'] for item, dados in catalogo.metadados.items() if 'unidade' in dados}
+        self.aliases = catalogo.aliases
+        self.quantidades = {
+            categoria: {item: self.quantidades.get(categoria, {}).get(item, "0") for item in itens}
+            for categoria, itens in self.itens_por_categoria.items()
+        }
+        if not self.ordem_categorias.get().strip():
+            self.ordem_categorias.set(", ".join(self.itens_por_categoria))
+        if self.categoria_selecionada.get() not in self.itens_por_categoria:
+            self.categoria_selecionada.set(next(iter(self.itens_por_categoria), ""))
+        self._criar_botoes_categoria()
+        self._atualizar_lista_categoria()
+        return True
+    
+    def _vigiar_catalogo(self):
+        """Recarrega o catálogo quando algum arquivo muda (fora de uma execução)."""
+        try:
+            if (self.estado == "ocioso" and self.config_manager.catalogo_mudou()
+                    and assinatura_catalogo(self.config_manager.caminho_itens) != self.assinatura_com_erro):
+                if self._carregar_itens_na_interface(recriar_listas=True):
+                    total = sum(len(itens) for itens in self.itens_por_categoria.values())
+                    self._adicionar_log(f"🔄 Catálogo recarregado: {total} item(ns) em "
+                                        f"{len(self.itens_por_categoria)} categoria(s).")
+                    self._aplicar_filtro()
+        finally:
+            self.root.after(INTERVALO_CATALOGO_MS, self._vigiar_catalogo)
+    
+    def _criar_lista_categoria(self, categoria: str) -> Dict:
+        """Cria a Treeview de uma categoria; só as linhas visíveis são desenhadas pelo Tk."""
+        frame = ttk.Frame(self.container_itens)
+        arvore = ttk.Treeview(
+            frame,
+            columns=("item", "unidade", "quantidade"),
+            show="headings",
+            selectmode="browse",
+            bootstyle="primary"
+        )
+        arvore.heading("item", text="ITEM", anchor="w")
+        arvore.heading("unidade", text="UN", anchor="center")
+        if categoria == "CARNES":
+            arvore.heading("quantidade", text="QUANTIDADE (use + para somar, ex: 25.5+12.6)", anchor="w")
+        else:
+            arvore.heading("quantidade", text="QUANTIDADE", anchor="w")
+        arvore.column("item", width=500, anchor="w")
+        arvore.column("unidade", width=60, anchor="center")
+        arvore.column("quantidade", width=300, anchor="w")
+        arvore.tag_configure("preenchido", font=("Segoe UI", 10, "bold"))
+        
+        scrollbar = ttk.Scrollbar(frame, orient="vertical", command=arvore.yview)
+        arvore.configure(yscrollcommand=scrollbar.set)
+        arvore.pack(side="left", fill="both", expand=True)
+        scrollbar.pack(side="right", fill="y")
+        
+        iids = []
+        itens_por_iid = {}
+        quantidades = self.quantidades[categoria]
+        for idx, item in enumerate(self.itens_por_categoria.get(categoria, [])):
+            iid = f"L{idx}"
+            valor = quantidades[item]
+            arvore.insert("", "end", iid=iid, values=(item, self.unidades.get(item, ""), valor),
+                          tags=("preenchido",) if valor != "0" else ())
+            iids.append(iid)
+            itens_por_iid[iid] = item
+        
+        arvore.bind("<Double-1>", self._editar_quantidade)
+        arvore.bind("<Return>", self._editar_quantidade)
+        arvore.bind("<KeyPress>", self._tecla_na_lista)
+        arvore.bind("<MouseWheel>", lambda e: self._confirmar_edicao())
+        
+        return {
+            'frame': frame,
+            'arvore': arvore,
+            'iids': iids,
+            'itens': itens_por_iid,
+            'categoria': categoria,
+            'indice': IndiceBusca(self.itens_por_categoria.get(categoria, [])),
+            'visiveis': set(iids)
+        }
+    
+    def _lista_atual(self) -> Optional[Dict]:
+        return self.listas.get(self.categoria_selecionada.get())
+    
+    def _atualizar_lista_categoria(self):
+        self._confirmar_edicao()
+        for lista in self.listas.values():
+            lista['frame'].pack_forget()
+        self.aviso_lista_vazia.pack_forget()
+        
+        categoria = self.categoria_selecionada.get()
+        if not self.itens_por_categoria.get(categoria):
+            self.aviso_lista_vazia.config(text=f"Nenhum item encontrado na categoria {categoria}")
+            self.aviso_lista_vazia.pack(pady=20)
+            return
+        
+        # Cada categoria mantém sua lista; trocar de categoria só troca o frame exibido
+        if categoria not in self.listas:
+            self.listas[categoria] = self._criar_lista_categoria(categoria)
+        self.listas[categoria]['frame'].pack(fill="both", expand=True)
+    
+    def _tecla_na_lista(self, event):
+        """Começa a editar a quantidade ao digitar um número sobre a linha selecionada."""
+        if event.char and event.char in "0123456789,.":
+            self._editar_quantidade(texto_inicial=event.char)
+            return "break"
+    
+    def _editar_quantidade(self, event=None, texto_inicial: Optional[str] = None):
+        """Abre um campo de edição sobre a célula de quantidade da linha em foco."""
+        self._confirmar_edicao()
+        lista = self._lista_atual()
+        if not lista:
+            return
+        arvore = lista['arvore']
+        iid = arvore.identify_row(event.y) if event is not None and event.type == tk.EventType.ButtonPress else arvore.focus()
+        if not iid:
+            return
+        arvore.focus(iid)
+        arvore.selection_set(iid)
+        arvore.see(iid)
+        arvore.update_idletasks()
+        caixa = arvore.bbox(iid, "quantidade")
+        if not caixa:
+            return
+        
+        x, y, largura, altura = caixa
+        editor = ttk.Entry(arvore, font=("Segoe UI", 10))
+        editor.place(x=x, y=y, width=largura, height=altura)
+        if texto_inicial is None:
+            editor.insert(0, arvore.set(iid, "quantidade"))
+            editor.select_range(0, tk.END)
+        else:
+            editor.insert(0, texto_inicial)
+        editor.focus_set()
+        
+        editor.bind("<Return>", lambda e: self._confirmar_edicao(avancar=True))
+        editor.bind("<Tab>", lambda e: self._confirmar_edicao(avancar=True) or "break")
+        editor.bind("<Escape>", lambda e: self._cancelar_edicao())
+        editor.bind("<FocusOut>", lambda e: self._confirmar_edicao())
+        self.editor_quantidade = editor
+        self.edicao_atual = (lista, iid)
+    
+    def _cancelar_edicao(self):
+        if self.editor_quantidade is not None:
+            editor, self.editor_quantidade = self.editor_quantidade, None
+            lista, _ = self.edicao_atual
+            editor.destroy()
+            lista['arvore'].focus_set()
+    
+    def _confirmar_edicao(self, avancar: bool = False):
+        """Grava o valor editado no modelo da categoria e, opcionalmente, desce uma linha."""
+        if self.editor_quantidade is None:
+            return
+        editor, self.editor_quantidade = self.editor_quantidade, None
+        lista, iid = self.edicao_atual
+        valor = editor.get().strip() or "0"
+        editor.destroy()
+        
+        self._definir_quantidade(lista, iid, valor)
+        arvore = lista['arvore']
+        arvore.focus_set()
+        if avancar:
+            proximo = arvore.next(iid)
+            if proximo:
+                arvore.focus(proximo)
+                arvore.selection_set(proximo)
+                arvore.see(proximo)
+    
+    def _definir_quantidade(self, lista: Dict, iid: str, valor: str):
+        self.quantidades[lista['categoria']][lista['itens'][iid]] = valor
+        lista['arvore'].set(iid, "quantidade", valor)
+        lista['arvore'].item(iid, tags=("preenchido",) if valor != "0" else ())
+    
+    def _trocar_categoria(self):
+        self._atualizar_lista_categoria()
+        self.search_var.set("")
+    
+    def _filtrar_itens(self, *args):
+        """Agenda o filtro para depois de uma pausa na digitação."""
+        if self.filtro_agendado is not None:
+            self.root.after_cancel(self.filtro_agendado)
+        self.filtro_agendado = self.root.after(ATRASO_FILTRO_MS, self._aplicar_filtro)
+    
+    def _aplicar_filtro(self):
+        """Mostra só os itens que combinam, mexendo apenas nas linhas que mudaram."""
+        self.filtro_agendado = None
+        lista = self._lista_atual()
+        if not lista:
+            return
+        self._confirmar_edicao()
+        
+        novos_visiveis = [lista['iids'][i] for i in lista['indice'].buscar(self.search_var.get())]
+        conjunto_novo = set(novos_visiveis)
+        arvore = lista['arvore']
+        
+        ocultar = lista['visiveis'] - conjunto_novo
+        if ocultar:
+            arvore.detach(*ocultar)
+        # Reinserir em ordem crescente mantém as posições corretas em relação às linhas que ficaram
+        for posicao, iid in enumerate(novos_visiveis):
+            if iid not in lista['visiveis']:
+                arvore.move(iid, "", posicao)
+        lista['visiveis'] = conjunto_novo
+    
+    def _criar_area_log(self):
+        log_frame = ttk.Labelframe(
+            self.main_frame,
+            text=" 📄 Log de Execução ",
+            padding="10",
+            bootstyle="secondary"
+        )
+        log_frame.pack(fill="x", pady=(0, 10))
+        
+        busca_frame = ttk.Frame(log_frame)
+        busca_frame.pack(fill="x", pady=(0, 5))
+        self.busca_log = tk.StringVar()
+        entrada = ttk.Entry(busca_frame, textvariable=self.busca_log, font=("Segoe UI", 9))
+        entrada.pack(side="left", fill="x", expand=True)
+        entrada.bind("<Return>", lambda e: self._buscar_no_log())
+        ttk.Button(
+            busca_frame,
+            text="🔎 Buscar no histórico do log",
+            command=self._buscar_no_log,
+            bootstyle="secondary-outline"
+        ).pack(side="left", padx=(8, 0))
+        
+        self.log_text = scrolledtext.ScrolledText(
+            log_frame,
+            height=8,
+            font=("Consolas", 9),
+            wrap=tk.WORD
+        )
+        self.log_text.pack(fill="both", expand=True)
+    
+    def _criar_area_progresso(self):
+        prog_frame = ttk.Frame(self.main_frame)
+        prog_frame.pack(fill="x", pady=(0, 10))
+        
+        self.rotulo_progresso = ttk.Label(prog_frame, text="", font=("Segoe UI", 9), width=64, anchor="e")
+        self.rotulo_progresso.pack(side="right", padx=(10, 0))
+        
+        self.progressbar = ttk.Progressbar(prog_frame, mode='determinate', bootstyle="success-striped")
+        self.progressbar.pack(side="left", fill="x", expand=True)
+    
+    def _criar_botoes_controle(self):
+        botoes_frame = ttk.Frame(self.main_frame)
+        botoes_frame.pack(fill="x")
+        
+        self.btn_iniciar = ttk.Button(
+            botoes_frame,
+            text="▶ INICIAR AUTOMAÇÃO",
+            command=self._iniciar_automacao,
+            bootstyle="success",
+            width=25
+        )
+        self.btn_iniciar.grid(row=0, column=0, padx=5, sticky="ew")
+        
+        self.btn_pausar = ttk.Button(
+            botoes_frame,
+            text="⏸ PAUSAR",
+            command=self._pausar_retomar_automacao,
+            bootstyle="warning",
+            width=20
+        )
+        self.btn_pausar.grid(row=0, column=1, padx=5, sticky="ew")
+        
+        self.btn_parar = ttk.Button(
+            botoes_frame,
+            text="⏹ PARAR",
+            command=self._parar_automacao,
+            bootstyle="danger",
+            width=20
+        )
+        self.btn_parar.grid(row=0, column=2, padx=5, sticky="ew")
+        
+        self.btn_limpar = ttk.Button(
+            botoes_frame,
+            text="🧹 LIMPAR CAMPOS",
+            command=self._limpar_campos,
+            bootstyle="secondary",
+            width=20
+        )
+        self.btn_limpar.grid(row=0, column=3, padx=5, sticky="ew")
+        
+        self.btn_simular = ttk.Button(
+            botoes_frame,
+            text="⏱ SIMULAR",
+            command=self._simular_execucao,
+            bootstyle="info",
+            width=20
+        )
+        self.btn_simular.grid(row=0, column=4, padx=5, sticky="ew")
+        
+        for i in range(5):
+            botoes_frame.columnconfigure(i, weight=1)
+    
+    def _adicionar_log(self, mensagem: str):
+        """Publica uma linha de log; seguro para chamar de qualquer thread."""
+        self.canal.log(mensagem)
+        self.log_arquivo.registrar(mensagem)
+    
+    def _aparar_log(self):
+        """Mantém só as últimas linhas na tela, cortando em lotes de 10% para não apagar a cada linha."""
+        linhas = int(self.log_text.index("end-1c").split(".")[0])
+        if linhas > self.linhas_log_tela * 1.1:
+            self.log_text.delete("1.0", f"{linhas - self.linhas_log_tela + 1}.0")
+    
+    def _buscar_no_log(self):
+        """Procura no arquivo de log (numa thread) e mostra o resultado numa janela."""
+        termo = self.busca_log.get()
+        
+        def buscar():
+            try:
+                registros = buscar_log(self.caminho_log, termo, LIMITE_BUSCA_LOG)
+            except OSError as e:
+                self.canal.chamar(messagebox.showerror, "❌ Erro", f"Não foi possível ler o log:\n\n{e}")
+                return
+            self.canal.chamar(self._mostrar_busca_log, termo, registros)
+        
+        threading.Thread(target=buscar, daemon=True).start()
+    
+    def _mostrar_busca_log(self, termo: str, registros: List[Dict]):
+        janela = tk.Toplevel(self.root)
+        titulo = f"'{termo}'" if termo.strip() else "últimos registros"
+        janela.title(f"🔎 Log: {titulo} ({len(registros)})")
+        janela.geometry("900x500")
+        
+        arvore = ttk.Treeview(janela, columns=("ts", "origem", "mensagem"), show="headings")
+        arvore.heading("ts", text="DATA/HORA", anchor="w")
+        arvore.heading("origem", text="ORIGEM", anchor="w")
+        arvore.heading("mensagem", text="MENSAGEM", anchor="w")
+        arvore.column("ts", width=150, stretch=False)
+        arvore.column("origem", width=60, stretch=False)
+        arvore.column("mensagem", width=660)
+        arvore.tag_configure("ERROR", foreground="#e74c3c")
+        arvore.tag_configure("WARNING", foreground="#f39c12")
+        scrollbar = ttk.Scrollbar(janela, orient="vertical", command=arvore.yview)
+        arvore.configure(yscrollcommand=scrollbar.set)
+        arvore.pack(side="left", fill="both", expand=True)
+        scrollbar.pack(side="right", fill="y")
+        
+        for registro in registros:
+            arvore.insert("", "end", values=(registro.get('ts', ''), registro.get('origem', ''),
+                                             registro.get('mensagem', '')),
+                          tags=(registro.get('nivel', ''),))
+        if len(registros) >= LIMITE_BUSCA_LOG:
+            self._adicionar_log(f"🔎 Busca no log limitada aos {LIMITE_BUSCA_LOG} registros mais recentes.")
+    
+    def _fechar(self):
+        self.stop_event.set()
+        self.pause_event.set()
+        self.log_arquivo.fechar()
+        self.root.destroy()
+    
+    def _atualizar_progresso(self, valor, total):
+        """Publica o progresso; seguro para chamar de qualquer thread."""
+        self.canal.progresso(valor, total)
+    
+    def _processar_eventos(self):
+        """Aplica na interface, em lote, os eventos publicados desde a última rodada."""
+        linhas: List[str] = []
+        progresso = None
+        
+        def aplicar_pendentes():
+            nonlocal progresso
+            if linhas:
+                self.log_text.insert(tk.END, ''.join(linhas))
+                self._aparar_log()
+                self.log_text.see(tk.END)
+                linhas.clear()
+            if progresso is not None:
+                self.progressbar['maximum'] = progresso[1]
+                self.progressbar['value'] = progresso[0]
+                self._atualizar_rotulo_progresso(*progresso)
+                progresso = None
+        
+        try:
+            for tipo, dados in self.canal.drenar():
+                if tipo == 'log':
+                    linhas.append(dados)
+                elif tipo == 'progresso':
+                    progresso = dados
+                elif tipo == 'chamar':
+                    aplicar_pendentes()
+                    funcao, args = dados
+                    funcao(*args)
+            aplicar_pendentes()
+        finally:
+            self.root.after(INTERVALO_EVENTOS_MS, self._processar_eventos)
+    
+    def _atualizar_rotulo_progresso(self, valor: int, total: int):
+        texto = f"{valor}/{total}"
+        if self.fila_atual is not None and len(self.fila_atual.trechos()) > 1:
+            categoria, feitos, da_categoria = self.fila_atual.posicao_na_categoria(valor)
+            texto = f"{categoria} {feitos}/{da_categoria} • fila {valor}/{total}"
+        restante = self._tempo_restante(valor, total)
+        if restante is not None:
+            termino = time.strftime('%H:%M', time.localtime(time.time() + restante))
+            texto += f" • ETA {termino} (faltam ~{formatar_duracao(restante)})"
+        self.rotulo_progresso.config(text=texto)
+    
+    def _tempo_restante(self, valor: int, total: int) -> Optional[float]:
+        """Pelo ritmo real da execução; antes do primeiro item, pela estimativa simulada."""
+        if valor >= total:
+            return None
+        if valor > 0 and self.inicio_itens is not None:
+            return (time.monotonic() - self.inicio_itens) / valor * (total - valor)
+        if self.estimativa is not None:
+            return self.estimativa['duracao_total']
+        return None
+    
+    def _estimar(self, itens: Dict[str, float], atraso_inicial: float = 0.0) -> Optional[Dict]:
+        """Roda a simulação (sem mexer no mouse) e registra a estimativa no log."""
+        catalogo = [item for itens_categoria in self.itens_por_categoria.values() for item in itens_categoria]
+        try:
+            estimativa = estimar_execucao(
+                itens, self.coordenadas or COORDENADAS_SIMULADAS, self.configs, catalogo, self.aliases,
+                os.path.join(SCRIPT_DIR, ARQUIVO_HISTORICO), atraso_inicial
+            )
+        except Exception as e:
+            self._adicionar_log(f"⚠️ Não foi possível estimar a duração: {e}")
+            return None
+        for linha in linhas_estimativa(estimativa):
+            self._adicionar_log(linha)
+        return estimativa
+    
+    def _simular_execucao(self):
+        selecionados = self._obter_itens_selecionados()
+        if selecionados is None:
+            return
+        itens = FilaExecucao(selecionados, self._ordem_da_fila()).itens
+        if not itens:
+            messagebox.showwarning("⚠️ Aviso", "Nenhum item com quantidade foi selecionado.")
+            return
+        estimativa = self._estimar(itens)
+        if estimativa is not None:
+            messagebox.showinfo("⏱ Simulação", "\n".join(linha.strip() for linha in linhas_estimativa(estimativa)))
+    
+    def _limpar_campos(self):
+        self._cancelar_edicao()
+        for quantidades in self.quantidades.values():
+            for item in quantidades:
+                quantidades[item] = "0"
+        for lista in self.listas.values():
+            for iid in lista['iids']:
+                self._definir_quantidade(lista, iid, "0")
+        self._adicionar_log("🧹 Campos de quantidade foram limpos.")
+    
+    def _obter_itens_selecionados(self) -> Optional[Dict[str, Dict[str, float]]]:
+        """Obtém, por categoria, os itens com quantidade > 0, ou None se alguma for inválida.
+        
+        Todas as expressões são validadas antes da execução, para que um erro de
+        digitação não derrube um item em silêncio. Sem a fila de categorias,
+        só a categoria exibida é considerada.
+        """
+        self._confirmar_edicao()
+        if self.fila_todas_categorias.get():
+            categorias = list(self.quantidades)
+        else:
+            categorias = [self.categoria_selecionada.get()]
+        
+        preenchidos = {
+            (categoria, item): valor.strip()
+            for categoria in categorias
+            for item, valor in self.quantidades.get(categoria, {}).items()
+            if valor.strip() and valor.strip() != "0"
+        }
+        valores, erros = validar_expressoes(preenchidos)
+        
+        if erros:
+            for (categoria, item), erro in erros.items():
+                self._adicionar_log(f"❌ Quantidade inválida para '{item}' ({categoria}): {erro}")
+            detalhes = "\n\n".join(
+                f"{item} ({categoria}):\n{erro.indicador()}"
+                for (categoria, item), erro in list(erros.items())[:5]
+            )
+            if len(erros) > 5:
+                detalhes += f"\n\n... e mais {len(erros) - 5}."
+            messagebox.showerror(
+                "❌ Quantidades Inválidas",
+                f"Corrija {len(erros)} quantidade(s) antes de iniciar:\n\n{detalhes}"
+            )
+            return None
+        
+        itens_processados: Dict[str, Dict[str, float]] = {categoria: {} for categoria in categorias}
+        for (categoria, item), quantidade in valores.items():
+            texto = preenchidos[(categoria, item)]
+            if quantidade < 0:
+                self._adicionar_log(f"⚠️ Quantidade negativa ignorada para '{item}': {texto}")
+                continue
+            if quantidade > 0:
+                itens_processados[categoria][item] = quantidade
+                if any(operador in texto for operador in "+-*/("):
+                    self._adicionar_log(f"🧮 {item}: {texto} = {quantidade:.3f}")
+        
+        return itens_processados
+    
+    def _ordem_da_fila(self) -> List[str]:
+        """Categorias na ordem digitada no campo 'Ordem da fila' (vazio = ordem do catálogo)."""
+        ordem = []
+        for nome in self.ordem_categorias.get().replace(';', ',').split(','):
+            nome = nome.strip().upper()
+            if not nome:
+                continue
+            if nome not in self.quantidades:
+                self._adicionar_log(f"⚠️ Categoria desconhecida na ordem da fila ignorada: {nome}")
+            elif nome not in ordem:
+                ordem.append(nome)
+        return ordem
+    
+    def _atualizar_estado_botoes(self, estado: str):
+        self.estado = estado
+        if estado == "ocioso":
+            self.btn_iniciar.config(state="normal")
+            self.btn_pausar.config(state="disabled", text="⏸ PAUSAR")
+            self.btn_parar.config(state="disabled")
+            self.btn_limpar.config(state="normal")
+        elif estado == "executando":
+            self.btn_iniciar.config(state="disabled")
+            self.btn_pausar.config(state="normal", text="⏸ PAUSAR")
+            self.btn_parar.config(state="normal")
+            self.btn_limpar.config(state="disabled")
+        elif estado == "pausado":
+            self.btn_iniciar.config(state="disabled")
+            self.btn_pausar.config(state="normal", text="▶ RETOMAR")
+            self.btn_parar.config(state="normal")
+            self.btn_limpar.config(state="disabled")
+    
+    def _pausar_retomar_automacao(self):
+        if self.pause_event.is_set():
+            self.pause_event.clear()
+            self._adicionar_log("⏸ Automação PAUSADA.")
+            self._atualizar_estado_botoes("pausado")
+        else:
+            self.pause_event.set()
+            self._adicionar_log("▶ Automação RETOMADA.")
+            self._atualizar_estado_botoes("executando")
+    
+    def _parar_automacao(self):
+        if messagebox.askyesno("Parar Automação", "⚠️ Tem certeza que deseja parar a execução?"):
+            self.stop_event.set()
+            if not self.pause_event.is_set():
+                self.pause_event.set()
+            self._adicionar_log("🛑 Parada solicitada pelo usuário...")
+    
+    def _calibrar_gps(self):
+        backend = PyAutoGUIBackend(float(self.configs.get('pyautogui_pause', DEFAULTS['pyautogui_pause'])))
+        self.root.iconify()
+        try:
+            messagebox.showinfo(
+                "🎯 Calibração Necessária",
+                "Vamos calibrar as posições do mouse.\n\n"
+                "Pressione OK e siga as instruções no console."
+            )
+            
+            print("\n" + "="*60)
+            print("CALIBRAÇÃO - PASSO 1")
+            print("="*60)
+            input("Posicione o mouse sobre o CAMPO DE BUSCA e pressione Enter...")
+            busca_x, busca_y = backend.position()
+            print(f"✅ Coordenada registrada: X={busca_x}, Y={busca_y}\n")
+            
+            messagebox.showinfo(
+                "🎯 Calibração - Passo 2",
+                "Agora, no sistema Raffinato, pesquise um item qualquer\n"
+                "para que a janela de ajuste de quantidade apareça.\n\n"
+                "Pressione OK quando estiver pronto."
+            )
+            
+            print("="*60)
+            print("CALIBRAÇÃO - PASSO 2")
+            print("="*60)
+            input("Posicione o mouse sobre o CAMPO DE QUANTIDADE e pressione Enter...")
+            quantidade_x, quantidade_y = backend.position()
+            print(f"✅ Coordenada registrada: X={quantidade_x}, Y={quantidade_y}\n")
+            
+            self.coordenadas = {
+                'busca': {'x': busca_x, 'y': busca_y},
+                'quantidade': {'x': quantidade_x, 'y': quantidade_y}
+            }
+            
+            if self.configs.get('verificar_itens') and self.configs.get('modo_verificacao', 'grade') == 'grade':
+                print("="*60)
+                print("CALIBRAÇÃO - PASSO 3")
+                print("="*60)
+                input("Posicione o mouse sobre a GRADE de saídas (onde a nova linha aparece) e pressione Enter...")
+                grade_x, grade_y = backend.position()
+                print(f"✅ Coordenada registrada: X={grade_x}, Y={grade_y}\n")
+                self.coordenadas['grade'] = {'x': grade_x, 'y': grade_y}
+            
+            print("="*60)
+            print("CALIBRAÇÃO - ÂNCORA DA JANELA")
+            print("="*60)
+            input("Posicione o mouse sobre um elemento FIXO da janela do Raffinato (título, logotipo\n"
+                  "ou rótulo de um campo) e pressione Enter; depois afaste o mouse...")
+            ancora_x, ancora_y = backend.position()
+            time.sleep(2)  # Tempo para afastar o mouse e não capturar o realce do elemento
+            largura, altura = (int(v) for v in self.configs.get('tamanho_ancora', DEFAULTS['tamanho_ancora']))
+            regiao = (max(0, ancora_x - largura // 2), max(0, ancora_y - altura // 2), largura, altura)
+            backend.screenshot(regiao).save(os.path.join(SCRIPT_DIR, ARQUIVO_ANCORA))
+            self.coordenadas['ancora'] = {
+                'arquivo': ARQUIVO_ANCORA, 'x': regiao[0], 'y': regiao[1], 'largura': largura, 'altura': altura
+            }
+            print("✅ Âncora salva: as posições passam a acompanhar a janela se ela for movida.\n")
+            
+            if self.config_manager.salvar_configuracoes(self.coordenadas, self.configs):
+                messagebox.showinfo("✅ Sucesso", "Calibração concluída com sucesso!")
+                self._adicionar_log("✅ Calibração GPS concluída com sucesso!")
+            else:
+                messagebox.showerror("❌ Erro", "Não foi possível salvar as coordenadas.")
+        finally:
+            self.root.deiconify()
+    
+    def _oferecer_retomada(self):
+        """Oferece retomar a execução anterior se o diário ficou inacabado."""
+        pendencias = DiarioExecucao.ler_pendencias(self.caminho_diario)
+        if not pendencias:
+            return
+        
+        mensagem = (
+            f"A última execução não terminou: {pendencias['concluidos']} item(ns) concluído(s) "
+            f"e {len(pendencias['itens'])} pendente(s).\n\n"
+        )
+        if pendencias['em_andamento']:
+            mensagem += (
+                f"⚠️ O item '{pendencias['em_andamento']}' estava em processamento e NÃO será "
+                "repetido. Confira no Raffinato se ele foi lançado.\n\n"
+            )
+        mensagem += "Deseja retomar apenas os itens pendentes?"
+        
+        if messagebox.askyesno("♻️ Retomar Execução", mensagem) and pendencias['itens']:
+            self._adicionar_log(f"♻️ Retomando {len(pendencias['itens'])} item(ns) pendente(s).")
+            self._iniciar_automacao(pendencias['itens'])
+        else:
+            DiarioExecucao(self.caminho_diario).finalizar('descartado')
+            self._adicionar_log("🗑️ Execução anterior descartada.")
+    
+    def _iniciar_automacao(self, itens_a_processar: Optional[Dict[str, float]] = None):
+        if not self.coordenadas:
+            self._calibrar_gps()
+            if not self.coordenadas:
+                self._adicionar_log("❌ Calibração cancelada. Automaçãonão iniciada.")
+                return
+        
+        self.fila_atual = None
+        if itens_a_processar is None:
+            selecionados = self._obter_itens_selecionados()
+            if selecionados is None:
+                return
+            self.fila_atual = FilaExecucao(selecionados, self._ordem_da_fila())
+            itens_a_processar = self.fila_atual.itens
+        if not itens_a_processar:
+            messagebox.showwarning("⚠️ Aviso", "Nenhum item com quantidade foi selecionado.")
+            return
+        if self.fila_atual is not None and len(self.fila_atual.trechos()) > 1:
+            # Quantidades esquecidas em categorias que não estão na tela também seriam lançadas
+            resumo = "\n".join(f"• {categoria}: {quantidade} item(ns)"
+                                for categoria, quantidade in self.fila_atual.trechos())
+            if not messagebox.askyesno("📂 Confirmar fila",
+                                       f"Serão lançados itens de {len(self.fila_atual.trechos())} categorias:"
+                                       f"\n\n{resumo}\n\nContinuar?"):
+                return
+        
+        self.stop_event.clear()
+        self.pause_event.set()
+        self._atualizar_progresso(0, len(itens_a_processar))
+        self._atualizar_estado_botoes("executando")
+        
+        self._adicionar_log(f"🚀 Iniciando automação com {len(itens_a_processar)} item(ns)...")
+        if self.fila_atual is not None:
+            self._adicionar_log(f"📂 Fila: {self.fila_atual.descricao()}")
+            for item in dict.fromkeys(self.fila_atual.mesclados):
+                self._adicionar_log(f"🔗 '{item}' aparece em mais de uma categoria; quantidades somadas.")
+        self.inicio_itens = None
+        self.estimativa = self._estimar(itens_a_processar, atraso_inicial=5)
+        
+        threading.Thread(
+            target=self._thread_executar_automacao,
+            args=(itens_a_processar,),
+            daemon=True
+        ).start()
+    
+    def _oferecer_reprocessamento(self, falhas: List[Dict]):
+        """Ao fim de uma execução com falhas, oferece rodar de novo só esses itens."""
+        mensagem = f"{len(falhas)} item(ns) falharam após todas as tentativas:\n\n"
+        mensagem += "\n".join(f"• {falha['item']} ({falha['classe']})" for falha in falhas[:15])
+        if len(falhas) > 15:
+            mensagem += f"\n... e mais {len(falhas) - 15}"
+        if any(falha['classe'] == 'verificacao' for falha in falhas):
+            mensagem += ("\n\n⚠️ Itens de 'verificacao' podem ter sido lançados mesmo assim; "
+                         "confira no Raffinato antes de reprocessar.")
+        mensagem += "\n\nDeseja reprocessar apenas os itens com falha?"
+        if messagebox.askyesno("🔁 Reprocessar Falhas", mensagem):
+            self._adicionar_log(f"🔁 Reprocessando {len(falhas)} item(ns) com falha.")
+            self._iniciar_automacao({falha['item']: falha['quantidade'] for falha in falhas})
+    
+    def _thread_executar_automacao(self, itens: Dict[str, float]):
+        falhas: List[Dict] = []
+        try:
+            self._adicionar_log("⏳ Aguardando 5 segundos para você posicionar a janela do Raffinato...")
+            self.canal.chamar(self.root.iconify)
+            if self.stop_event.wait(5):
+                self._adicionar_log("⚠️ Automação interrompida antes de começar.")
+                return
+            
+            catalogo = [item for itens in self.itens_por_categoria.values() for item in itens]
+            engine = AutomationEngine(self.coordenadas, self.configs, catalogo=catalogo, aliases=self.aliases)
+            historico = None
+            if self.configs.get('registrar_historico', DEFAULTS['registrar_historico']):
+                historico = HistoricoExecucao(os.path.join(SCRIPT_DIR, ARQUIVO_HISTORICO))
+            self.inicio_itens = time.monotonic()
+            resultado = engine.run(
+                itens,
+                self._adicionar_log,
+                self._atualizar_progresso,
+                self.stop_event,
+                self.pause_event,
+                DiarioExecucao(self.caminho_diario),
+                historico
+            )
+            falhas = engine.falhas
+            if falhas:
+                caminho_falhas = os.path.join(SCRIPT_DIR, ARQUIVO_FALHAS)
+                if salvar_falhas(caminho_falhas, falhas):
+                    self._adicionar_log(f"📄 Falhas salvas em {caminho_falhas}")
+            
+            self._adicionar_log(resultado)
+            self.canal.chamar(messagebox.showinfo, "🎉 Concluído", resultado)
+            
+        except Exception as e:
+            self._adicionar_log(f"❌ ERRO CRÍTICO: {e}")
+            self.canal.chamar(messagebox.showerror, "❌ Erro Crítico", f"Ocorreu um erro inesperado:\n\n{e}")
+        finally:
+            self.canal.chamar(self.root.deiconify)
+            self.canal.chamar(self._atualizar_estado_botoes, "ocioso")
+            self._adicionar_log("✅ Pronto para nova execução.")
+            if falhas:
+                self.canal.chamar(self._oferecer_reprocessamento, falhas)
+
+def executar_gui():
+    """Abre a interface gráfica."""
+    root = tk.Tk()
+    Style(theme='darkly')  # Tema moderno e profissional
+    RaffinatoGUI(root)
+    root.mainloop()
+
+if __name__ == "__main__":
+    executar_gui()
@@ -0,0 +1,9 @@
+"""Opções da suíte de testes."""
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        '--atualizar-baseline',
+        action='store_true',
+        help="Regrava tests/baseline_desempenho.json com as medições desta execução (use com -m desempenho)"
+    )
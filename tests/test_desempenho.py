@@ -0,0 +1,213 @@
+"""Desempenho dos caminhos quentes do robô, comparado com tests/baseline_desempenho.json.
+
+Cada métrica é o melhor de várias repetições; o teste falha quando ela piora
+além da tolerância da baseline. Os tempos de CPU são gravados como múltiplos
+de uma carga de referência (só Python puro, sem código do robô) medida na
+mesma execução, para a comparação valer em outra máquina. Depois de uma
+mudança intencional, regrave as referências com:
+
+    python -m pytest -m desempenho --atualizar-baseline
+
+A suíte fica fora do `pytest` padrão (veja pytest.ini); rode-a com `-m desempenho`.
+"""
+
+import gc
+import json
+import os
+import time
+
+import pytest
+
+from robo import (
+    COORDENADAS_SIMULADAS,
+    ConfigManager,
+    FilaExecucao,
+    IndiceBusca,
+    executar_benchmark,
+    validar_expressoes
+)
+
+pytestmark = pytest.mark.desempenho
+
+ARQUIVO_BASELINE = os.path.join(os.path.dirname(__file__), 'baseline_desempenho.json')
+TOLERANCIA_PADRAO = 0.75
+PALAVRAS = ['ACUCAR', 'FARINHA', 'LEITE', 'QUEIJO', 'MOLHO', 'CREME', 'OLEO', 'SAL', 'CAFE', 'POLPA', 'FRANGO', 'CARNE']
+UNIDADES = ['1KG', '500G', '2L', 'CX', 'UN', 'PCT']
+EXPRESSOES = ['3', '1,5', '2*3+1', '(10-2)/4', '0', '12', '0,25*4', '']
+
+
+def _nome_item(i: int) -> str:
+    return f"MP - {PALAVRAS[i % 12]} {PALAVRAS[(i // 12) % 12]} {i:06d} {UNIDADES[i % 6]}"
+
+
+def _gravar_catalogo(caminho: str, total: int, categorias: int = 10):
+    por_categoria = max(1, total // categorias)
+    with open(caminho, 'w', encoding='utf-8') as f:
+        for i in range(total):
+            if i % por_categoria == 0:
+                f.write(f"[CATEGORIA {i // por_categoria:02d}]\n")
+            f.write(_nome_item(i) + '\n')
+
+
+def _melhor_tempo(funcao, repeticoes: int, preparar=None) -> float:
+    """Menor duração (s) entre as repetições, sem o coletor de lixo; `preparar` roda fora da medição."""
+    melhor = float('inf')
+    for _ in range(repeticoes):
+        argumentos = (preparar(),) if preparar else ()
+        gc.collect()
+        gc.disable()
+        try:
+            inicio = time.perf_counter()
+            funcao(*argumentos)
+            melhor = min(melhor, time.perf_counter() - inicio)
+        finally:
+            gc.enable()
+    return melhor
+
+
+def _carga_referencia():
+    """Trabalho fixo de CPU parecido com o do robô (texto, dicionários, ordenação), sem usar o robô."""
+    linhas = [f"MP - PRODUTO {i % 97} LINHA {i:06d} {UNIDADES[i % 6]}" for i in range(20_000)]
+    indice = {}
+    for numero, linha in enumerate(linhas):
+        for palavra in linha.lower().split():
+            indice.setdefault(palavra, []).append(numero)
+    return sorted(indice, key=lambda palavra: (len(indice[palavra]), palavra))
+
+
+@pytest.fixture(scope='session')
+def referencia_ms():
+    """Duração (ms) da carga de referência nesta máquina, nesta execução."""
+    return _melhor_tempo(_carga_referencia, 30) * 1000
+
+
+@pytest.fixture(scope='session')
+def baseline(request, referencia_ms):
+    """Compara (ou, com --atualizar-baseline, registra) uma métrica contra a referência gravada.
+    
+    Métricas em 'ms' são divididas pela carga de referência e comparadas como 'x ref'.
+    """
+    atualizar = request.config.getoption('--atualizar-baseline')
+    try:
+        with open(ARQUIVO_BASELINE, 'r', encoding='utf-8') as f:
+            dados = json.load(f)
+    except FileNotFoundError:
+        dados = {'tolerancia': TOLERANCIA_PADRAO, 'metricas': {}}
+    
+    def comparar(nome: str, valor: float, unidade: str, maior_melhor: bool = False):
+        if unidade == 'ms':
+            valor, unidade = valor / referencia_ms, 'x ref'
+        metrica = dados['metricas'].get(nome)
+        if atualizar:
+            metrica = dict(metrica or {}, unidade=unidade, maior_melhor=maior_melhor)
+            metrica['valor'] = float(f"{valor:.4g}")
+            dados['metricas'][nome] = metrica
+            dados['referencia_ms'] = round(referencia_ms, 1)
+            return
+        if metrica is None:
+            pytest.skip(f"'{nome}' sem baseline; rode com --atualizar-baseline")
+        tolerancia = metrica.get('tolerancia', dados['tolerancia'])
+        referencia = metrica['valor']
+        if maior_melhor:
+            # Simétrico ao limite de tempo: vazão caindo na mesma proporção em que o tempo sobe
+            limite = referencia / (1 + tolerancia)
+            assert valor >= limite, (f"{nome}: {valor:.1f} {unidade} < {limite:.1f} "
+                                     f"(baseline {referencia:.1f}, tolerância {tolerancia:.0%})")
+        else:
+            limite = referencia * (1 + tolerancia)
+            assert valor <= limite, (f"{nome}: {valor:.4g} {unidade} > {limite:.4g} "
+                                     f"(baseline {referencia:.4g}, tolerância {tolerancia:.0%}, "
+                                     f"referência {referencia_ms:.1f} ms)")
+    
+    yield comparar
+    if atualizar:
+        with open(ARQUIVO_BASELINE, 'w', encoding='utf-8') as f:
+            json.dump(dados, f, ensure_ascii=False, indent=2, sort_keys=True)
+            f.write('\n')
+
+
+@pytest.mark.parametrize('total', [100, 10_000, 100_000])
+def test_carregar_itens(tmp_path, baseline, total):
+    caminho = str(tmp_path / 'itens.txt')
+    _gravar_catalogo(caminho, total)
+    cache = tmp_path / '.catalogo_cache.json'
+    repeticoes = 3 if total >= 100_000 else 20
+    
+    def sem_cache():
+        if cache.exists():
+            cache.unlink()
+        return ConfigManager(caminho, str(tmp_path / 'coordenadas.json'))
+    
+    frio = _melhor_tempo(lambda gerente: gerente.carregar_itens(), repeticoes, sem_cache)
+    assert sum(len(itens) for itens in ConfigManager(caminho, '').carregar_itens().values()) == total
+    com_cache = _melhor_tempo(
+        lambda gerente: gerente.carregar_itens(), repeticoes,
+        lambda: ConfigManager(caminho, str(tmp_path / 'coordenadas.json'))
+    )
+    
+    baseline(f"carregar_itens_{total}", frio * 1000, 'ms')
+    baseline(f"carregar_itens_{total}_cache", com_cache * 1000, 'ms')
+
+
+def test_latencia_do_filtro_por_tecla(baseline):
+    itens = [_nome_item(i) for i in range(10_000)]
+    consulta = "molho cre 0001"
+    medias, piores = [], []
+    for _ in range(15):
+        indice = IndiceBusca(itens)
+        duracoes = [_melhor_tempo(lambda: indice.buscar(consulta[:fim]), 1)
+                    for fim in range(1, len(consulta) + 1)]
+        medias.append(sum(duracoes) / len(duracoes))
+        piores.append(max(duracoes))
+    
+    termos = consulta.upper().split()
+    assert indice.buscar(consulta) == [
+        i for i, item in enumerate(itens)
+        if all(any(palavra.startswith(termo) for palavra in item.split()) for termo in termos)
+    ]
+    baseline("filtro_tecla_media", min(medias) * 1000, 'ms')
+    baseline("filtro_tecla_pior", min(piores) * 1000, 'ms')
+
+
+def test_planilha_completa(baseline):
+    """O trabalho de _obter_itens_selecionados + a fila, numa planilha de 10 mil linhas preenchidas."""
+    preenchidos = {
+        (f"CATEGORIA {i // 1000:02d}", _nome_item(i)): EXPRESSOES[i % len(EXPRESSOES)]
+        for i in range(10_000)
+        if EXPRESSOES[i % len(EXPRESSOES)] not in ('', '0')
+    }
+    
+    def processar():
+        valores, erros = validar_expressoes(preenchidos)
+        quantidades = {}
+        for (categoria, item), quantidade in valores.items():
+            if quantidade > 0:
+                quantidades.setdefault(categoria, {})[item] = quantidade
+        return FilaExecucao(quantidades), erros
+    
+    fila, erros = processar()
+    assert not erros and len(fila.itens) == len(preenchidos)
+    baseline("planilha_10k", _melhor_tempo(processar, 15) * 1000, 'ms')
+
+
+def test_vazao_do_engine(tmp_path, baseline):
+    caminho_itens = str(tmp_path / 'itens.txt')
+    _gravar_catalogo(caminho_itens, 40, categorias=1)
+    caminho_coords = str(tmp_path / 'coordenadas.json')
+    configs = {
+        'modo_espera': 'tela',
+        'tempo_espera_pesquisa': 1.0,
+        'tempo_espera_confirmacao': 0.5,
+        'intervalo_verificacao_tela': 0.005,
+        'registrar_historico': False
+    }
+    with open(caminho_coords, 'w', encoding='utf-8') as f:
+        json.dump({'coordenadas': COORDENADAS_SIMULADAS, 'configuracoes': configs}, f)
+    
+    melhor = 0.0
+    for _ in range(2):
+        resultado = executar_benchmark(ConfigManager(caminho_itens, caminho_coords),
+                                       latencia_pesquisa=0.02, latencia_confirmacao=0.01)
+        assert resultado['erros'] == [] and resultado['registros'] == 40
+        melhor = max(melhor, resultado['itens_por_minuto'])
+    baseline("engine_itens_por_minuto", melhor, 'itens/min', maior_melhor=True)
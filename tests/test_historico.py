@@ -0,0 +1,97 @@
+"""Histórico e rastro são só contabilidade: falhas deles (ou depois de confirmar) não podem repetir lançamentos."""
+
+import os
+import sqlite3
+import threading
+
+from robo import AutomationEngine, HistoricoExecucao, RaffinatoSimulado, RastroExecucao
+
+COORDENADAS = {'busca': {'x': 100, 'y': 100}, 'quantidade': {'x': 300, 'y': 200}}
+CATALOGO = ['MP - ITEM A', 'MP - ITEM B']
+
+
+class HistoricoTravado(HistoricoExecucao):
+    def gravar(self):
+        raise sqlite3.OperationalError("database is locked")
+
+
+def test_banco_travado_nao_repete_item(tmp_path):
+    simulado = RaffinatoSimulado(CATALOGO, COORDENADAS, latencia_pesquisa=0.01, latencia_confirmacao=0.01)
+    configs = {'registrar_rastro': False, 'tempo_espera_pesquisa': 0.1, 'tempo_espera_confirmacao': 0.1}
+    engine = AutomationEngine(COORDENADAS, configs, simulado)
+    parar, pausar = threading.Event(), threading.Event()
+    pausar.set()
+    mensagens = []
+
+    status = engine.run({'MP - ITEM A': 1.0, 'MP - ITEM B': 2.0}, mensagens.append, lambda v, t: None,
+                        parar, pausar, historico=HistoricoTravado(str(tmp_path / 'historico.db')))
+
+    assert status == "✅ Processamento concluído com sucesso!"
+    assert [item for item, _ in simulado.registros] == CATALOGO
+    assert engine.falhas == []
+    assert any(mensagem.startswith("⚠️ Histórico não gravado") for mensagem in mensagens)
+
+
+def _executar(engine):
+    parar, pausar = threading.Event(), threading.Event()
+    pausar.set()
+    mensagens = []
+    status = engine.run({'MP - ITEM A': 1.0, 'MP - ITEM B': 2.0}, mensagens.append, lambda v, t: None,
+                        parar, pausar)
+    return status, mensagens
+
+
+def _engine():
+    simulado = RaffinatoSimulado(CATALOGO, COORDENADAS, latencia_pesquisa=0.01, latencia_confirmacao=0.01)
+    configs = {'registrar_rastro': False, 'tempo_espera_pesquisa': 0.1, 'tempo_espera_confirmacao': 0.1}
+    return AutomationEngine(COORDENADAS, configs, simulado), simulado
+
+
+def test_rastro_com_erro_nao_repete_item(monkeypatch):
+    registrar = RastroExecucao.registrar
+
+    def disco_cheio(self, item, etapa, duracao_ns):
+        if (item, etapa) == ('MP - ITEM A', 'confirmar'):
+            raise OSError(28, "No space left on device")
+        registrar(self, item, etapa, duracao_ns)
+
+    monkeypatch.setattr(RastroExecucao, 'registrar', disco_cheio)
+    engine, simulado = _engine()
+
+    status, mensagens = _executar(engine)
+
+    assert status == "✅ Processamento concluído com sucesso!"
+    assert [item for item, _ in simulado.registros] == CATALOGO
+    assert any(mensagem.startswith("⚠️ Registro do item 'MP - ITEM A'") for mensagem in mensagens)
+
+
+def test_erro_depois_de_confirmar_nao_repete_item():
+    engine, simulado = _engine()
+    executar_passo = engine._executar_passo
+
+    def falha_apos_confirmar(passo, valores, referencia, item):
+        executar_passo(passo, valores, referencia, item)
+        if (item, passo['etapa']) == ('MP - ITEM A', 'confirmar'):
+            raise RuntimeError("diálogo inesperado")
+
+    engine._executar_passo = falha_apos_confirmar
+
+    status, mensagens = _executar(engine)
+
+    assert [item for item, _ in simulado.registros] == CATALOGO
+    assert status == "⚠️ Processamento concluído com 1 falha(s)."
+    assert [(falha['item'], falha['tentativas']) for falha in engine.falhas] == [('MP - ITEM A', 1)]
+    assert not any(mensagem.startswith("🔁") for mensagem in mensagens)
+
+
+def test_rastro_guarda_so_os_mais_recentes(tmp_path):
+    for dia in range(1, 6):
+        (tmp_path / f'execucao-2026010{dia}-120000.jsonl').write_text('', encoding='utf-8')
+    (tmp_path / 'anotacoes.txt').write_text('', encoding='utf-8')
+
+    rastro = RastroExecucao(str(tmp_path), manter=3)
+    rastro.fechar()
+
+    restantes = sorted(caminho.name for caminho in tmp_path.iterdir())
+    assert restantes == ['anotacoes.txt', 'execucao-20260104-120000.jsonl',
+                         'execucao-20260105-120000.jsonl', os.path.basename(rastro.caminho)]
@@ -0,0 +1,121 @@
+"""Latência de parada e pausa do AutomationEngine contra o RaffinatoSimulado."""
+
+import threading
+import time
+
+import pytest
+
+from robo import AutomationEngine, RaffinatoSimulado
+
+COORDENADAS = {'busca': {'x': 100, 'y': 100}, 'quantidade': {'x': 300, 'y': 200}}
+CATALOGO = [f"MP - ITEM DE TESTE {i:02d}" for i in range(4)]
+LATENCIA_MAXIMA_PARADA = 0.1
+
+
+def _criar_engine(modo_espera: str):
+    simulado = RaffinatoSimulado(CATALOGO, COORDENADAS, latencia_pesquisa=0.3, latencia_confirmacao=0.15)
+    configs = {
+        'tempo_espera_pesquisa': 0.8,
+        'tempo_espera_confirmacao': 0.4,
+        'modo_espera': modo_espera,
+        'registrar_rastro': False
+    }
+    return AutomationEngine(COORDENADAS, configs, simulado), simulado
+
+
+def _iniciar(engine, stop_event, pause_event):
+    resultado = {}
+    
+    def executar():
+        itens = {item: 1.0 for item in CATALOGO}
+        resultado['status'] = engine.run(itens, lambda m: None, lambda v, t: None, stop_event, pause_event)
+    
+    thread = threading.Thread(target=executar, daemon=True)
+    thread.start()
+    return thread, resultado
+
+
+@pytest.mark.parametrize('modo_espera', ['fixo', 'tela'])
+def test_pior_latencia_de_parada_abaixo_de_100ms(modo_espera):
+    pior = 0.0
+    # Atrasos escolhidos para cair em esperas de pesquisa, confirmação e pausas entre passos
+    for atraso in (0.02, 0.1, 0.4, 0.9, 1.3):
+        engine, _ = _criar_engine(modo_espera)
+        parar, pausar = threading.Event(), threading.Event()
+        pausar.set()
+        thread, resultado = _iniciar(engine, parar, pausar)
+        
+        time.sleep(atraso)
+        inicio = time.perf_counter()
+        parar.set()
+        thread.join(timeout=5)
+        pior = max(pior, time.perf_counter() - inicio)
+        
+        assert not thread.is_alive()
+        assert resultado['status'] == "Interrompido"
+    
+    assert pior < LATENCIA_MAXIMA_PARADA, f"pior latência de parada: {pior * 1000:.1f} ms"
+
+
+def test_parada_durante_pausa_e_imediata():
+    engine, _ = _criar_engine('fixo')
+    parar, pausar = threading.Event(), threading.Event()
+    thread, resultado = _iniciar(engine, parar, pausar)
+    
+    time.sleep(0.1)
+    inicio = time.perf_counter()
+    parar.set()
+    thread.join(timeout=5)
+    
+    assert time.perf_counter() - inicio < LATENCIA_MAXIMA_PARADA
+    assert resultado['status'] == "Interrompido"
+
+
+def test_pausa_so_segura_em_ponto_seguro():
+    engine, simulado = _criar_engine('tela')
+    parar, pausar = threading.Event(), threading.Event()
+    pausar.set()
+    thread, resultado = _iniciar(engine, parar, pausar)
+    
+    # Pausa durante a espera da pesquisa: o item segue até o próximo ponto seguro
+    time.sleep(0.15)
+    pausar.clear()
+    time.sleep(0.5)
+    foco_pausado = simulado.foco
+    registros_pausado = len(simulado.registros)
+    time.sleep(0.3)
+    
+    assert simulado.dialogo is not None
+    assert simulado.foco == foco_pausado
+    assert len(simulado.registros) == registros_pausado
+    
+    pausar.set()
+    thread.join(timeout=30)
+    assert resultado['status'] == "✅ Processamento concluído com sucesso!"
+    assert [item for item, _ in simulado.registros] == CATALOGO
+    assert simulado.erros == []
+
+
+def test_conferencias_pendentes_entram_nas_falhas_ao_parar():
+    simulado = RaffinatoSimulado(CATALOGO, COORDENADAS, latencia_pesquisa=0.01, latencia_confirmacao=0.01)
+    configs = {
+        'tempo_espera_pesquisa': 0.1,
+        'tempo_espera_confirmacao': 0.1,
+        'registrar_rastro': False,
+        'verificar_itens': True,
+        'modo_verificacao': 'grade',
+        # A conferência ainda está na fila quando a parada chega
+        'atraso_verificacao': 0.5
+    }
+    # O simulador não desenha a grade: toda conferência diverge
+    engine = AutomationEngine(dict(COORDENADAS, grade={'x': 50, 'y': 400}), configs, simulado)
+    parar, pausar = threading.Event(), threading.Event()
+    pausar.set()
+    
+    def progresso(valor, total):
+        parar.set()
+    
+    status = engine.run({item: 1.0 for item in CATALOGO}, lambda m: None, progresso, parar, pausar)
+    
+    assert status == "Interrompido"
+    assert [(falha['item'], falha['classe']) for falha in engine.falhas] == [(CATALOGO[0], 'verificacao')]
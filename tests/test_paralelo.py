@@ -0,0 +1,92 @@
+"""CoordenadorTelas repartindo um pedido entre várias telas virtuais com o RaffinatoSimulado."""
+
+import threading
+import time
+
+from robo import CoordenadorTelas, DiarioExecucao, mesclar_diarios
+
+COORDENADAS = {'busca': {'x': 100, 'y': 100}, 'quantidade': {'x': 300, 'y': 200}}
+CATALOGO = [f"MP - ITEM DE TESTE {i:02d}" for i in range(12)]
+DISPLAYS = [':91', ':92', ':93']
+CONFIGS = {
+    'tempo_espera_pesquisa': 0.3,
+    'tempo_espera_confirmacao': 0.2,
+    'modo_espera': 'tela',
+    'registrar_rastro': False,
+    'registrar_historico': False
+}
+
+
+def _criar_coordenador(pasta):
+    telas = [
+        {'nome': f"tela{i}", 'display': display, 'coordenadas': COORDENADAS, 'configs': CONFIGS}
+        for i, display in enumerate(DISPLAYS, start=1)
+    ]
+    simulado = {'latencia_pesquisa': 0.05, 'latencia_confirmacao': 0.02}
+    return CoordenadorTelas(telas, CATALOGO, pasta_diarios=str(pasta), simulado=simulado)
+
+
+def test_pedido_repartido_entre_telas(tmp_path):
+    coordenador = _criar_coordenador(tmp_path)
+    itens = {item: float(i + 1) for i, item in enumerate(CATALOGO)}
+    mensagens, progresso = [], []
+
+    status = coordenador.run(itens, mensagens.append, lambda v, t: progresso.append((v, t)), threading.Event())
+
+    assert status == "✅ Processamento concluído com sucesso em 3 tela(s)!"
+    resultados = coordenador.resultados.values()
+    # Um processo por tela, cada um no seu DISPLAY
+    assert sorted(resultado['display'] for resultado in resultados) == DISPLAYS
+    assert len({resultado['pid'] for resultado in resultados}) == len(DISPLAYS)
+    assert all(resultado['registros'] for resultado in resultados)
+
+    # Cada item lançado exatamente uma vez, em alguma das telas
+    registros = [registro for resultado in resultados for registro in resultado['registros']]
+    assert sorted(registros) == sorted((item, f"{qtd:g},0") for item, qtd in itens.items())
+
+    # Progresso e log mesclados numa visão só
+    assert progresso[-1] == (len(itens), len(itens))
+    assert [v for v, _ in progresso] == sorted(v for v, _ in progresso)
+    assert {f"[tela{i}]" for i in range(1, 4)} <= {m.split(' ', 1)[0] for m in mensagens}
+    assert mesclar_diarios(coordenador.diarios()) is None
+
+
+def test_parada_deixa_pendencias_nos_diarios(tmp_path):
+    coordenador = _criar_coordenador(tmp_path)
+    itens = {item: 1.0 for item in CATALOGO}
+    parar = threading.Event()
+
+    def progresso(valor, total):
+        if valor >= 3:
+            parar.set()
+
+    inicio = time.perf_counter()
+    status = coordenador.run(itens, lambda m: None, progresso, parar)
+    assert time.perf_counter() - inicio < 30
+    assert status.startswith("⚠️ 3 tela(s) não terminaram")
+
+    lancados = {item for resultado in coordenador.resultados.values() for item, _ in resultado['registros']}
+    pendencias = mesclar_diarios(coordenador.diarios())
+    assert pendencias is not None
+    # Nada some nem se repete: pendente + lançado + em andamento cobre o pedido
+    assert not lancados & set(pendencias['itens'])
+    assert pendencias['itens']
+    assert lancados | set(pendencias['itens']) | set(pendencias['em_andamento']) == set(CATALOGO)
+
+    coordenador.run(pendencias['itens'], lambda m: None, lambda v, t: None, threading.Event())
+    assert mesclar_diarios(coordenador.diarios()) is None
+
+
+def test_tela_sem_itens_nao_herda_pendencias_antigas(tmp_path):
+    coordenador = _criar_coordenador(tmp_path)
+    # Diários de uma execução anterior interrompida, com itens pendentes em todas as telas
+    for caminho in coordenador.diarios().values():
+        diario = DiarioExecucao(caminho)
+        diario.iniciar({item: 1.0 for item in CATALOGO[:3]})
+        diario.fechar()
+
+    # Pedido menor que o número de telas: algumas telas ficam sem itens
+    status = coordenador.run({CATALOGO[-1]: 2.0}, lambda m: None, lambda v, t: None, threading.Event())
+
+    assert status == "✅ Processamento concluído com sucesso em 1 tela(s)!"
+    assert mesclar_diarios(coordenador.diarios()) is None
@@ -0,0 +1,129 @@
+"""ServidorPedidos atendendo clientes TCP, com o RaffinatoSimulado no lugar do mouse."""
+
+import json
+import time
+
+import pytest
+
+import robo
+from robo import ConfigManager, RaffinatoSimulado, ServidorPedidos, enviar_ao_servidor
+
+COORDENADAS = {'busca': {'x': 100, 'y': 100}, 'quantidade': {'x': 300, 'y': 200}}
+CATALOGO = [f"MP - ITEM DE TESTE {i:02d}" for i in range(12)]
+CONFIGS = {
+    'tempo_espera_pesquisa': 0.3,
+    'tempo_espera_confirmacao': 0.2,
+    'modo_espera': 'tela',
+    'registrar_rastro': False,
+    'registrar_historico': False
+}
+
+
+@pytest.fixture
+def servidor(tmp_path):
+    (tmp_path / 'itens.txt').write_text("[COZINHA]\n" + "\n".join(CATALOGO) + "\n", encoding='utf-8')
+    (tmp_path / 'coordenadas.json').write_text(
+        json.dumps({'coordenadas': COORDENADAS, 'configuracoes': CONFIGS}), encoding='utf-8')
+    config_manager = ConfigManager(str(tmp_path / 'itens.txt'), str(tmp_path / 'coordenadas.json'))
+    simulado = RaffinatoSimulado(CATALOGO, COORDENADAS, latencia_pesquisa=0.05, latencia_confirmacao=0.02)
+    robo_servidor = ServidorPedidos(config_manager, porta=0, atraso_inicial=0, log=lambda m: None,
+                                    backend=simulado, pasta=str(tmp_path))
+    robo_servidor.simulado = simulado
+    robo_servidor.iniciar()
+    yield robo_servidor
+    robo_servidor.encerrar()
+
+
+def _enviar(servidor, acao, **campos):
+    return enviar_ao_servidor(dict(campos, acao=acao), porta=servidor.porta)
+
+
+def _pedido(servidor, itens, nome, prioridade=0):
+    return _enviar(servidor, 'enviar', nome=nome, operador='teste', prioridade=prioridade,
+                   linhas=[[item, "1"] for item in itens])
+
+
+def _aguardar(servidor, condicao, limite=30.0):
+    fim = time.monotonic() + limite
+    while time.monotonic() < fim:
+        status = _enviar(servidor, 'status')
+        if condicao(status):
+            return status
+        time.sleep(0.05)
+    raise AssertionError(f"condição não atingida; último status: {status}")
+
+
+def test_maior_prioridade_roda_primeiro(servidor):
+    primeiro = _pedido(servidor, CATALOGO[:6], "rodando")
+    _aguardar(servidor, lambda s: s['atual'] is not None)
+    baixa = _pedido(servidor, CATALOGO[6:9], "baixa", prioridade=0)
+    alta = _pedido(servidor, CATALOGO[9:], "alta", prioridade=5)
+    assert alta['posicao'] == 1
+
+    status = _enviar(servidor, 'status')
+    assert status['atual']['id'] == primeiro['id']
+    assert [pedido['id'] for pedido in status['fila']] == [alta['id'], baixa['id']]
+
+    status = _aguardar(servidor, lambda s: len(s['encerrados']) == 3)
+    assert [pedido['id'] for pedido in status['encerrados']] == [primeiro['id'], alta['id'], baixa['id']]
+    assert [item for item, _ in servidor.simulado.registros] == CATALOGO[:6] + CATALOGO[9:] + CATALOGO[6:9]
+
+
+def test_pedido_invalido_e_recusado(servidor, monkeypatch):
+    resposta = _pedido(servidor, ["MP - ITEM QUE NAO EXISTE"], "errado")
+    assert not resposta['ok'] and resposta['erros']
+    resposta = _enviar(servidor, 'enviar', linhas=[[CATALOGO[0], "1/0"]])
+    assert not resposta['ok'] and resposta['erros']
+    assert not _enviar(servidor, 'enviar', nome="sem linhas")['ok']
+    assert not _enviar(servidor, 'inexistente')['ok']
+
+    def estimativa_quebrada(*args, **kwargs):
+        raise RuntimeError("simulação falhou")
+
+    # Falha da estimativa vira resposta de erro, não conexão derrubada
+    monkeypatch.setattr(robo, 'estimar_execucao', estimativa_quebrada)
+    resposta = _pedido(servidor, CATALOGO[:1], "sem estimativa")
+    assert not resposta['ok'] and "simulação falhou" in resposta['erros'][0]
+
+    status = _enviar(servidor, 'status')
+    assert status['fila'] == [] and status['encerrados'] == []
+    assert servidor.simulado.registros == []
+
+
+def test_cancelar_pedido_na_fila(servidor):
+    rodando = _pedido(servidor, CATALOGO[:6], "rodando")
+    _aguardar(servidor, lambda s: s['atual'] is not None)
+    na_fila = _pedido(servidor, CATALOGO[6:], "na fila")
+
+    assert not _enviar(servidor, 'cancelar', id=rodando['id'])['ok']
+    assert not _enviar(servidor, 'cancelar', id=999)['ok']
+    assert _enviar(servidor, 'cancelar', id=na_fila['id'])['ok']
+
+    status = _aguardar(servidor, lambda s: s['atual'] is None and not s['fila'])
+    assert {pedido['id']: pedido['estado'] for pedido in status['encerrados']} == {
+        na_fila['id']: 'cancelado', rodando['id']: 'concluido'}
+    assert [item for item, _ in servidor.simulado.registros] == CATALOGO[:6]
+
+
+def test_interrupcao_pausa_fila_e_devolve_o_restante(servidor):
+    interrompido = _pedido(servidor, CATALOGO[:8], "interrompido")
+    _aguardar(servidor, lambda s: s['atual'] is not None and s['atual']['progresso'][0] >= 2)
+    seguinte = _pedido(servidor, CATALOGO[8:], "seguinte", prioridade=5)
+    assert _enviar(servidor, 'parar')['ok']
+
+    status = _aguardar(servidor, lambda s: s['pausada'] and s['atual'] is None)
+    # O restante volta ao topo mesmo com um pedido de prioridade maior esperando
+    assert [pedido['id'] for pedido in status['fila']] == [interrompido['id'], seguinte['id']]
+    restante = status['fila'][0]
+    lancados = [item for item, _ in servidor.simulado.registros]
+    assert 0 < restante['total_itens'] < 8
+    assert len(lancados) + restante['total_itens'] <= 8
+    time.sleep(0.3)
+    assert len(servidor.simulado.registros) == len(lancados)  # pausada, nada roda
+
+    assert _enviar(servidor, 'retomar')['ok']
+    status = _aguardar(servidor, lambda s: len(s['encerrados']) == 2)
+    assert [pedido['id'] for pedido in status['encerrados']] == [interrompido['id'], seguinte['id']]
+    registros = [item for item, _ in servidor.simulado.registros]
+    assert len(registros) == len(set(registros))
+    assert set(CATALOGO[8:]) <= set(registros)